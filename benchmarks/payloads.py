@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Synthetic and recorded BLS API responses, and a stand-in transport that serves them, so that
+the whole fetch-and-tablefy pipeline can be benchmarked without a network connection or API key.
+"""
+import calendar
+import glob
+import json
+import os
+import zlib
+
+import requests
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'static')
+
+def series_ids(n_series):
+    """Returns ``n_series`` made-up LAUS-style Series ID's."""
+    return [f'LAUST{str(i).zfill(8)}000003' for i in range(n_series)]
+
+def synthetic_series(series_id, start_year, end_year):
+    """Builds the json for one series with monthly data from ``start_year`` to ``end_year``, newest
+    first like the API. Values are deterministic, and every 50th observation is missing.
+    """
+    seed = zlib.crc32(series_id.encode())
+    data = []
+    for y in range(end_year, start_year - 1, -1):
+        for m in range(12, 0, -1):
+            i = seed + 12 * y + m
+            data.append({
+                'year' : str(y),
+                'period' : f'M{str(m).zfill(2)}',
+                'periodName' : calendar.month_name[m],
+                'value' : '-' if i % 50 == 0 else str(i % 1000 / 10),
+                'footnotes' : [{}]
+            })
+    return {'seriesID' : series_id, 'data' : data}
+
+def synthetic_response(series, start_year, end_year):
+    """Builds the decoded json of an API response for a list of Series ID's."""
+    return {
+        'status' : 'REQUEST_SUCCEEDED',
+        'responseTime' : 0,
+        'message' : [],
+        'Results' : {'series' : [synthetic_series(s, start_year, end_year) for s in series]}
+    }
+
+def recorded_responses():
+    """Returns {file name : content} for every saved API response in ``tests/static``."""
+    responses = {}
+    for path in sorted(glob.glob(os.path.join(STATIC_DIR, '*.json'))):
+        with open(path, 'rb') as f:
+            responses[os.path.basename(path)] = f.read()
+    return responses
+
+class ReplaySession(object):
+    """Stands in for a ``requests.Session``. Answers every post with a recorded response if one
+    was given, or with a synthetic response for exactly the series and years requested. Synthetic
+    responses are encoded once and then reused, so that repeated runs only measure blsconnect.
+
+    :param content: Recorded ``Response.content`` to answer every post with.
+    """
+
+    def __init__(self, content:bytes=None):
+        self.content = content
+        self.posts = 0
+        self._responses = {}
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts += 1
+        if self.content is None:
+            request = json.loads(data)
+            key = (tuple(request['seriesid']), request['startyear'], request['endyear'])
+            if key not in self._responses:
+                self._responses[key] = json.dumps(synthetic_response(
+                    request['seriesid'], int(request['startyear']), int(request['endyear'])
+                )).encode()
+            content = self._responses[key]
+        else:
+            content = self.content
+        r = requests.models.Response()
+        r.status_code = 200
+        r._content = content
+        return r
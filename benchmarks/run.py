@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Offline benchmarks for the fetch-and-tablefy pipeline.
+
+Every stage of :meth:`RequestBLS.series()` is timed over a grid of series counts, year spans and
+shapes, using synthetic responses served by a stand-in transport (see ``payloads.py``), plus an
+end-to-end run over each recorded response in ``tests/static``. For each case the fastest of
+``--repeat`` runs and the peak memory allocated during a separate run are reported.
+
+Run from the repository root::
+
+    python benchmarks/run.py
+    python benchmarks/run.py --series 1 100 5000 --years 20 --shapes long --output bench_output.txt
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from blsconnect import RequestBLS, RequestScheduler
+from blsconnect.response import BLSResponse
+from payloads import series_ids, synthetic_response, recorded_responses, ReplaySession
+
+STAGES = ['tablefy', 'cleanup', 'group', 'group_merge', 'interpolate', 'series']
+END_YEAR = 2019
+
+def client(session):
+    """A RequestBLS that sends requests to ``session`` as fast as it can."""
+    return RequestBLS('benchmark', session=session,
+                      scheduler=RequestScheduler(rate=10**9, period=1.0))
+
+def merge_group(df, shape, groupby, groupby_method):
+    """The frequency collapse that ``_group()`` replaced, a merge against a table of old and new
+    period codes and a groupby on the strings, kept as the baseline for the ``'group'`` stage.
+    """
+    n = {'a' : 12, 'y' : 12, 's' : 6, 'q' : 3, 'm' : 1}[groupby]
+    freq = 'A' if n == 12 else groupby.upper()
+    periods = pd.DataFrame({
+        'period' : [f'M{str(m).zfill(2)}' for m in range(1, 13)],
+        'new_period' : [f'{freq}{str((m - 1) // n + 1).zfill(2)}' for m in range(1, 13)]
+    })
+    df = df.merge(periods, how='left', on='period')
+    keys = ['year', 'new_period'] if shape == 'wide' else ['seriesID', 'year', 'new_period']
+    values = [c for c in df.columns if c not in ['year', 'period', 'periodName', 'new_period',
+                                                 'seriesID', 'footnotes']]
+    return df.groupby(keys)[values].agg(groupby_method).reset_index()
+
+def measure(fn, repeat):
+    """Returns (fastest time in seconds, peak memory in bytes) of calling ``fn``."""
+    seconds = float('inf')
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+def synthetic_cases(series_counts, year_spans, shapes):
+    """Yields (case name, stage, function) for every stage of every synthetic case."""
+    for n_series in series_counts:
+        for n_years in year_spans:
+            ids = series_ids(n_series)
+            start_year = END_YEAR - n_years + 1
+            response = BLSResponse(synthetic_response(ids, start_year, END_YEAR))
+            session = ReplaySession()
+            c = client(session)
+            c.series(ids, start_year, END_YEAR, catalog=False) # warms up the session
+            for shape in shapes:
+                name = f'{n_series} series x {n_years} years, {shape}'
+                table = c._tablefy(response, shape, False)
+                df = c._cleanup_df(table, shape)
+                yield name, 'tablefy', partial(c._tablefy, response, shape, False)
+                yield name, 'cleanup', partial(c._cleanup_df, table, shape)
+                yield name, 'group', partial(c._group, df, ids, shape, 'q', 'mean')
+                yield name, 'group_merge', partial(merge_group, df, shape, 'q', 'mean')
+                yield name, 'interpolate', partial(c._interpolate, df, shape, 'linear')
+                yield name, 'series', partial(c.series, ids, start_year, END_YEAR, shape=shape,
+                                              catalog=False)
+
+def recorded_cases(shapes):
+    """Yields (case name, stage, function) for an end-to-end run over each recorded response."""
+    for file_name, content in recorded_responses().items():
+        data = json.loads(content)['Results']['series']
+        ids = [s['seriesID'] for s in data]
+        years = [int(p['year']) for s in data for p in s['data']]
+        c = client(ReplaySession(content))
+        for shape in shapes:
+            yield f'{file_name}, {shape}', 'series', \
+                partial(c.series, ids, min(years), max(years), shape=shape, catalog=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, nargs='+', default=[1, 10, 100, 1000, 5000],
+                        help='numbers of series to benchmark')
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 20],
+                        help='year spans to benchmark')
+    parser.add_argument('--shapes', nargs='+', default=['wide', 'long'], choices=['wide', 'long'])
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest is kept')
+    parser.add_argument('--output', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    lines = [f'{"case":<40} {"stage":<12} {"seconds":>9} {"peak MB":>9}']
+    print(lines[0])
+    cases = synthetic_cases(args.series, args.years, args.shapes)
+    if 'series' in args.stages:
+        cases = itertools.chain(cases, recorded_cases(args.shapes))
+    for name, stage, fn in cases:
+        if stage not in args.stages:
+            continue
+        try:
+            seconds, peak = measure(fn, args.repeat)
+            line = f'{name:<40} {stage:<12} {seconds:>9.4f} {peak / 2**20:>9.1f}'
+        except Exception as e:
+            line = f'{name:<40} {stage:<12} {"failed: " + type(e).__name__:>19}'
+        print(line)
+        lines.append(line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+if __name__ == '__main__':
+    main()
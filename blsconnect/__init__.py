@@ -8,6 +8,14 @@
     :version: 0.9.1
 """
 from .request import RequestBLS
+from .asyncrequest import AsyncRequestBLS
+from .cache import MemoryCache, DirectoryCache, SQLiteCache
+from .catalog import CatalogIndex
+from .flatfile import FlatFileBLS
+from .store import ParquetStore
+from .result import SeriesResult
+from .scheduler import RequestScheduler
+from .stats import RequestStats
 from .search import bls_search
 
 name = "blsconnect"
\ No newline at end of file
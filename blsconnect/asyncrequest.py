@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from .request import RequestBLS, InputError, BLS_BASE_URL
+
+# aiohttp is optional, and only needed for the default session of AsyncRequestBLS.
+try:
+    import aiohttp
+    RETRY_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError, ValueError)
+except ImportError:
+    aiohttp = None
+    RETRY_ERRORS = (ConnectionError, asyncio.TimeoutError, ValueError)
+
+# The call running in the current context, as (client, dict of the call's messages, catalog and
+# stats). The tasks and threads a call starts inherit it, so calls that run at the same time on one
+# client each keep their own.
+_CALL = contextvars.ContextVar('blsconnect_call', default=(None, None))
+
+def _call_attribute(name):
+    """Property of an attribute that describes a call rather than the client. See
+    :meth:`AsyncRequestBLS._call_state()`.
+    """
+    return property(lambda self: self._call_state()[name],
+                    lambda self, value: self._call_state().__setitem__(name, value))
+
+class AsyncRequestBLS(RequestBLS):
+    """Like :class:`RequestBLS`, but :meth:`series()`, :meth:`series_many()` and :meth:`refresh()`
+    are coroutines and :meth:`iter_series()` is an async generator, so they can be used inside an
+    asyncio application without blocking the event loop.
+
+    Only sending the requests is different from :class:`RequestBLS`. Everything else is shared
+    with it: the year and series limits, the request planning, the cache, store and catalogs, and
+    the parsing, reshaping and transformations, so the DataFrames are exactly the same.
+
+    Every call sends its requests through the same session, so connections to the API are kept
+    open and reused, and at most ``max_workers`` requests of the instance are in flight at a time,
+    however many calls are running at once. Requests are paced and retried by ``scheduler``, the
+    same way as :class:`RequestBLS`.
+
+    Calls that run at the same time each keep their own ``messages``, ``catalog`` and ``stats``.
+    After ``await bls.series()``, they describe that call; elsewhere (e.g. after
+    ``asyncio.gather()``), the call that started last.
+
+    Close the session when you are done, either with ``await bls.close()`` or by using the
+    instance as an async context manager:
+
+    .. code-block:: python
+
+        async with AsyncRequestBLS(key) as bls:
+            df = await bls.series('LNS14000000', 2000, 2019)
+
+    Needs ``aiohttp``, unless you pass your own ``session``.
+
+    :param key: See :class:`RequestBLS`.
+    :param msg_log_level: See :class:`RequestBLS`.
+    :param start_year: See :class:`RequestBLS`.
+    :param end_year: See :class:`RequestBLS`.
+    :param max_workers: Maximum number of requests in flight at the same time.
+    :param cache: See :class:`RequestBLS`.
+    :param session: Object used to send requests, which needs an ``aiohttp.ClientSession``-like
+                    ``.post()`` method. By default an ``aiohttp.ClientSession`` is created the
+                    first time a request is sent.
+    :param pool_size: Maximum number of open connections kept by the default session. Defaults to
+                      ``max_workers``, but at least 10.
+    :param timeout: Seconds to wait for the API to respond before giving up on a request. It is
+                    passed along with every request, so it also applies to a ``session`` you pass
+                    in.
+    :param url: See :class:`RequestBLS`.
+    :param scheduler: See :class:`RequestBLS`.
+    :param catalog_index: See :class:`RequestBLS`.
+    :param store: See :class:`RequestBLS`.
+    :param hooks: See :class:`RequestBLS`.
+    """
+
+    messages = _call_attribute('messages')
+    stats = _call_attribute('stats')
+    _catalog = _call_attribute('_catalog')
+
+    def __init__(self, key:str=None, msg_log_level:int=logging.WARNING, start_year:int=None,
+                 end_year:int=None, max_workers:int=8, cache=None, session=None,
+                 pool_size:int=None, timeout:float=60, url:str=BLS_BASE_URL, scheduler=None,
+                 catalog_index=None, store=None, hooks:dict=None):
+        if session is None and aiohttp is None:
+            raise ImportError('AsyncRequestBLS needs aiohttp. Install it with '
+                              '"pip install blsconnect[async]".')
+        self._last_call = {}
+        super().__init__(key=key, msg_log_level=msg_log_level, start_year=start_year,
+                         end_year=end_year, max_workers=max_workers, cache=cache,
+                         session=session, pool_size=pool_size, timeout=timeout, url=url,
+                         scheduler=scheduler, catalog_index=catalog_index, store=store,
+                         hooks=hooks)
+        self._own_session = session is None
+        self._semaphore = None
+
+    async def series(
+        self,
+        series,
+        start_year:int=None,
+        end_year:int=None,
+        shape:str='wide',
+        keep_footnotes:bool=False,
+        catalog:bool=True,
+        rtn_msg:bool=False,
+        interpolate:str=None,
+        groupby:str=None,
+        groupby_method:str='mean',
+        compact:bool=False,
+        value_dtype:str='float64',
+        time_index:str=None,
+        lazy:bool=False
+    ):
+        """Get a data series from the BLS API by Series ID for a given date range. Takes the same
+        arguments as :meth:`RequestBLS.series()`, and returns the same DataFrame.
+
+        :returns: DataFrame, or :class:`SeriesResult` if ``lazy=True``.
+        """
+
+        start = self._begin_call()
+
+        # Handle user inputs
+        series, start_year, end_year, shape, keep_footnotes = self._prepare_series(
+            series, start_year, end_year, shape, keep_footnotes, interpolate, groupby, compact,
+            time_index, lazy
+        )
+
+        # Get data, put in DataFrame
+        df, catalogs = await self._get_frame_async(series, start_year, end_year, shape,
+                                                   keep_footnotes, catalog)
+
+        # Transform data
+        df = self._finish_series(df, series, start_year, end_year, shape, interpolate, groupby,
+                                 groupby_method, compact, value_dtype, time_index, lazy)
+
+        # Return
+        self._end_call(start, catalog, catalogs)
+        return df
+
+    async def series_many(self, specs):
+        """Gets the data of several independent :meth:`series()` calls at once. See
+        :meth:`RequestBLS.series_many()`.
+
+        :returns: List of DataFrames, one for each spec, in the same order.
+        """
+
+        start = self._begin_call()
+
+        # Handle user inputs
+        calls = self._bind_specs(specs)
+        if not calls:
+            return []
+
+        # Get every cell that any of the calls needs, and split it back up into each call
+        series, start_year, end_year, skip, catalog = self._union(calls)
+        df, catalogs = await self._get_frame_async(series, start_year, end_year, 'long', True,
+                                                   catalog, skip, pack=True)
+        dfs = self._split_calls(df, calls)
+
+        # Return
+        self._end_call(start, catalog, catalogs)
+        return dfs
+
+    async def iter_series(
+        self,
+        series,
+        start_year:int=None,
+        end_year:int=None,
+        shape:str='wide',
+        keep_footnotes:bool=False,
+        catalog:bool=True,
+        compact:bool=False,
+        value_dtype:str='float64'
+    ):
+        """Async generator version of :meth:`RequestBLS.iter_series()`, which takes the same
+        arguments and yields the same DataFrames in the same order:
+
+        .. code-block:: python
+
+            async for df in bls.iter_series(series, 1990, 2019, shape='long'):
+                ...
+
+        At most ``max_workers`` requests are in flight or waiting to be yielded at a time. The
+        requests still in flight are cancelled when the generator is closed, e.g. by
+        ``contextlib.aclosing()`` after breaking out of the loop.
+
+        :returns: async generator of DataFrames
+        """
+        start = self._begin_call()
+
+        # Handle user inputs
+        if shape not in ['wide', 'long']:
+            raise InputError('shape kwarg must be either "wide" or "long".')
+        series, start_year, end_year = \
+            self._input_handler(series, start_year, end_year, shape, keep_footnotes)
+
+        # Stored and cached data comes first, one chunk at a time, then each response
+        plan, skips = [], []
+        for batch in self._series_groups(series):
+            for s_y, e_y in self._year_groups(start_year, end_year):
+                have, df = await asyncio.to_thread(self._lookup_chunk, batch, s_y, e_y, shape,
+                                                   keep_footnotes, catalog and e_y == end_year)
+                if len(df):
+                    yield self._finish_chunk(df, shape, compact, value_dtype)
+                self._plan_chunk(batch, s_y, e_y, have, catalog, plan, skips)
+        responses = self._iter_execute_async(plan, catalog)
+        try:
+            for (batch, s_y, e_y), skip in zip(plan, skips):
+                r = await responses.__anext__()
+                df = await asyncio.to_thread(self._response_chunk, r, batch, s_y, e_y, skip, shape,
+                                             keep_footnotes, catalog)
+                if len(df):
+                    yield self._finish_chunk(df, shape, compact, value_dtype)
+        finally:
+            await responses.aclose() # cancels the requests still in flight if we stop early
+        self._done(start)
+
+    async def refresh(self, df, shape:str='wide', lookback:int=0, catalog:bool=False):
+        """Coroutine version of :meth:`RequestBLS.refresh()`, which takes the same arguments and
+        returns the same DataFrame.
+
+        :returns: DataFrame
+        """
+        start = self._begin_call()
+        series, start_year, end_year, keep_footnotes = self._refresh_window(df, shape, lookback)
+        new_df, catalogs = await self._refresh_frame_async(series, start_year, end_year, shape,
+                                                           keep_footnotes, catalog)
+        df = self._merge_refresh(df, new_df, shape)
+        self._end_call(start, catalog, catalogs)
+        return df
+
+    async def close(self):
+        """Closes the default session. A new one is created if the instance is used again, which
+        can be under another event loop.
+        """
+        if self._own_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _begin_call(self):
+        """Starts a call with its own ``messages``, ``catalog`` and ``stats`` in the current
+        context. See :meth:`RequestBLS._begin_call()`.
+        """
+        self._last_call = {}
+        _CALL.set((self, self._last_call))
+        return super()._begin_call()
+
+    def _call_state(self):
+        """Returns the dict of ``messages``, ``_catalog`` and ``stats`` of the call running in the
+        current context, or of the call that started last if there is none.
+        """
+        client, state = _CALL.get()
+        return state if client is self else self._last_call
+
+    async def _get_frame_async(self, series, start_year, end_year, shape, keep_footnotes, catalog,
+                               skip=(), pack:bool=False):
+        """Coroutine version of :meth:`RequestBLS._get_frame()`. Reading from and writing to
+        ``self.store`` runs in a thread, so it does not block the event loop.
+        """
+        stored, have = await asyncio.to_thread(self._from_store, series, start_year, end_year,
+                                               keep_footnotes, catalog, skip)
+        cells, catalogs = await self._get_cells_async(series, start_year, end_year, catalog,
+                                                      have | set(skip), pack)
+        df = await asyncio.to_thread(self._frame_from_cells, series, start_year, end_year, shape,
+                                     keep_footnotes, cells, stored, have)
+        return df, catalogs
+
+    async def _refresh_frame_async(self, series, start_year, end_year, shape, keep_footnotes,
+                                   catalog):
+        """Coroutine version of :meth:`RequestBLS._refresh_frame()`."""
+        first = min(start_year.values())
+        skip = {(s, y) for s in series for y in range(first, start_year[s])}
+        cells, catalogs = await self._get_cells_async(series, first, end_year, catalog, skip,
+                                                      use_cache=False)
+        if self.store is not None:
+            await asyncio.to_thread(self._store_cells, series, first, end_year, cells, False)
+        df = self._tablefy(self._combine(series, first, end_year, cells), shape, keep_footnotes)
+        return df, catalogs
+
+    async def _get_cells_async(self, series, start_year, end_year, catalog, skip=(),
+                               pack:bool=False, use_cache:bool=True):
+        """Coroutine version of :meth:`RequestBLS._get_cells()`. Looks up ``self.cache`` in a
+        thread.
+        """
+        cells = {}
+        if use_cache:
+            cells, _ = await asyncio.to_thread(self._from_cache, series, start_year, end_year,
+                                               catalog)
+        plan = self._plan(series, start_year, end_year, have=cells.keys() | set(skip), pack=pack)
+        for (_, s_y, e_y), r in zip(plan, await self._execute_async(plan, catalog)):
+            cells.update(self._split_cells(r, s_y, e_y))
+        return cells, self._known_catalogs(series)
+
+    async def _execute_async(self, plan, catalog):
+        """Sends every planned request concurrently, and returns the responses in the same order as
+        the plan. See :meth:`RequestBLS._iter_execute()`.
+
+        :param plan: list of (series batch, start_year, end_year) tuples from :meth:`_plan()`.
+        :param catalog: Whether the catalog is requested.
+        :returns: list of :class:`BLSResponse`.
+        """
+        plan = self._flag_plan(plan, catalog)
+        tasks = [asyncio.ensure_future(self._fetch_async(*i)) for i in plan]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _iter_execute_async(self, plan, catalog):
+        """Async generator version of :meth:`RequestBLS._iter_execute()`: sends the planned requests
+        concurrently and yields the responses in the same order as the plan, with at most
+        ``self.max_workers`` requests in flight or waiting to be yielded at a time.
+
+        :param plan: list of (series batch, start_year, end_year) tuples from :meth:`_plan()`.
+        :param catalog: Whether the catalog is requested.
+        :returns: async generator of :class:`BLSResponse`.
+        """
+        plan = self._flag_plan(plan, catalog)
+        tasks = deque()
+        try:
+            for i in plan:
+                if len(tasks) == self.max_workers:
+                    yield await tasks.popleft()
+                tasks.append(asyncio.ensure_future(self._fetch_async(*i)))
+            while tasks:
+                yield await tasks.popleft()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_async(self, series:list, start_year:int, end_year:int, catalog:bool):
+        """Coroutine version of :meth:`RequestBLS._fetch()`. Waits until fewer than
+        ``self.max_workers`` requests are in flight before sending, and writes the response to the
+        cache and catalog index in a thread. Hooks are still called on the event loop's thread.
+        """
+        catalog = bool(self.key and catalog) # catalog is ignored without a key
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            start = time.perf_counter()
+            r = await self._send_async(self._request_body(series, start_year, end_year, catalog))
+        self._read_messages(r)
+        await asyncio.to_thread(self._record, r, series, start_year, end_year,
+                                time.perf_counter() - start)
+        self.stats.flush() # calls the 'response' hooks on the event loop's thread
+        return r
+
+    async def _send_async(self, body:str):
+        """Coroutine version of :meth:`RequestBLS._send()`, which waits for the rate limit and
+        between retries with ``asyncio.sleep()`` instead of blocking.
+
+        :param body: json string to post.
+        :returns: :class:`BLSResponse`
+        """
+        session = self._get_session()
+        timeout = aiohttp.ClientTimeout(total=self.timeout) if aiohttp else self.timeout
+        for attempt in range(self.scheduler.max_retries + 1):
+            last_attempt = attempt == self.scheduler.max_retries
+            with self.stats.timer('wait'):
+                await asyncio.sleep(self.scheduler.acquire())
+            try:
+                self.stats.count(requests=1, retries=int(attempt > 0))
+                with self.stats.timer('network'):
+                    async with session.post(self.url, data=body, timeout=timeout,
+                                            headers={'Content-type': 'application/json'}) \
+                            as response:
+                        content = await response.read()
+                r = self._check_attempt(response.status, content, response.raise_for_status,
+                                        last_attempt)
+                if r is not None:
+                    return r
+            except RETRY_ERRORS as e:
+                if last_attempt:
+                    raise
+                self.logger.debug(f'Retrying request after error: {e}')
+            with self.stats.timer('wait'):
+                await asyncio.sleep(self.scheduler.backoff_delay(attempt))
+
+    def _make_session(self, pool_size):
+        """The default session has to be created inside the event loop, so this only keeps
+        ``pool_size`` for :meth:`_get_session()`.
+        """
+        self.pool_size = pool_size
+        return None
+
+    def _get_session(self):
+        """Returns the session, and creates the default ``aiohttp.ClientSession`` if there is none
+        yet: it keeps up to ``self.pool_size`` connections open and asks for compressed responses.
+        """
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept-Encoding' : 'gzip, deflate'}
+            )
+        return self.session
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# BLS only revises the data for the current year, so data for past years can be kept forever while
+# data for the current year is only kept for a short while.
+
+class ResponseCache(object):
+    """Base class for caching data from the BLS API. Subclasses only need to implement the storage
+    itself (:meth:`_load()`, :meth:`_store()`, :meth:`_delete()`, :meth:`_touch()`,
+    :meth:`_keys()` and :meth:`clear()`); the expiration and eviction logic lives here. The storage
+    methods work on lists of keys so that backends can look up many entries at once.
+
+    :class:`RequestBLS` stores observations one (seriesID, year) cell at a time, so overlapping
+    requests only need to fetch the cells that are not cached yet.
+
+    Entries for the current year expire after ``ttl`` seconds. Entries for past years expire after
+    ``historical_ttl`` seconds, which by default is never. If ``max_entries`` is set, the least
+    recently used entries are evicted once the cache grows past that size.
+
+    :param ttl: Seconds to keep data for the current year.
+    :param historical_ttl: Seconds to keep data for past years. ``None`` keeps it forever.
+    :param max_entries: Maximum number of entries to keep. ``None`` means no limit.
+    """
+
+    def __init__(self, ttl:float=3600, historical_ttl:float=None, max_entries:int=None):
+        self.ttl = ttl
+        self.historical_ttl = historical_ttl
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Returns the cached value for a key, or ``None`` if there is no unexpired value.
+
+        :param key: Any JSON-serializable key, e.g. the output of :meth:`cell_key()`.
+        :returns: bytes or ``None``
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Looks up several keys at once.
+
+        :param keys: List of JSON-serializable keys.
+        :returns: List of bytes (or ``None`` where there is no unexpired value), in the same order
+                  as ``keys``.
+        """
+        keys = [self._hash(key) for key in keys]
+        now = time.time()
+        with self._lock:
+            entries = self._load(keys)
+            expired = [k for k, (_, expires) in entries.items()
+                       if expires is not None and expires <= now]
+            if expired:
+                self._delete(expired)
+                for k in expired:
+                    del entries[k]
+            if entries:
+                self._touch(list(entries))
+        return [entries[k][0] if k in entries else None for k in keys]
+
+    def set(self, key, value, year:int=None):
+        """Stores a value in the cache. The expiration is determined by ``year``; see
+        :meth:`expires()`.
+
+        :param key: Any JSON-serializable key, e.g. the output of :meth:`cell_key()`.
+        :param value: bytes to store.
+        :param year: Latest year of data contained in the value.
+        """
+        self.set_many([(key, value, year)])
+
+    def set_many(self, items):
+        """Stores several values at once.
+
+        :param items: List of (key, value, year) tuples; see :meth:`set()`.
+        """
+        entries = [(self._hash(key), value, self.expires(year)) for key, value, year in items]
+        with self._lock:
+            self._store(entries)
+            if self.max_entries is not None:
+                keys = self._keys()
+                if len(keys) > self.max_entries:
+                    self._delete(keys[:len(keys) - self.max_entries])
+
+    def expires(self, year:int=None):
+        """Returns the timestamp at which data up to ``year`` expires, or ``None`` if it never
+        expires.
+        """
+        if year is not None and int(year) < datetime.date.today().year:
+            ttl = self.historical_ttl
+        else:
+            ttl = self.ttl
+        return None if ttl is None else time.time() + ttl
+
+    @staticmethod
+    def cell_key(series_id, year):
+        """The key under which :class:`RequestBLS` caches the observations of a series in a year."""
+        return ['cell', series_id, int(year)]
+
+    @staticmethod
+    def catalog_key(series_id):
+        """The key under which :class:`RequestBLS` caches the catalog of a series."""
+        return ['catalog', series_id]
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+    def _load(self, keys):
+        """Returns a dict of {key : (value, expires)} for the keys that are stored."""
+        raise NotImplementedError
+
+    def _store(self, entries):
+        """Stores a list of (key, value, expires) tuples."""
+        raise NotImplementedError
+
+    def _delete(self, keys):
+        raise NotImplementedError
+
+    def _touch(self, keys):
+        """Marks keys as recently used."""
+        raise NotImplementedError
+
+    def _keys(self):
+        """Returns all stored keys, least recently used first."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        return len(self._keys())
+
+
+class MemoryCache(ResponseCache):
+    """Keeps data in a dict. Nothing persists after the Python session ends, so this is mostly
+    useful for interactive work and testing.
+    """
+
+    def __init__(self, ttl:float=3600, historical_ttl:float=None, max_entries:int=None):
+        super().__init__(ttl=ttl, historical_ttl=historical_ttl, max_entries=max_entries)
+        self._data = {}
+
+    def _load(self, keys):
+        return {k : self._data[k] for k in keys if k in self._data}
+
+    def _store(self, entries):
+        for key, value, expires in entries:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+
+    def _delete(self, keys):
+        for key in keys:
+            self._data.pop(key, None)
+
+    def _touch(self, keys):
+        for key in keys:
+            self._data[key] = self._data.pop(key)
+
+    def _keys(self):
+        return list(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+
+
+class DirectoryCache(ResponseCache):
+    """Keeps each entry in its own file in a directory. The first line of each file is the
+    expiration timestamp, and the file's modification time is used to track when it was last used.
+
+    :param path: Directory to store the data in. It is created if it does not exist.
+    """
+
+    def __init__(self, path, ttl:float=3600, historical_ttl:float=None, max_entries:int=None):
+        super().__init__(ttl=ttl, historical_ttl=historical_ttl, max_entries=max_entries)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key)
+
+    def _load(self, keys):
+        entries = {}
+        for key in keys:
+            try:
+                with open(self._file(key), 'rb') as f:
+                    expires = f.readline().strip()
+                    entries[key] = (f.read(), float(expires) if expires else None)
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def _store(self, entries):
+        for key, value, expires in entries:
+            tmp = self._file(key) + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(b'' if expires is None else repr(expires).encode())
+                f.write(b'\n')
+                f.write(value)
+            os.replace(tmp, self._file(key))
+
+    def _delete(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+
+    def _touch(self, keys):
+        for key in keys:
+            os.utime(self._file(key))
+
+    def _keys(self):
+        files = [
+            (os.stat(self._file(f)).st_mtime_ns, f)
+            for f in os.listdir(self.path) if not f.endswith('.tmp')
+        ]
+        return [f for _, f in sorted(files)]
+
+    def clear(self):
+        with self._lock:
+            for f in os.listdir(self.path):
+                os.remove(self._file(f))
+
+
+def _chunks(keys, size:int=500):
+    """Splits a list of keys into lists of at most ``size``, which stays well below SQLite's limit
+    on the number of query parameters.
+    """
+    for i in range(0, len(keys), size):
+        yield keys[i:i+size]
+
+
+class SQLiteCache(ResponseCache):
+    """Keeps data in a single SQLite database file. Lookups and writes of many entries happen in a
+    single transaction.
+
+    :param path: Path of the SQLite database. It is created if it does not exist.
+    """
+
+    def __init__(self, path, ttl:float=3600, historical_ttl:float=None, max_entries:int=None):
+        super().__init__(ttl=ttl, historical_ttl=historical_ttl, max_entries=max_entries)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses '
+                '(key TEXT PRIMARY KEY, value BLOB, expires REAL, accessed INTEGER)'
+            )
+
+    def _load(self, keys):
+        entries = {}
+        for chunk in _chunks(keys):
+            rows = self._conn.execute(
+                'SELECT key, value, expires FROM responses '
+                f'WHERE key IN ({",".join("?" * len(chunk))})',
+                chunk
+            )
+            entries.update({key : (bytes(value), expires) for key, value, expires in rows})
+        return entries
+
+    def _store(self, entries):
+        now = time.time_ns()
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                [(key, value, expires, now) for key, value, expires in entries]
+            )
+
+    def _delete(self, keys):
+        with self._conn:
+            self._conn.executemany('DELETE FROM responses WHERE key = ?', [(k,) for k in keys])
+
+    def _touch(self, keys):
+        now = time.time_ns()
+        with self._conn:
+            self._conn.executemany(
+                'UPDATE responses SET accessed = ? WHERE key = ?', [(now, k) for k in keys]
+            )
+
+    def _keys(self):
+        return [
+            row[0]
+            for row in self._conn.execute('SELECT key FROM responses ORDER BY accessed, rowid')
+        ]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM responses')
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+import threading
+import pandas as pd
+from .cache import _chunks
+from .response import loads, dumps
+
+# BLS flat files:
+# https://download.bls.gov/pub/time.series/
+#
+# Each survey has a directory with a <survey>.series file that lists every series with its codes
+# (e.g. la.series has area_code and measure_code), and a mapping file for each code that spells it
+# out (e.g. la.area maps area_code to area_text).
+
+# Fields of an API catalog that describe what a series measures, in order of preference. Which
+# fields are present depends on the survey.
+MEASURE_FIELDS = ['measure', 'item', 'cps_labor_force_status', 'measure_data_type']
+
+# Columns of a <survey>.series file that describe what a series measures, in order of preference.
+MEASURE_COLUMNS = ['measure_code', 'item_code', 'data_type_code']
+
+class CatalogIndex(object):
+    """A local, persistent index of series metadata, kept in a SQLite database with a full-text
+    search table. Series can be looked up by Series ID, survey, area, measure, seasonality and
+    free text without sending any requests to the API.
+
+    The index is filled from the catalogs returned by the API (pass it to :class:`RequestBLS` as
+    ``catalog_index`` to do this automatically) and from the ``<survey>.series`` flat files the BLS
+    publishes, see :meth:`load_series_file()`.
+
+    :param path: Path of the SQLite database. It is created if it does not exist. By default, the
+                 index is only kept in memory.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS series (series_id TEXT PRIMARY KEY, survey TEXT, '
+                'survey_name TEXT, title TEXT, area TEXT COLLATE NOCASE, '
+                'measure TEXT COLLATE NOCASE, seasonality TEXT COLLATE NOCASE, catalog TEXT)'
+            )
+            for column in ['survey', 'area', 'measure']:
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS series_{column} ON series ({column})'
+                )
+            self._conn.execute(
+                'CREATE VIRTUAL TABLE IF NOT EXISTS series_text USING fts5 '
+                '(title, area, measure, details)'
+            )
+
+    def add(self, catalogs:dict):
+        """Adds (or updates) the catalogs of several series.
+
+        :param catalogs: dict of {Series ID : catalog}, where each catalog is a dict like the
+                         ``'catalog'`` field of an API response, e.g. :attr:`BLSResponse.catalog`.
+        """
+        rows = []
+        for series_id, c in catalogs.items():
+            measure = next((c[f] for f in MEASURE_FIELDS if c.get(f)), None)
+            rows.append((
+                series_id, c.get('survey_abbreviation') or series_id[:2], c.get('survey_name'),
+                c.get('series_title'), c.get('area'), measure, c.get('seasonality'), c
+            ))
+        self._store(rows)
+
+    def load_series_file(self, path, chunksize:int=100000):
+        """Adds every series in a BLS ``<survey>.series`` flat file, e.g. ``la.series`` from
+        https://download.bls.gov/pub/time.series/la/. Codes are spelled out with the mapping files
+        in the same directory (e.g. ``la.area`` and ``la.measure``) if they are there. The file is
+        read in chunks, so large surveys do not need to fit in memory.
+
+        :param path: Path of the ``<survey>.series`` file.
+        :param chunksize: Number of lines to read at a time.
+        :returns: Number of series added.
+        """
+        directory, survey = os.path.split(path)
+        survey = survey.split('.')[0]
+        mappings = {}
+        n = 0
+        for chunk in pd.read_csv(path, sep='\t', dtype=str, chunksize=chunksize,
+                                 keep_default_na=False):
+            chunk.columns = chunk.columns.str.strip()
+            chunk = chunk.apply(lambda col: col.str.strip())
+            for col in list(chunk.columns):
+                if col not in mappings:
+                    mappings[col] = self._read_mapping(directory, survey, col)
+                name = col[:-5] if col.endswith('_code') else col
+                if mappings[col] is not None:
+                    chunk[name] = chunk[col].map(mappings[col]).fillna(chunk[col])
+                elif name != col:
+                    chunk[name] = chunk[col]
+            measure = next((c[:-5] for c in MEASURE_COLUMNS if c in chunk.columns), None)
+            cols = list(chunk.columns)
+            rows = [
+                (c['series_id'], survey.upper(), None, c.get('series_title'), c.get('area'),
+                 c.get(measure), c.get('seasonal'), c)
+                for c in (dict(zip(cols, row)) for row in zip(*[chunk[c].tolist() for c in cols]))
+            ]
+            self._store(rows)
+            n += len(rows)
+        return n
+
+    def _read_mapping(self, directory, survey, col):
+        """Reads the mapping file for a column of a ``<survey>.series`` file, e.g. ``la.area`` for
+        ``area_code``.
+
+        :returns: dict of {code : text}, or ``None`` if there is no mapping file.
+        """
+        name = col[:-5] if col.endswith('_code') else col
+        path = os.path.join(directory, f'{survey}.{name}')
+        if col == 'series_id' or not os.path.isfile(path):
+            return None
+        df = pd.read_csv(path, sep='\t', dtype=str, keep_default_na=False)
+        df.columns = df.columns.str.strip()
+        key = f'{name}_code' if f'{name}_code' in df.columns else df.columns[0]
+        text = next((c for c in df.columns if c.endswith(('_text', '_name'))), df.columns[1])
+        return dict(zip(df[key].str.strip(), df[text].str.strip()))
+
+    def _store(self, rows):
+        """Stores a list of (series_id, survey, survey_name, title, area, measure, seasonality,
+        catalog) tuples.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT INTO series VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (series_id) DO '
+                'UPDATE SET survey = excluded.survey, survey_name = excluded.survey_name, '
+                'title = excluded.title, area = excluded.area, measure = excluded.measure, '
+                'seasonality = excluded.seasonality, catalog = excluded.catalog',
+                [row[:-1] + (dumps(row[-1]).decode(),) for row in rows]
+            )
+            # the full-text table indexes the values of the catalog, but not its field names
+            text = {
+                row[0] : row[3:6] + (' '.join(v for v in row[-1].values() if isinstance(v, str)),)
+                for row in rows
+            }
+            for chunk in _chunks(list(text)):
+                rowids = self._conn.execute(
+                    f'SELECT rowid, series_id FROM series WHERE series_id IN '
+                    f'({",".join("?" * len(chunk))})', chunk
+                ).fetchall()
+                self._conn.executemany('DELETE FROM series_text WHERE rowid = ?',
+                                       [(rowid,) for rowid, _ in rowids])
+                self._conn.executemany(
+                    'INSERT INTO series_text (rowid, title, area, measure, details) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(rowid,) + text[series_id] for rowid, series_id in rowids]
+                )
+
+    def get(self, series_id):
+        """Returns the catalog of a series, or ``None`` if it is not in the index."""
+        return self.get_many([series_id]).get(series_id)
+
+    def get_many(self, series_ids):
+        """Looks up the catalogs of several series at once.
+
+        :param series_ids: List of Series ID's.
+        :returns: dict of {Series ID : catalog} for the series that are in the index.
+        """
+        return {k : loads(v) for k, v in self._select('catalog', series_ids)}
+
+    def titles(self, series_ids):
+        """Looks up the titles of several series at once.
+
+        :param series_ids: List of Series ID's, e.g. from :func:`bls_search()`.
+        :returns: dict of {Series ID : title} for the series that are in the index.
+        """
+        return dict(self._select('title', series_ids))
+
+    def _select(self, column, series_ids):
+        series_ids = list(series_ids)
+        rows = []
+        with self._lock:
+            for chunk in _chunks(series_ids):
+                rows += self._conn.execute(
+                    f'SELECT series_id, {column} FROM series '
+                    f'WHERE series_id IN ({",".join("?" * len(chunk))})', chunk
+                ).fetchall()
+        return rows
+
+    def search(self, text:str=None, survey:str=None, area:str=None, measure:str=None,
+               seasonality:str=None, limit:int=None):
+        """Finds series in the index. All of the criteria that are set have to match.
+
+        :param text: Words that have to appear somewhere in the series' metadata, e.g.
+                     ``'unemployment california'``.
+        :param survey: Survey abbreviation, e.g. ``'LA'``.
+        :param area: Area, e.g. ``'California'`` (not case sensitive).
+        :param measure: What the series measures, e.g. ``'unemployment rate'`` (not case
+                        sensitive).
+        :param seasonality: Seasonality, e.g. ``'Seasonally Adjusted'``, or the ``'S'``/``'U'``
+                            code for series loaded from flat files.
+        :param limit: Maximum number of series to return.
+        :returns: dict of {Series ID : title}. ``list()`` of this can be passed to
+                  :meth:`RequestBLS.series()`.
+        """
+        where, params = [], []
+        for column, value in [('survey', survey and survey.upper()), ('area', area),
+                              ('measure', measure), ('seasonality', seasonality)]:
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        if text:
+            where.append('rowid IN (SELECT rowid FROM series_text WHERE series_text MATCH ?)')
+            params.append(' '.join('"{}"'.format(w.replace('"', '""')) for w in text.split()))
+        query = 'SELECT series_id, title FROM series'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += ' ORDER BY series_id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+        with self._lock:
+            return dict(self._conn.execute(query, params).fetchall())
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM series')
+            self._conn.execute('DELETE FROM series_text')
+
+    def __contains__(self, series_id):
+        return bool(self._select('1', [series_id]))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM series').fetchone()[0]
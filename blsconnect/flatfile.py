@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import logging
+import os
+import time
+import pandas as pd
+from .periods import period_names
+from .request import RequestBLS, InputError
+
+# BLS flat files:
+# https://download.bls.gov/pub/time.series/
+#
+# Each survey's directory has tab-delimited <survey>.data.* files with the columns series_id, year,
+# period, value and footnote_codes, padded with spaces. For example, cu/cu.data.0.Current has every
+# CPI series, and la/la.data.0.CurrentU15-19 has every LAUS series from 2015 to 2019.
+
+FLAT_FILE_URL = 'https://download.bls.gov/pub/time.series/'
+
+class FlatFileBLS(RequestBLS):
+    """Gets data from the BLS's flat files instead of the API. The flat files hold whole surveys,
+    so pulling all LAUS or all CPI series takes a single pass over a file instead of thousands of
+    requests, and there are no limits on the number of series or years.
+
+    The files are read in chunks of ``chunksize`` lines, and only the rows of the requested series
+    and years are kept, so files that are much bigger than memory can be read. :meth:`series()`
+    returns the same DataFrames as :meth:`RequestBLS.series()`, and takes the same arguments;
+    :meth:`iter_series()` yields a DataFrame for each chunk.
+
+    :param files: A flat file, or a list of them. Each one can be a local path, a URL, or a path
+                  relative to ``url``, e.g. ``'cu/cu.data.0.Current'``.
+    :param session: Object used to download files, which needs a ``requests.Session``-like
+                    ``.get()`` method. By default a ``requests.Session`` is created.
+    :param url: URL that relative file names are resolved against.
+    :param headers: Headers sent along when downloading files. download.bls.gov turns away
+                    requests without a ``User-Agent`` that identifies who is making them, e.g.
+                    ``{'User-Agent' : 'you@example.com'}``.
+    :param chunksize: Number of lines to read at a time.
+    :param msg_log_level: See :class:`RequestBLS`.
+    :param start_year: Default start_year for series(). By default, every year in the files is
+                       read.
+    :param end_year: Default end_year for series().
+    :param timeout: Seconds to wait for the server to respond before giving up on a download.
+    :param hooks: See :class:`RequestBLS`. The time spent reading the files is the ``'read'``
+                  stage.
+    """
+
+    def __init__(self, files, session=None, url:str=FLAT_FILE_URL, headers:dict=None,
+                 chunksize:int=100000, msg_log_level:int=logging.WARNING, start_year:int=None,
+                 end_year:int=None, timeout:float=60, hooks:dict=None):
+        super().__init__(msg_log_level=msg_log_level, start_year=start_year, end_year=end_year,
+                         session=session, timeout=timeout, url=url, hooks=hooks)
+        self.files = [files] if isinstance(files, str) else list(files)
+        self.headers = headers or {}
+        self.chunksize = chunksize
+
+    def series(self, series=None, *args, **kwargs):
+        """Get data series from the flat files. Takes the same arguments as
+        :meth:`RequestBLS.series()`, except that ``series=None`` gets every series in the files,
+        and years that are not set are not limited. ``catalog`` is ignored, since the flat files
+        do not come with one.
+
+        The flat files only have footnote codes, so with ``keep_footnotes=True`` each footnote is
+        ``{'code' : code}`` without the text the API includes.
+
+        :returns: DataFrame
+        """
+        return super().series(series, *args, **kwargs)
+
+    def series_many(self, specs):
+        """Gets the data of several :meth:`series()` calls at once. Takes the same arguments as
+        :meth:`RequestBLS.series_many()`, but since the files are read locally there are no
+        requests to pack, so each spec reads its own series and years from the files. As in
+        :meth:`series()`, ``series=None`` gets every series and unset years are not limited.
+
+        :returns: List of DataFrames, one for each spec, in the same order.
+        """
+        start = self._begin_call()
+        dfs = []
+        for series, start_year, end_year, kwargs in self._bind_specs(specs):
+            df, _ = self._get_frame(series, start_year, end_year, kwargs['shape'],
+                                    kwargs['keep_footnotes'], False)
+            dfs.append(self._finish_series(
+                df, series, start_year, end_year, kwargs['shape'], kwargs['interpolate'],
+                kwargs['groupby'], kwargs['groupby_method'], kwargs['compact'],
+                kwargs['value_dtype'], kwargs['time_index'], kwargs['lazy']
+            ))
+        self._end_call(start, False, {})
+        return dfs
+
+    def iter_series(
+        self,
+        series=None,
+        start_year:int=None,
+        end_year:int=None,
+        shape:str='wide',
+        keep_footnotes:bool=False,
+        catalog:bool=True,
+        compact:bool=False,
+        value_dtype:str='float64'
+    ):
+        """Like :meth:`series()`, but yields a DataFrame for each chunk of the files that has data
+        in it. In ``'wide'`` format, a series can be split across several DataFrames.
+
+        :returns: generator of DataFrames
+        """
+        start = self._begin_call()
+        if shape not in ['wide', 'long']:
+            raise InputError('shape kwarg must be either "wide" or "long".')
+        series, start_year, end_year = \
+            self._input_handler(series, start_year, end_year, shape, keep_footnotes)
+        for df in self._scan(series, start_year, end_year, keep_footnotes):
+            df = self._reshape(df, series or list(pd.unique(df['seriesID'])), shape,
+                               keep_footnotes)
+            df = self._cleanup_df(df, shape)
+            if compact:
+                df = self._compact(df, shape, value_dtype)
+            yield df
+        self._end_call(start, catalog, {})
+
+    def refresh(self, df, shape:str='wide', lookback:int=0, catalog:bool=False):
+        """Brings a DataFrame up to date from the flat files. Takes the same arguments as
+        :meth:`RequestBLS.refresh()`: for each series, only the years from the latest year in
+        ``df`` (minus ``lookback`` years) on are read from the files, and merged into ``df``.
+
+        :returns: DataFrame
+        """
+        return super().refresh(df, shape, lookback, catalog)
+
+    def _input_handler(self, series, start_year, end_year, shape, keep_footnotes):
+        """Like :meth:`RequestBLS._input_handler()`, but ``series=None`` stands for every series in
+        the files.
+        """
+        if series is not None:
+            return super()._input_handler(series, start_year, end_year, shape, keep_footnotes)
+        start_year, end_year = self._year_handler(start_year, end_year)
+        return None, start_year, end_year
+
+    def _year_handler(self, start_year, end_year):
+        """Years that are not set are not limited, since the flat files have no year limit. When
+        both are set, they are handled like :meth:`RequestBLS._year_handler()`, which swaps them
+        if ``start_year`` is after ``end_year``.
+
+        :returns: Tuple of (start_year, end_year), either of which can be ``None``.
+        """
+        start_year = self.start_year if start_year is None else start_year
+        end_year = self.end_year if end_year is None else end_year
+        if start_year is not None and end_year is not None:
+            return super()._year_handler(start_year, end_year)
+        return start_year, end_year
+
+    def _get_frame(self, series, start_year, end_year, shape, keep_footnotes, catalog, skip=(),
+                   pack:bool=False):
+        """Reads the requested data from the flat files. See :meth:`RequestBLS._get_frame()`.
+        Every year of every series is read in a single pass, so ``skip`` and ``pack`` make no
+        difference.
+        """
+        chunks = list(self._scan(series, start_year, end_year, keep_footnotes))
+        df = pd.concat(chunks, ignore_index=True) if chunks else self._long_frame(
+            pd.DataFrame(columns=['series_id', 'year', 'period', 'value', 'footnote_codes']),
+            keep_footnotes
+        )
+        series = series or list(pd.unique(df['seriesID']))
+        return self._reshape(df, series, shape, keep_footnotes), {}
+
+    def _refresh_frame(self, series, start_year, end_year, shape, keep_footnotes, catalog):
+        """Reads the new data for :meth:`refresh()` from the files in a single pass, and keeps each
+        series from its own start year on. See :meth:`RequestBLS._refresh_frame()`.
+        """
+        df, catalogs = self._get_frame(series, min(start_year.values()), end_year, 'long',
+                                       keep_footnotes, catalog)
+        df = df[df['year'] >= df['seriesID'].map(start_year)]
+        return self._reshape(df, series, shape, keep_footnotes), catalogs
+
+    def _scan(self, series, start_year, end_year, keep_footnotes):
+        """Reads the flat files one chunk at a time. The time spent reading is added to the
+        ``'read'`` stage of ``self.stats``.
+
+        :param series: List of Series ID's to keep, or ``None`` to keep every series.
+        :param start_year: Earliest year to keep, or ``None``.
+        :param end_year: Latest year to keep, or ``None``.
+        :param keep_footnotes: Whether the Footnotes field is kept.
+        :returns: generator of ``'long'`` DataFrames, one for each chunk that has matching rows.
+        """
+        wanted = None if series is None else set(series)
+        for f in self.files:
+            start = time.perf_counter()
+            with self._open(f) as handle:
+                chunks = pd.read_csv(handle, sep='\t', dtype=str, keep_default_na=False,
+                                     chunksize=self.chunksize)
+                for chunk in chunks:
+                    chunk.columns = chunk.columns.str.strip()
+                    chunk['series_id'] = chunk['series_id'].str.strip()
+                    chunk['year'] = chunk['year'].astype('int64')
+                    keep = pd.Series(True, index=chunk.index)
+                    if wanted is not None:
+                        keep &= chunk['series_id'].isin(wanted)
+                    if start_year is not None:
+                        keep &= chunk['year'] >= start_year
+                    if end_year is not None:
+                        keep &= chunk['year'] <= end_year
+                    df = self._long_frame(chunk[keep], keep_footnotes) if keep.any() else None
+                    self.stats.add_time('read', time.perf_counter() - start)
+                    if df is not None:
+                        yield df
+                    start = time.perf_counter()
+
+    def _open(self, f):
+        """Opens a flat file for reading.
+
+        :param f: Local path, URL, or path relative to ``self.url``.
+        :returns: Context manager of a binary file-like object.
+        """
+        if os.path.exists(f):
+            return open(f, 'rb')
+        if not f.startswith(('http://', 'https://')):
+            f = self.url + f
+        r = self.session.get(f, headers=self.headers, stream=True, timeout=self.timeout)
+        r.raise_for_status()
+        r.raw.decode_content = True
+        return contextlib.closing(r.raw)
+
+    def _long_frame(self, chunk, keep_footnotes):
+        """Turns rows of a flat file into the same ``'long'`` DataFrame that
+        :meth:`RequestBLS._tablefy()` makes out of an API response. ``periodName`` is spelled out
+        from the period codes.
+        """
+        period = chunk['period'].str.strip()
+        df = pd.DataFrame({
+            'seriesID' : chunk['series_id'].to_numpy(dtype=object),
+            'year' : chunk['year'].to_numpy(dtype='int64'),
+            'period' : period.to_numpy(dtype=object),
+            'periodName' : period_names(period),
+            'value' : pd.to_numeric(chunk['value'].str.strip(), errors='coerce') \
+                .to_numpy(dtype='float64')
+        })
+        if keep_footnotes:
+            df['footnotes'] = [
+                [{'code' : code} for code in codes.split(',')] if codes else [{}]
+                for codes in chunk['footnote_codes'].str.strip()
+            ]
+        return df
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import calendar
+import numpy as np
+import pandas as pd
+
+# BLS period codes:
+# https://www.bls.gov/help/hlpforma.htm
+#
+# Every code maps to (frequency, first month, number of months, periodName). Annual averages of
+# monthly, quarterly and semiannual series (M13, Q05, S03) are annual periods, same as A01.
+
+PERIODS = {
+    **{f'M{str(m).zfill(2)}' : ('M', m, 1, calendar.month_name[m]) for m in range(1, 13)},
+    **{f'Q{str(q).zfill(2)}' : ('Q', 3*q - 2, 3, f'{n} Quarter')
+       for q, n in zip(range(1, 5), ['1st', '2nd', '3rd', '4th'])},
+    'S01' : ('S', 1, 6, '1st Half'),
+    'S02' : ('S', 7, 6, '2nd Half'),
+    'A01' : ('A', 1, 12, 'Annual'),
+    'M13' : ('A', 1, 12, 'Annual'),
+    'Q05' : ('A', 1, 12, 'Annual'),
+    'S03' : ('A', 1, 12, 'Annual'),
+}
+
+ANNUAL_AVERAGES = {'M13', 'Q05', 'S03'}
+
+# Number of months in each BLS frequency.
+FREQ_MONTHS = {'M' : 1, 'Q' : 3, 'S' : 6, 'A' : 12}
+
+# pandas frequency of each BLS frequency.
+PANDAS_FREQ = {'M' : 'M', 'Q' : 'Q', 'S' : '6M', 'A' : 'Y'}
+
+# Orders the frequencies within the same end month: months come before quarters, quarters before
+# halves, and halves before the whole year.
+_FREQ_ORDER = {'M' : 0, 'Q' : 1, 'S' : 2, 'A' : 3}
+
+# Every known period code, in a fixed order. Period codes are numbered by their position in it.
+PERIOD_CODES = pd.Index(list(PERIODS), dtype=object)
+
+# Every known period code as the integer of its bytes, sorted, and the number of each code.
+_CODE_BYTES = np.array(list(PERIOD_CODES), dtype='S4').view('uint32')
+_CODE_ORDER = np.argsort(_CODE_BYTES)
+_CODE_BYTES = _CODE_BYTES[_CODE_ORDER]
+
+def period_index(period):
+    """Numbers every period code by its position in :data:`PERIOD_CODES`, or -1 if the code is
+    unknown.
+
+    BLS period codes are three characters long, so the codes are copied once into 4-byte strings,
+    which are read as integers and matched against the known codes with a binary search, without
+    hashing any strings. Codes that cannot be encoded as ASCII are matched against
+    :data:`PERIOD_CODES` instead.
+
+    :param period: Array-like of BLS period codes.
+    :returns: numpy array of int64.
+    """
+    period = np.asarray(period, dtype=object)
+    try:
+        codes = period.astype('S4').view('uint32')
+    except UnicodeEncodeError:
+        return PERIOD_CODES.get_indexer(period).astype('int64')
+    found = np.searchsorted(_CODE_BYTES, codes).clip(max=len(_CODE_BYTES) - 1)
+    return np.where(_CODE_BYTES[found] == codes, _CODE_ORDER[found], -1)
+
+def _lookup(period, field):
+    """Looks up a field of :data:`PERIODS` for every period code. Only the known codes are looked
+    up, so this is fast no matter how many rows there are.
+
+    :param period: Array-like of BLS period codes, or an integer numpy array of their numbers from
+                   :func:`period_index()`, which saves matching the codes again when several
+                   fields are looked up.
+    :param field: Function that takes a :data:`PERIODS` entry (or ``None`` for unknown codes) and
+                  returns the field.
+    :returns: numpy array.
+    """
+    if not (isinstance(period, np.ndarray) and period.dtype.kind == 'i'):
+        period = period_index(period)
+    values = np.array([field(PERIODS[p]) for p in PERIOD_CODES] + [field(None)])
+    return values[period] # unknown codes are -1, which picks the last item (None)
+
+def period_frequency(period):
+    """Returns the frequency of every period code: ``'M'``, ``'Q'``, ``'S'``, ``'A'``, or ``''`` if
+    the code is unknown.
+    """
+    return _lookup(period, lambda p: p[0] if p else '')
+
+def period_start_month(period):
+    """Returns the first month (1-12) of every period code, or 0 if the code is unknown."""
+    return _lookup(period, lambda p: p[1] if p else 0)
+
+def period_months(period):
+    """Returns the number of months in every period code, or 13 if the code is unknown (i.e. longer
+    than any period it could be grouped into).
+    """
+    return _lookup(period, lambda p: p[2] if p else 13)
+
+def period_codes(freq, number):
+    """Builds the period codes of a frequency, e.g. ``period_codes('Q', [1, 4])`` returns
+    ``['Q01', 'Q04']``. Annual periods are always ``'A01'``.
+
+    :param freq: ``'M'``, ``'Q'``, ``'S'`` or ``'A'``.
+    :param number: Array-like of period numbers within the year, starting from 1.
+    :returns: numpy array of period codes.
+    """
+    codes = np.array([f'{freq}{str(i).zfill(2)}' for i in range(1, 12 // FREQ_MONTHS[freq] + 1)],
+                     dtype=object)
+    return codes[np.asarray(number, dtype='int64') - 1]
+
+def period_names(period):
+    """Returns the ``periodName`` the BLS uses for every period code, e.g. ``'January'``."""
+    return _lookup(period, lambda p: p[3] if p else None)
+
+def period_sort_key(year, period):
+    """Returns an integer for every (year, period code) that sorts the periods in chronological
+    order of the end of each period. Within the same end month, shorter periods come first, so
+    e.g. March comes before the 1st quarter, and December before the annual average. For data of a
+    single frequency, this is the same order as sorting by year and then period code.
+
+    :param year: Array-like of years.
+    :param period: Array-like of BLS period codes.
+    :returns: numpy array of int64.
+    """
+    rank = _lookup(
+        period,
+        lambda p: 8 * (p[1] + p[2] - 1) + _FREQ_ORDER[p[0]] if p else 8 * 13
+    )
+    return np.asarray(year, dtype='int64') * 128 + rank
+
+def to_datetime(year, period):
+    """Returns the first day of every (year, period code) as a ``DatetimeIndex``. Unknown codes
+    become ``NaT``.
+
+    :param year: Array-like of years.
+    :param period: Array-like of BLS period codes.
+    :returns: ``pandas.DatetimeIndex``
+    """
+    month = period_start_month(period)
+    months = (np.asarray(year, dtype='int64') - 1970) * 12 + month - 1
+    dates = months.astype('datetime64[M]').astype('datetime64[ns]')
+    dates[month == 0] = np.datetime64('NaT')
+    return pd.DatetimeIndex(dates)
+
+def to_period_index(year, period):
+    """Returns every (year, period code) as a ``PeriodIndex``. A ``PeriodIndex`` can only hold a
+    single frequency, so the codes must all be monthly, quarterly, semiannual or annual (annual
+    averages count as annual). Use :func:`to_datetime()` for data with mixed frequencies.
+
+    :param year: Array-like of years.
+    :param period: Array-like of BLS period codes.
+    :returns: ``pandas.PeriodIndex``
+    """
+    freqs = set(pd.unique(period_frequency(period)))
+    if len(freqs) > 1 or '' in freqs:
+        raise ValueError(f'Cannot make a PeriodIndex out of periods with frequencies {freqs}. '
+                         'Use to_datetime() instead.')
+    freq = PANDAS_FREQ[freqs.pop()] if freqs else 'M'
+    return to_datetime(year, period).to_period(freq)
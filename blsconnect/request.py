@@ -2,11 +2,24 @@
 
 import requests
 import json
+import numpy as np
 import pandas as pd
+import datetime
+import inspect
 import logging
-import urllib.request
-import certifi
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from operator import itemgetter
+from .periods import (
+    FREQ_MONTHS, period_codes, period_index, period_months, period_sort_key, period_start_month,
+    to_datetime, to_period_index
+)
+from .response import BLSResponse, loads, dumps
+from .result import SeriesResult
+from .scheduler import RequestScheduler, DAILY_LIMIT_WITH_KEY, DAILY_LIMIT_WITHOUT_KEY
+from .stats import HOOK_EVENTS, RequestStats, timed
 
 # API instructions:
 # https://www.bls.gov/developers/api_signature_v2.htm
@@ -24,9 +37,10 @@ class RequestBLS(object):
     .series() method.
     
     If the BLS API key is undefined by the user, the API year limit is set to 10 years instead of
-    20 years. In addition, you will be unable to use the catalog feature. The user can always
-    define a date range that exceeds the year limit; the requests are pulled in chunks and returned
-    in a single DataFrame.
+    20 years, and the API series limit is set to 25 series per request instead of 50. In addition,
+    you will be unable to use the catalog feature. The user can always define a date range or a
+    list of series that exceeds these limits; the requests are pulled in chunks and returned in a
+    single DataFrame.
     
     :param key: BLS API key.
     :param msg_log_level: What level to log messages returned from an API request. Default level
@@ -35,13 +49,46 @@ class RequestBLS(object):
                        .series() method instead of at the class level.
     :param end_year: Default end_year for series(). It's generally better to set this in the
                      .series() method instead of at the class level.
+    :param max_workers: Maximum number of requests in flight at the same time. The default of 1
+                        sends requests one after another; anything higher sends the requests for
+                        each series batch and year window concurrently from a thread pool.
+    :param cache: A :class:`blsconnect.cache.ResponseCache` (e.g. ``SQLiteCache`` or
+                  ``DirectoryCache``) to store API responses in. Requests that are in the cache are
+                  not sent to the API again, which saves on the daily query limit.
+    :param session: Object used to send requests, which needs a ``requests.Session``-like
+                    ``.post()`` method. By default a ``requests.Session`` is created, which keeps
+                    connections to the API open and reuses them across requests. Passing your own
+                    session (or a stand-in for one) lets you configure the transport yourself,
+                    e.g. to run against a local stub server.
+    :param pool_size: Maximum number of open connections kept by the default session. Defaults to
+                      ``max_workers``, but at least 10.
+    :param timeout: Seconds to wait for the API to respond before giving up on a request.
+    :param url: URL of the BLS API.
+    :param scheduler: A :class:`blsconnect.scheduler.RequestScheduler` that paces requests, retries
+                      failed ones, and counts requests against the daily limit. By default, one is
+                      created with the BLS's daily limit for registered (or unregistered) users.
+                      Share one scheduler between instances that use the same key.
+    :param catalog_index: A :class:`blsconnect.catalog.CatalogIndex` that every catalog returned
+                          by the API is added to, so the metadata can be looked up later without
+                          any requests.
+    :param store: A :class:`blsconnect.store.ParquetStore` that pulled data is written to. Cells
+                  that are already in the store are read from disk instead of requested.
+    :param hooks: dict of {event : function or list of functions} that are called with the
+                  numbers of each call as they come in, e.g. to export them as metrics. See
+                  :class:`blsconnect.stats.RequestStats`.
     :attr messages: Returns messages from last time .series() was run.
     :attr catalog: Returns data catalog from last time .series() was run. Only available if API
-                   key is set.
+                   key is set. Catalogs are remembered for as long as the instance exists, so the
+                   catalog of a series is only requested from the API once.
+    :attr stats: :class:`blsconnect.stats.RequestStats` of the last time .series() was run, with
+                 the time taken by each stage, the number of requests and bytes, and the number of
+                 cache hits and misses.
     """
     
     def __init__(self, key:str=None, msg_log_level:int=logging.WARNING, start_year:int=None,
-                 end_year:int=None):
+                 end_year:int=None, max_workers:int=1, cache=None, session=None,
+                 pool_size:int=None, timeout:float=60, url:str=BLS_BASE_URL, scheduler=None,
+                 catalog_index=None, store=None, hooks:dict=None):
         # Setup logging stuff
         self.logger = logging.getLogger(__name__)
         if isinstance(msg_log_level, str):
@@ -52,12 +99,31 @@ class RequestBLS(object):
         # Setup key
         self.key = key
         self.api_year_limit = 10 if not key else 20
+        self.api_series_limit = 25 if not key else 50
 
         # Setup other
         self.start_year = start_year
         self.end_year = end_year
+        if max_workers < 1:
+            raise InputError('max_workers kwarg must be at least 1.')
+        self.max_workers = max_workers
+        self.cache = cache
+        self.session = session or self._make_session(pool_size or max(max_workers, 10))
+        self.timeout = timeout
+        self.url = url
+        self.scheduler = scheduler or RequestScheduler(
+            daily_limit=DAILY_LIMIT_WITH_KEY if key else DAILY_LIMIT_WITHOUT_KEY
+        )
+        self.catalog_index = catalog_index
+        self.store = store
+        for event in hooks or {}:
+            if event not in HOOK_EVENTS:
+                raise InputError(f'hooks kwarg events must be in {HOOK_EVENTS}.')
+        self.hooks = hooks
+        self.stats = RequestStats(hooks)
         self.messages = []
         self._catalog = {}
+        self._catalogs = {}
     
     def series(
         self,
@@ -69,8 +135,12 @@ class RequestBLS(object):
         catalog:bool=True,
         rtn_msg:bool=False,
         interpolate:str=None,
-        groupby:str=None, # Does not work right now
-        groupby_method:str='mean' # Does not work right now
+        groupby:str=None,
+        groupby_method:str='mean',
+        compact:bool=False,
+        value_dtype:str='float64',
+        time_index:str=None,
+        lazy:bool=False
     ):
         """Get a data series from the BLS API by Series ID for a given date range.
         
@@ -80,7 +150,8 @@ class RequestBLS(object):
         .. _BLS Data Finder: https://www.bls.gov/bls/data_finder.htm
         
         :param series: Series ID of series to request. You can input either a single string, a list
-                       of Series ID's, or a dict where the .values() form a list of Series ID's.
+                       (or other iterable) of Series ID's, or a dict where the .values() form a
+                       list of Series ID's.
         :param start_year: Earliest year of data to pull. See :meth:`_year_handler()` for more on
                            how undefined years are handled.
         :param end_year: Latest year of data to pull. See :meth:`_year_handler()` for more on how
@@ -94,59 +165,485 @@ class RequestBLS(object):
         :param interpolate: Fills in missing values. This just passes a string to df.interpolate().
                             Notably, this occurs before groupby, which is why you might want to
                             specify this in .series() instead of with the returned DataFrame.
-        :param groupby: Collapses data according to some frequency. Valid inputs are 'y', 's', 'q',
-                        'm'.
+        :param groupby: Collapses data according to some frequency. Valid inputs are 'y' (or 'a'),
+                        's', 'q', 'm'. See :meth:`_group()`.
         :param groupby_method: How to collapse data if it will be collapsed. 'mean' is the default
-                               method. Can also do 'first', 'last', 'min', and 'max'.
-        :returns: DataFrame
+                               method. Can also do 'first', 'last', 'min', 'max', and 'sum'.
+        :param compact: If True, returns the data in a more memory-efficient form. See
+                        :meth:`_compact()`.
+        :param value_dtype: dtype of the values when ``compact=True``, e.g. ``'float32'`` to halve
+                            the memory taken up by the values.
+        :param time_index: If set, indexes the data by time instead of returning ``year``,
+                           ``period`` and ``periodName`` columns. ``'period'`` uses a
+                           ``PeriodIndex``, and ``'date'`` uses a ``DatetimeIndex`` of the first
+                           day of each period. See :meth:`_time_index()`.
+        :param lazy: If True, returns a :class:`SeriesResult` instead of a DataFrame, which holds
+                     the data once and builds DataFrames in any shape, with any transformation,
+                     only when they are asked for. ``shape`` and ``keep_footnotes`` are then left
+                     to the result, and the transformation kwargs cannot be set.
+        :returns: DataFrame, or :class:`SeriesResult` if ``lazy=True``.
         """
         
-        self.messages = []
-        self._catalog = {}
+        start = self._begin_call()
         
         # Handle user inputs
         # There is a lot of LBYL instead of EAFP to avoid eating up unnecessary API calls.
+        series, start_year, end_year, shape, keep_footnotes = self._prepare_series(
+            series, start_year, end_year, shape, keep_footnotes, interpolate, groupby, compact,
+            time_index, lazy
+        )
+        
+        # Get data, put in DataFrame
+        df, catalogs = self._get_frame(series, start_year, end_year, shape, keep_footnotes, catalog)
+        
+        # Transform data
+        df = self._finish_series(df, series, start_year, end_year, shape, interpolate, groupby,
+                                 groupby_method, compact, value_dtype, time_index, lazy)
+        
+        # Return
+        self._end_call(start, catalog, catalogs)
+        return df
+    
+    def series_many(self, specs):
+        """Gets the data of several independent :meth:`series()` calls at once. The (Series ID,
+        year) cells of every call are put together, so a series or year that several calls need is
+        only requested once, and the requests are planned over all of the calls together, which
+        packs them into far fewer requests than making each call on its own.
+        
+        :param specs: List of the arguments of each :meth:`series()` call, each one either a dict
+                      of kwargs (e.g. ``{'series' : 'LNS14000000', 'start_year' : 2000,
+                      'shape' : 'long'}``) or a tuple of positional args (e.g.
+                      ``(['LNS14000000'], 2000, 2019)``).
+        :returns: List of DataFrames, one for each spec, in the same order. Each one is the same
+                  as what :meth:`series()` returns for that spec.
+        """
+        
+        start = self._begin_call()
+        
+        # Handle user inputs
+        calls = self._bind_specs(specs)
+        if not calls:
+            return []
+        
+        # Get every cell that any of the calls needs in a single 'long' DataFrame, and split it
+        # back up into each call
+        series, start_year, end_year, skip, catalog = self._union(calls)
+        df, catalogs = self._get_frame(series, start_year, end_year, 'long', True, catalog, skip,
+                                       pack=True)
+        dfs = self._split_calls(df, calls)
+        
+        # Return
+        self._end_call(start, catalog, catalogs)
+        return dfs
+    
+    def _bind_specs(self, specs):
+        """Handles the user input of :meth:`series_many()`.
+        
+        :returns: list of (list of Series ID's, start_year, end_year, dict of kwargs) tuples, one
+                  for each spec.
+        """
+        signature = inspect.signature(RequestBLS.series)
+        calls = []
+        for spec in specs:
+            if isinstance(spec, dict):
+                kwargs = signature.bind(self, **spec)
+            else:
+                kwargs = signature.bind(self, *spec)
+            kwargs.apply_defaults()
+            kwargs = kwargs.arguments
+            self._check_kwargs(kwargs['shape'], kwargs['interpolate'], kwargs['groupby'],
+                               kwargs['time_index'], kwargs['lazy'], kwargs['compact'])
+            if kwargs['lazy']:
+                kwargs['shape'], kwargs['keep_footnotes'] = 'long', True
+            calls.append(self._input_handler(kwargs['series'], kwargs['start_year'],
+                                             kwargs['end_year'], kwargs['shape'],
+                                             kwargs['keep_footnotes']) + (kwargs,))
+        return calls
+    
+    def _union(self, calls):
+        """Puts together the (Series ID, year) cells that the calls of :meth:`series_many()`
+        need.
+        
+        :param calls: list of tuples from :meth:`_bind_specs()`.
+        :returns: Tuple of (list of Series ID's, start_year, end_year, set of (Series ID, year)
+                  cells between start_year and end_year that no call needs, whether any call
+                  needs the catalog).
+        """
+        series = list(dict.fromkeys(s for call in calls for s in call[0]))
+        start_year = min(s_y for _, s_y, _, _ in calls)
+        end_year = max(e_y for _, _, e_y, _ in calls)
+        years = {}
+        for batch, s_y, e_y, _ in calls:
+            for s in batch:
+                years.setdefault(s, set()).update(range(s_y, e_y + 1))
+        skip = {(s, y) for s in series for y in range(start_year, end_year + 1)
+                if y not in years[s]}
+        catalog = any(kwargs['catalog'] for *_, kwargs in calls)
+        return series, start_year, end_year, skip, catalog
+    
+    def _split_calls(self, df, calls):
+        """Splits the data of :meth:`series_many()` back up into each call.
+        
+        :param df: ``'long'`` pandas DataFrame with footnotes, covering every call.
+        :param calls: list of tuples from :meth:`_bind_specs()`.
+        :returns: list of DataFrames, one for each call.
+        """
+        rows = df.groupby('seriesID', sort=False).indices
+        none = np.array([], dtype='int64')
+        dfs = []
+        for batch, s_y, e_y, kwargs in calls:
+            part = df.iloc[np.concatenate([none] + [rows.get(s, none) for s in batch])]
+            part = part[part['year'].between(s_y, e_y)]
+            if kwargs['lazy']:
+                dfs.append(SeriesResult(self, self._cleanup_df(part, 'long'), batch, s_y, e_y))
+                continue
+            if not kwargs['keep_footnotes']:
+                part = part.drop(columns='footnotes')
+            part = self._reshape(part, batch, kwargs['shape'], kwargs['keep_footnotes'])
+            part = self._cleanup_df(part, kwargs['shape'])
+            dfs.append(self._transform(
+                part, batch, kwargs['shape'], kwargs['interpolate'], kwargs['groupby'],
+                kwargs['groupby_method'], kwargs['compact'], kwargs['value_dtype'],
+                kwargs['time_index']
+            ))
+        return dfs
+    
+    def _check_kwargs(self, shape, interpolate, groupby, time_index, lazy=False, compact=False):
+        """Raises an error if the kwargs of :meth:`series()` are invalid."""
+        if lazy and (interpolate or groupby or compact or time_index):
+            raise InputError('Transformations cannot be set with lazy=True. Set them on the views '
+                             'of the result instead, e.g. .wide(groupby="q").')
         if shape not in ['wide', 'long']:
             raise InputError('shape kwarg must be either "wide" or "long".')
+        if groupby and groupby.lower() not in ['y', 'a', 's', 'q', 'm']:
+            raise InputError('groupby kwarg must be one of "y", "a", "s", "q" or "m".')
+        if time_index not in [None, 'period', 'date']:
+            raise InputError('time_index kwarg must be either None, "period" or "date".')
         if interpolate:
             pd.DataFrame({'a' : [0]}) \
                 .interpolate(method=interpolate) # raises error if interpolate method is invalid.
-        start_year, end_year = self._year_handler(start_year, end_year)
-        if isinstance(series, dict):
-            series = list(series.values())
-        if not isinstance(series, list):
-            series = [series]
-        if keep_footnotes and shape == 'wide' and len(series) > 1:
-            raise InputError('Cannot return footnotes with more than 1 series in "wide" format. '
-                             'Set shape="long" or set keep_footnotes=False.')
-        
-        # Get data, put in DataFrame
-        df = pd.DataFrame()
-        r = {}
-        for s_y, e_y in self._year_groups(start_year, end_year):
-            r[s_y] = self._request(series, s_y, e_y, catalog)
-            next_df = self._tablefy(r[s_y].content, shape, keep_footnotes)
-            df = df.append(next_df)
-        df = self._cleanup_df(df, shape)
+    
+    def _transform(self, df, series, shape, interpolate, groupby, groupby_method, compact,
+                   value_dtype, time_index):
+        """Applies the transformations of :meth:`series()` to a cleaned up DataFrame, in order:
+        interpolate, groupby, compact, and time_index.
         
-        # Transform data
+        :returns: pandas DataFrame.
+        """
         if interpolate:
-            if shape == 'wide':
-                df = df.interpolate(method=interpolate)
-            if shape == 'long':
-                df = df.groupby('value') \
-                    .apply(lambda group: group.interpolate(method=interpolate))
+            df = self._interpolate(df, shape, interpolate)
         if groupby:
             df = self._group(df, series, shape, groupby, groupby_method)
+        if compact:
+            df = self._compact(df, shape, value_dtype)
+        if time_index:
+            df = self._time_index(df, shape, time_index)
+        return df
+    
+    def _prepare_series(self, series, start_year, end_year, shape, keep_footnotes, interpolate,
+                        groupby, compact, time_index, lazy):
+        """Handles the user input of :meth:`series()`. A lazy call gets ``'long'`` data with
+        footnotes, which :class:`SeriesResult` reshapes later.
         
-        # Return
+        :returns: Tuple of (list of Series ID's, start_year, end_year, shape, keep_footnotes).
+        """
+        self._check_kwargs(shape, interpolate, groupby, time_index, lazy, compact)
+        if lazy:
+            shape, keep_footnotes = 'long', True
+        series, start_year, end_year = \
+            self._input_handler(series, start_year, end_year, shape, keep_footnotes)
+        return series, start_year, end_year, shape, keep_footnotes
+    
+    def _finish_series(self, df, series, start_year, end_year, shape, interpolate, groupby,
+                       groupby_method, compact, value_dtype, time_index, lazy):
+        """Cleans up the DataFrame of :meth:`series()` and transforms it, or keeps it in a
+        :class:`SeriesResult` if ``lazy=True``.
+        """
+        df = self._cleanup_df(df, shape)
+        if lazy:
+            return SeriesResult(self, df, series, start_year, end_year)
+        return self._transform(df, series, shape, interpolate, groupby, groupby_method, compact,
+                               value_dtype, time_index)
+    
+    def _begin_call(self):
+        """Starts a call that pulls data with empty ``messages``, ``catalog`` and ``stats``.
+        
+        :returns: Start time of the call, for :meth:`_end_call()`.
+        """
+        self.messages = []
+        self._catalog = {}
+        self.stats = RequestStats(self.hooks)
+        return time.perf_counter()
+    
+    def _end_call(self, start, catalog, catalogs):
+        """Finishes a call started by :meth:`_begin_call()`: keeps ``catalogs`` if the catalog was
+        asked for, and adds the total time to ``self.stats``.
+        """
         if self.key and catalog:
-            self._catalog = {
-                s['seriesID'] : s['catalog']
-                for s in r[start_year].json()['Results']['series']
-            }
+            self._catalog = catalogs
+        self._done(start)
+    
+    def _done(self, start):
+        """Adds the total time of a call to ``self.stats`` and calls the ``'done'`` hooks."""
+        self.stats.add_time('total', time.perf_counter() - start)
+        self.stats.done()
+    
+    def _get_frame(self, series, start_year, end_year, shape, keep_footnotes, catalog, skip=(),
+                   pack:bool=False):
+        """Gets the data for :meth:`series()` and puts it in a DataFrame.
+        
+        :param series: List of Series ID's.
+        :param start_year: Earliest year of data to pull.
+        :param end_year: Latest year of data to pull.
+        :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
+        :param keep_footnotes: Whether the Footnotes field is kept.
+        :param catalog: Whether the catalog is requested.
+        :param skip: Collection of (Series ID, year) cells that are not needed.
+        :param pack: Passed to :meth:`_plan()`.
+        :returns: Tuple of (pandas DataFrame, {Series ID : catalog}).
+        """
+        stored, have = self._from_store(series, start_year, end_year, keep_footnotes, catalog, skip)
+        cells, catalogs = self._get_cells(series, start_year, end_year, catalog,
+                                          have | set(skip), pack)
+        df = self._frame_from_cells(series, start_year, end_year, shape, keep_footnotes, cells,
+                                    stored, have)
+        return df, catalogs
+    
+    def _from_store(self, series, start_year, end_year, keep_footnotes, catalog, skip=()):
+        """Reads every (Series ID, year) cell that is in ``self.store``. If the catalog is
+        requested, the stored catalogs of series that are not known yet are read as well.
+        
+        :returns: Tuple of (``'long'`` pandas DataFrame, or ``None`` if there is no store, and set
+                  of (Series ID, year) cells that were read).
+        """
+        if self.store is None:
+            return None, set()
+        with self.stats.timer('store'):
+            stored, have = self.store.load(series, start_year, end_year, keep_footnotes)
+            if self.key and catalog:
+                self._catalogs.update(
+                    self.store.load_catalogs([s for s in series if s not in self._catalogs])
+                )
+        self.stats.count(store_hits=len(have),
+                         store_misses=len(series) * (end_year - start_year + 1) - len(have)
+                                      - len(set(skip) - have))
+        return stored, have
+    
+    def _frame_from_cells(self, series, start_year, end_year, shape, keep_footnotes, cells,
+                          stored=None, have=()):
+        """Puts (Series ID, year) cells into a DataFrame. If there is a ``self.store``, the cells
+        are written to the store and the data read from the store is added to the DataFrame.
+        
+        :param cells: dict of {(Series ID, year) : list of observations}.
+        :param stored: ``'long'`` pandas DataFrame from :meth:`_from_store()`, or ``None``.
+        :param have: set of (Series ID, year) cells in ``stored``.
+        :returns: pandas DataFrame.
+        """
+        if self.store is None:
+            return self._tablefy(self._combine(series, start_year, end_year, cells), shape,
+                                 keep_footnotes)
+        cells = {k : v for k, v in cells.items() if k not in have}
+        df = pd.concat([stored, self._store_cells(series, start_year, end_year, cells,
+                                                  keep_footnotes)], ignore_index=True)
+        return self._reshape(df, series, shape, keep_footnotes)
+    
+    def _store_cells(self, series, start_year, end_year, cells, keep_footnotes):
+        """Writes (Series ID, year) cells to ``self.store``.
+        
+        :returns: ``'long'`` pandas DataFrame of the cells.
+        """
+        df = self._tablefy(self._combine(series, start_year, end_year, cells), 'long', True)
+        with self.stats.timer('store'):
+            self.store.write(df, cells)
+        return df if keep_footnotes else df.drop(columns='footnotes')
+    
+    def iter_series(
+        self,
+        series,
+        start_year:int=None,
+        end_year:int=None,
+        shape:str='wide',
+        keep_footnotes:bool=False,
+        catalog:bool=True,
+        compact:bool=False,
+        value_dtype:str='float64'
+    ):
+        """Like :meth:`series()`, but yields a DataFrame for each request as its response arrives
+        instead of returning everything in a single DataFrame. This keeps memory use bounded by the
+        size of a single request (at most 50 series over 20 years), so very large pulls can be
+        written straight to a file or a database.
+        
+        Each DataFrame covers one series batch over one year window and is cleaned up the same way
+        as the output of :meth:`series()`. ``self.store`` and ``self.cache`` are looked up one such
+        chunk at a time, and the data found there is yielded first, as each chunk is looked up.
+        The responses for the rest follow. The order of the DataFrames does not depend on
+        ``max_workers``.
+        
+        :param series: Series ID of series to request. See :meth:`series()`.
+        :param start_year: Earliest year of data to pull. See :meth:`series()`.
+        :param end_year: Latest year of data to pull. See :meth:`series()`.
+        :param shape: ``'wide'`` or ``'long'``. See :meth:`series()`.
+        :param keep_footnotes: If True, keeps the Footnotes field from the data. See
+                               :meth:`series()`.
+        :param catalog: Grabs the catalog from the API call and stores it in self._catalog. Only
+                        available if API key is set.
+        :param compact: If True, yields the data in a more memory-efficient form. See
+                        :meth:`_compact()`.
+        :param value_dtype: dtype of the values when ``compact=True``.
+        :returns: generator of DataFrames
+        """
+        
+        start = self._begin_call()
+        
+        # Handle user inputs
+        if shape not in ['wide', 'long']:
+            raise InputError('shape kwarg must be either "wide" or "long".')
+        series, start_year, end_year = \
+            self._input_handler(series, start_year, end_year, shape, keep_footnotes)
+        
+        # Stored and cached data comes first, one chunk at a time, while the requests for the rest
+        # are planned; then each response as it arrives
+        plan, skips = [], []
+        for batch in self._series_groups(series):
+            for s_y, e_y in self._year_groups(start_year, end_year):
+                have, df = self._lookup_chunk(batch, s_y, e_y, shape, keep_footnotes,
+                                              catalog and e_y == end_year)
+                if len(df):
+                    yield self._finish_chunk(df, shape, compact, value_dtype)
+                self._plan_chunk(batch, s_y, e_y, have, catalog, plan, skips)
+        for (batch, s_y, e_y), skip, r in zip(plan, skips, self._iter_execute(plan, catalog)):
+            df = self._response_chunk(r, batch, s_y, e_y, skip, shape, keep_footnotes, catalog)
+            if len(df):
+                yield self._finish_chunk(df, shape, compact, value_dtype)
+        self._done(start)
+    
+    def _lookup_chunk(self, series, start_year, end_year, shape, keep_footnotes, catalog):
+        """Looks up one chunk of :meth:`iter_series()` in ``self.store`` and ``self.cache``.
+        
+        :returns: Tuple of (set of (Series ID, year) cells that were found, DataFrame of them).
+        """
+        stored, have = self._from_store(series, start_year, end_year, keep_footnotes, catalog)
+        cached, _ = self._from_cache(series, start_year, end_year, catalog)
+        cached = {k : v for k, v in cached.items() if k not in have}
+        df = self._frame_from_cells(series, start_year, end_year, shape, keep_footnotes, cached,
+                                    stored, have)
+        return have | cached.keys(), df
+    
+    def _plan_chunk(self, series, start_year, end_year, have, catalog, plan, skips):
+        """Plans the requests for the cells of one chunk of :meth:`iter_series()` that were not
+        found, and adds them to ``plan``, along with the found cells in each request's window to
+        ``skips``.
+        """
+        for b, s_y, e_y in self._plan(series, start_year, end_year, have=have):
+            plan.append((b, s_y, e_y))
+            skips.append({(s, y) for s, y in have if s_y <= y <= e_y})
+        if self.key and catalog:
+            self._catalog.update(self._known_catalogs(series))
+    
+    def _response_chunk(self, r, series, start_year, end_year, skip, shape, keep_footnotes,
+                        catalog):
+        """Turns the response to one request of :meth:`iter_series()` into a DataFrame, leaving
+        out the cells in ``skip`` that were already yielded.
+        """
+        if self.key and catalog:
+            self._catalog.update(self._known_catalogs(series))
+        cells = {k : v for k, v in self._split_cells(r, start_year, end_year).items()
+                 if k not in skip}
+        return self._frame_from_cells(series, start_year, end_year, shape, keep_footnotes, cells)
+    
+    def _finish_chunk(self, df, shape, compact, value_dtype):
+        """Cleans up one chunk of :meth:`iter_series()`."""
+        df = self._cleanup_df(df, shape)
+        if compact:
+            df = self._compact(df, shape, value_dtype)
         return df
     
+    def refresh(self, df, shape:str='wide', lookback:int=0, catalog:bool=False):
+        """Brings a DataFrame returned by :meth:`series()` up to date without pulling its whole
+        history again.
+        
+        For each series in the DataFrame, only the years from the latest year already present (minus
+        ``lookback`` years) up to the current year are requested. The new observations are merged
+        into the DataFrame, overwriting the old values for the same periods, so revised data
+        replaces the data that was there before. The refreshed years are always requested from the
+        API, even if they are in ``self.cache``, and the cache is updated with the new data.
+        
+        The DataFrame should come straight from :meth:`series()`, i.e. without ``interpolate`` or
+        ``groupby``.
+        
+        :param df: DataFrame returned by :meth:`series()`.
+        :param shape: The shape of ``df``, which can be either ``'long'`` or ``'wide'``.
+        :param lookback: Number of years before the latest year present to request again, in case
+                         the BLS has revised them.
+        :param catalog: Grabs the catalog from the API call and stores it in self._catalog. Only
+                        available if API key is set.
+        :returns: DataFrame
+        """
+        
+        start = self._begin_call()
+        series, start_year, end_year, keep_footnotes = self._refresh_window(df, shape, lookback)
+        new_df, catalogs = self._refresh_frame(series, start_year, end_year, shape, keep_footnotes,
+                                               catalog)
+        df = self._merge_refresh(df, new_df, shape)
+        self._end_call(start, catalog, catalogs)
+        return df
+    
+    def _refresh_window(self, df, shape, lookback):
+        """Handles the user input of :meth:`refresh()`, and works out which years to get again.
+        
+        :returns: Tuple of (list of Series ID's, dict of {Series ID : earliest year to get},
+                  latest year to get, whether ``df`` has footnotes).
+        """
+        if shape not in ['wide', 'long']:
+            raise InputError('shape kwarg must be either "wide" or "long".')
+        keep_footnotes = 'footnotes' in df.columns
+        if shape == 'wide':
+            series = [c for c in df.columns if c not in ['year', 'period', 'periodName', 'footnotes']]
+            last_year = {s : df.loc[df[s].notna(), 'year'].max() for s in series}
+        if shape == 'long':
+            last_year = df.groupby('seriesID')['year'].max().to_dict()
+            series = list(last_year)
+        last_year = {s : int(y) for s, y in last_year.items() if pd.notna(y)}
+        if not last_year:
+            raise InputError('Cannot refresh a DataFrame without any data.')
+        
+        # Only get data from each series' latest year onwards
+        end_year = max(datetime.datetime.now().year, *last_year.values())
+        start_year = {s : last_year.get(s, end_year) - lookback for s in series}
+        return series, start_year, end_year, keep_footnotes
+    
+    def _merge_refresh(self, df, new_df, shape):
+        """Merges the new data of :meth:`refresh()` into ``df``, overwriting old rows with new
+        rows.
+        """
+        if shape == 'wide':
+            keys = ['year', 'period', 'periodName']
+            df = new_df.set_index(keys) \
+                .combine_first(df.set_index(keys)) \
+                .reset_index()[list(df.columns)]
+        if shape == 'long':
+            keys = ['seriesID', 'year', 'period']
+            df = pd.concat([df, new_df[list(df.columns)]], sort=False) \
+                .drop_duplicates(subset=keys, keep='last')
+        return self._cleanup_df(df, shape)
+    
+    def _refresh_frame(self, series, start_year, end_year, shape, keep_footnotes, catalog):
+        """Gets the new data for :meth:`refresh()` from the API, bypassing the cache, and writes it
+        to ``self.store`` if it is set.
+        
+        :param series: List of Series ID's.
+        :param start_year: dict of {Series ID : earliest year to get}.
+        :param end_year: Latest year to get.
+        :returns: Tuple of (DataFrame in ``shape``, dict of catalogs).
+        """
+        first = min(start_year.values())
+        skip = {(s, y) for s in series for y in range(first, start_year[s])}
+        cells, catalogs = self._get_cells(series, first, end_year, catalog, skip, use_cache=False)
+        if self.store is not None:
+            self._store_cells(series, first, end_year, cells, False)
+        df = self._tablefy(self._combine(series, first, end_year, cells), shape, keep_footnotes)
+        return df, catalogs
+    
     @property
     def catalog(self):
         """Returns self._catalog if self.key is defined; otherwise yell at the user for not setting
@@ -156,6 +653,36 @@ class RequestBLS(object):
             raise AttributeError('Catalog is not available without a key.')
         return self._catalog
     
+    def _input_handler(self, series, start_year, end_year, shape, keep_footnotes):
+        """Handles the user input for series and years.
+        
+        :param series: A single Series ID, a list (or any other iterable, e.g. a generator from
+                       :func:`bls_search()`) of Series ID's, or a dict where the .values() form a
+                       list of Series ID's.
+        :param start_year: Earliest year of data to pull. See :meth:`_year_handler()`.
+        :param end_year: Latest year of data to pull. See :meth:`_year_handler()`.
+        :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
+        :param keep_footnotes: Whether the Footnotes field is kept.
+        :returns: Tuple of (list of Series ID's, start_year, end_year). Series ID's are stripped
+                  and upper-cased like the ones the API sends back, so that the requested series,
+                  the cache and the responses all use the same keys.
+        """
+        start_year, end_year = self._year_handler(start_year, end_year)
+        if isinstance(series, dict):
+            series = series.values()
+        if isinstance(series, str):
+            series = [series]
+        try:
+            # drops duplicates without changing the order
+            series = list(dict.fromkeys(s.strip().upper() for s in series))
+        except (TypeError, AttributeError):
+            raise InputError("series must be a Series ID, an iterable of Series ID's, or a dict, "
+                             f'not {type(series).__name__}.') from None
+        if keep_footnotes and shape == 'wide' and len(series) > 1:
+            raise InputError('Cannot return footnotes with more than 1 series in "wide" format. '
+                             'Set shape="long" or set keep_footnotes=False.')
+        return series, start_year, end_year
+
     def _year_handler(self, start_year, end_year):
         """Handles the user input for years with the following logic:
         
@@ -170,7 +697,6 @@ class RequestBLS(object):
         start_year = start_year or self.start_year or None
         end_year = end_year or self.end_year or None
         if start_year is None and end_year is None:
-            import datetime
             end_year = datetime.datetime.now().year
         if start_year is None:
             start_year = int(end_year) - (self.api_year_limit-1)
@@ -188,13 +714,21 @@ class RequestBLS(object):
         """This method is what actually posts requests after all the logic of what is supposed to
         be posted is sorted out.
         
-        Messages in the Response are logged at the level set by :meth:`__init__()`.
+        The response is decoded once into a :class:`BLSResponse`. Messages in the response are
+        logged at the level set by :meth:`__init__()` and added to ``self.messages``. Pacing and
+        retries are handled by :meth:`_send()`.
         
         :param series: List of Series ID's.
         :param start_year: Earliest year of data to pull.
         :param end_year: Latest year of data to pull.
-        :returns: ``requests.models.Response``
+        :returns: :class:`BLSResponse`
         """
+        r = self._send(self._request_body(series, start_year, end_year, catalog))
+        self._read_messages(r)
+        return r
+
+    def _request_body(self, series:list, start_year:int, end_year:int, catalog:bool):
+        """Builds the json string that is posted to the API for a request."""
         post_data = {
             'seriesid': series,
             'startyear': str(start_year),
@@ -204,19 +738,90 @@ class RequestBLS(object):
             post_data['registrationKey'] = self.key
             if catalog:
                 post_data['catalog'] = catalog
-        r = requests.post(BLS_BASE_URL,
-                          data=json.dumps(post_data),
-                          headers={'Content-type': 'application/json'})
+        return json.dumps(post_data)
+
+    def _read_messages(self, r):
+        """Logs the messages of a :class:`BLSResponse` and adds them to ``self.messages``. Raises
+        an :class:`InputError` if the key is invalid or the daily limit has been reached.
+        """
         # Handle invalid key
-        if len(r.json()['message']) > 0:
+        if len(r.messages) > 0:
             cond = \
-                r.json()['message'][0].find('Please provide a proper key') >= 0 or \
-                r.json()['message'][0].find('Request could not be serviced, as the daily') >= 0
+                r.messages[0].find('Please provide a proper key') >= 0 or \
+                r.messages[0].find('Request could not be serviced, as the daily') >= 0
             if cond:
-                raise InputError(r.json()['message'][0])
-        for msg in r.json()['message']:
+                raise InputError(r.messages[0])
+        for msg in r.messages:
             self.logger.log(self.msg_log_level, msg)
-        return r
+        self.messages.extend(r.messages)
+
+    def _send(self, body:str):
+        """Posts a request body to the API through ``self.scheduler``: each attempt waits for the
+        rate limit, and attempts that time out, fail to connect, get a 429 or 5xx status code, get a
+        garbled response, or get turned down by the BLS for going over the rate limit are retried
+        with exponential backoff. If all attempts fail, the last error is raised, or an
+        :class:`InputError` with the BLS's message if the last attempt was still turned down.
+        
+        :param body: json string to post.
+        :returns: :class:`BLSResponse`
+        """
+        for attempt in range(self.scheduler.max_retries + 1):
+            last_attempt = attempt == self.scheduler.max_retries
+            with self.stats.timer('wait'):
+                self.scheduler.wait()
+            try:
+                self.stats.count(requests=1, retries=int(attempt > 0))
+                with self.stats.timer('network'):
+                    response = self.session.post(self.url,
+                                                 data=body,
+                                                 headers={'Content-type': 'application/json'},
+                                                 timeout=self.timeout)
+                r = self._check_attempt(response.status_code, response.content,
+                                        response.raise_for_status, last_attempt)
+                if r is not None:
+                    return r
+            except (requests.ConnectionError, requests.Timeout, ValueError) as e:
+                if last_attempt:
+                    raise
+                self.logger.debug(f'Retrying request after error: {e}')
+            with self.stats.timer('wait'):
+                time.sleep(self.scheduler.backoff_delay(attempt))
+
+    def _check_attempt(self, status:int, content:bytes, raise_for_status, last_attempt:bool):
+        """Decides what to do with the response to one attempt of :meth:`_send()`. Does no I/O, so
+        that only sending and sleeping differ between the clients.
+        
+        :param status: HTTP status code of the response.
+        :param content: Body of the response.
+        :param raise_for_status: Function that raises the HTTP error of the response, if any.
+        :param last_attempt: Whether this is the last attempt, which is never retried.
+        :returns: :class:`BLSResponse`, or ``None`` if the request should be retried.
+        """
+        self.scheduler.count()
+        if self.scheduler.retry_status(status) and not last_attempt:
+            return None
+        raise_for_status()
+        with self.stats.timer('decode'):
+            r = BLSResponse.decode(content)
+        if not self.scheduler.throttled(r):
+            return r
+        if last_attempt:
+            raise InputError(' '.join(r.messages))
+        return None
+    
+    def _make_session(self, pool_size):
+        """Creates the default session: a ``requests.Session`` that keeps up to ``pool_size``
+        connections open and asks for compressed responses.
+        
+        :param pool_size: Maximum number of open connections.
+        :returns: ``requests.Session``
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Accept-Encoding' : 'gzip, deflate'})
+        return session
 
     def _year_groups(self, start_year, end_year):
         """Because the API limits to 20 years (or 10 without key), you need to do some requests
@@ -233,102 +838,687 @@ class RequestBLS(object):
             )
             for i in range(-(-(end_year - start_year + 1) // self.api_year_limit))
         ]
+
+    def _series_groups(self, series):
+        """Because the API limits to 50 series (or 25 without key) per request, you need to do some
+        requests in batches if there are more series than that. This method gives you the batches
+        in a list.
+
+        :param series: List of Series ID's.
+        :returns: list of lists of Series ID's.
+        """
+        return [
+            series[i:i+self.api_series_limit]
+            for i in range(0, len(series), self.api_series_limit)
+        ]
+
+    def _year_windows(self, years):
+        """Like :meth:`_year_groups()`, but for any set of years instead of a continuous range.
+        Years are covered from the latest year backwards with windows as long as the API allows,
+        which is the smallest number of windows that covers all of them. Windows can include some
+        years that are not in the set.
+
+        :param years: Sorted list of years.
+        :returns: list of (start_year, end_year) tuples.
+        """
+        windows = []
+        i = len(years) - 1
+        while i >= 0:
+            e_y = years[i]
+            while i >= 0 and years[i] > e_y - self.api_year_limit:
+                i -= 1
+            windows.append((years[i+1], e_y))
+        return windows
+
+    def _plan(self, series, start_year, end_year, have=(), pack:bool=False):
+        """Plans every request needed to cover all the series over all the years, i.e. every
+        combination of a series batch from :meth:`_series_groups()` and a year window from
+        :meth:`_year_windows()`. Since both dimensions are split into as few chunks as the API
+        limits allow, this is the smallest number of requests that covers the data.
+
+        Cells that are already available (e.g. from the cache) can be passed in ``have``; they are
+        left out of the plan. Series that are missing the same years are batched together.
+
+        :param series: List of Series ID's.
+        :param start_year: Earliest year of data to pull.
+        :param end_year: Latest year of data to pull.
+        :param have: Collection of (Series ID, year) cells that do not need to be requested.
+        :param pack: If True, series are also batched with series that are missing other years,
+                     as long as that takes fewer requests. See :meth:`_pack()`.
+        :returns: list of (series batch, start_year, end_year) tuples.
+        """
+        groups = {}
+        missing = {}
+        for s in series:
+            missing[s] = [y for y in range(start_year, end_year + 1) if (s, y) not in have]
+            if missing[s]:
+                groups.setdefault(tuple(self._year_windows(missing[s])), []).append(s)
+        if pack:
+            groups = self._pack(groups, missing)
+        return [
+            (batch, s_y, e_y)
+            for windows, group in groups.items()
+            for batch in self._series_groups(group)
+            for s_y, e_y in windows
+        ]
+
+    def _pack(self, groups, missing):
+        """Merges groups of series from :meth:`_plan()` when requesting them together takes fewer
+        requests, e.g. a group missing 2001-2010 with a group missing 2000-2010, or a group
+        missing 2000 with a group missing 2010. The merged group is requested over the year
+        windows that cover the years of both, so some series are requested for years they do not
+        need, which costs nothing against the daily limit.
+        
+        Groups whose windows cover the most years go first, so that narrower groups can be merged
+        into them.
+        
+        :param groups: dict of {tuple of year windows : list of Series ID's}.
+        :param missing: dict of {Series ID : list of missing years}.
+        :returns: dict of {tuple of year windows : list of Series ID's}.
+        """
+        def requests(n_series, windows):
+            return -(-n_series // self.api_series_limit) * len(windows)
+        
+        order = sorted(groups, key=lambda w: (-sum(e_y - s_y + 1 for s_y, e_y in w),
+                                              -len(groups[w])))
+        packed = {}
+        years = {}
+        for windows in order:
+            group = groups[windows]
+            group_years = {y for s in group for y in missing[s]}
+            best, best_saved = None, 0
+            for target, target_group in packed.items():
+                merged = tuple(self._year_windows(sorted(years[target] | group_years)))
+                saved = requests(len(target_group), target) + requests(len(group), windows) \
+                    - requests(len(target_group) + len(group), merged)
+                if saved > best_saved:
+                    best, best_saved = (target, merged), saved
+            if best is None:
+                packed[windows] = list(group)
+                years[windows] = group_years
+            else:
+                target, merged = best
+                group = packed.pop(target) + group
+                group_years |= years.pop(target)
+                packed[merged] = packed.pop(merged, []) + group
+                years[merged] = years.pop(merged, set()) | group_years
+        return packed
+
+    def _execute(self, plan, catalog):
+        """Sends every planned request. See :meth:`_iter_execute()`.
+
+        :param plan: list of (series batch, start_year, end_year) tuples from :meth:`_plan()`.
+        :param catalog: Passed to :meth:`_fetch()`.
+        :returns: list of :class:`BLSResponse`.
+        """
+        return list(self._iter_execute(plan, catalog))
+
+    def _iter_execute(self, plan, catalog):
+        """Sends every planned request and yields the responses in the same order as the plan.
+        Requests are independent of each other, so if ``self.max_workers`` is more than 1 they are
+        sent concurrently. At most ``self.max_workers`` requests are in flight or waiting to be
+        yielded at a time, so responses do not pile up if they are consumed slowly. The hooks of
+        each request's events are called on this thread as its response is collected.
+
+        If the plan needs more requests than are left of the daily limit, nothing is sent.
+
+        :param plan: list of (series batch, start_year, end_year) tuples from :meth:`_plan()`.
+        :param catalog: Whether the catalog is requested. See :meth:`_catalog_flags()`.
+        :returns: generator of :class:`BLSResponse`.
+        """
+        plan = self._flag_plan(plan, catalog)
+        if self.max_workers == 1 or len(plan) <= 1:
+            for batch, s_y, e_y, c in plan:
+                yield self._fetch(batch, s_y, e_y, c)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(plan))) as executor:
+            futures = deque()
+            try:
+                for batch, s_y, e_y, c in plan:
+                    if len(futures) == self.max_workers:
+                        yield self._collect(futures.popleft())
+                    futures.append(executor.submit(self._fetch, batch, s_y, e_y, c))
+                while futures:
+                    yield self._collect(futures.popleft())
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _collect(self, future):
+        """Waits for a request sent by a worker thread, and calls the hooks of its events on this
+        thread. See :meth:`RequestStats.flush()`.
+
+        :returns: :class:`BLSResponse`
+        """
+        r = future.result()
+        self.stats.flush()
+        return r
+
+    def _flag_plan(self, plan, catalog):
+        """Adds whether each request asks for the catalog to the plan, and makes sure the plan
+        fits in what is left of the daily limit.
+        
+        :param plan: list of (series batch, start_year, end_year) tuples from :meth:`_plan()`.
+        :param catalog: Whether the catalog is requested. See :meth:`_catalog_flags()`.
+        :returns: list of (series batch, start_year, end_year, catalog) tuples.
+        """
+        plan = [i + (c,) for i, c in zip(plan, self._catalog_flags(plan, catalog))]
+        remaining = self.scheduler.remaining
+        if remaining is not None and len(plan) > remaining:
+            raise InputError(f'This needs {len(plan)} requests, but only {remaining} of the daily '
+                             f'limit of {self.scheduler.daily_limit} requests are left.')
+        return plan
+
+    def _catalog_flags(self, plan, catalog):
+        """Decides which requests of a plan ask for the catalog. The catalog makes responses a lot
+        bigger, so it is only asked for by the first request of each series that does not have a
+        known catalog yet, instead of by every year window.
+        
+        :param plan: list of (series batch, start_year, end_year) tuples from :meth:`_plan()`.
+        :param catalog: Whether the catalog is requested at all.
+        :returns: list of bools, one for each request in the plan.
+        """
+        if not (self.key and catalog):
+            return [False] * len(plan)
+        missing = {s for batch, _, _ in plan for s in batch if s not in self._catalogs}
+        flags = []
+        for batch, _, _ in plan:
+            flags.append(any(s in missing for s in batch))
+            missing.difference_update(batch)
+        return flags
+    
+    def _fetch(self, series:list, start_year:int, end_year:int, catalog:bool):
+        """Gets a single request from :meth:`_request()`, and keeps what it brought in with
+        :meth:`_record()`.
+
+        :param series: List of Series ID's.
+        :param start_year: Earliest year of data to pull.
+        :param end_year: Latest year of data to pull.
+        :param catalog: Passed to :meth:`_request()`.
+        :returns: :class:`BLSResponse`
+        """
+        catalog = bool(self.key and catalog) # catalog is ignored without a key
+        start = time.perf_counter()
+        r = self._request(series, start_year, end_year, catalog)
+        self._record(r, series, start_year, end_year, time.perf_counter() - start)
+        return r
+
+    def _record(self, r, series:list, start_year:int, end_year:int, seconds:float):
+        """Keeps what a response brought in. Its numbers are added to ``self.stats``. If
+        ``self.cache`` is set, the observations of a successful response are added to it one
+        (Series ID, year) cell at a time, along with the catalog of each series, which is kept as
+        long as data for past years. Catalogs are also added to ``self.catalog_index`` and
+        ``self.store`` if they are set.
+        """
+        self.stats.add_response(r, series, start_year, end_year, seconds)
+        if self.cache is not None and r.succeeded:
+            self.cache.set_many(
+                [
+                    (self.cache.cell_key(s, y), dumps(points), y)
+                    for (s, y), points in self._split_cells(r, start_year, end_year).items()
+                ] + [
+                    # year 0 is always a past year, so catalogs get the historical ttl
+                    (self.cache.catalog_key(s), dumps(c), 0) for s, c in r.catalog.items()
+                ]
+            )
+        self._catalogs.update(r.catalog)
+        if self.catalog_index is not None and r.catalog:
+            self.catalog_index.add(r.catalog)
+        if self.store is not None and r.catalog:
+            self.store.write_catalogs(r.catalog)
+
+    def _get_cells(self, series, start_year, end_year, catalog, skip=(), pack:bool=False,
+                   use_cache:bool=True):
+        """Gets the observations of every series over every year as (Series ID, year) cells. Cells
+        are taken from ``self.cache`` if possible, and the rest are requested from the API.
+        
+        :param series: List of Series ID's.
+        :param start_year: Earliest year of data to pull.
+        :param end_year: Latest year of data to pull.
+        :param catalog: Whether the catalog is requested.
+        :param skip: Collection of (Series ID, year) cells that should not be requested.
+        :param pack: Passed to :meth:`_plan()`.
+        :param use_cache: If False, every cell is requested from the API, e.g. to pick up
+                          revisions of past years, which never expire from the cache.
+        :returns: Tuple of ({(Series ID, year) : list of observations}, {Series ID : catalog}).
+        """
+        cells = {}
+        if use_cache:
+            cells, _ = self._from_cache(series, start_year, end_year, catalog)
+        plan = self._plan(series, start_year, end_year, have=cells.keys() | set(skip), pack=pack)
+        r = self._execute(plan, catalog)
+        for (_, s_y, e_y), i in zip(plan, r):
+            cells.update(self._split_cells(i, s_y, e_y))
+        return cells, self._known_catalogs(series)
+
+    def _from_cache(self, series, start_year, end_year, catalog):
+        """Looks up every (Series ID, year) cell in ``self.cache``. If the catalog is requested,
+        the catalogs of series that are not known yet are looked up as well. A series without a
+        known or cached catalog gets it along with the cells that have to be requested anyway; its
+        cached cells are never requested again just for the catalog.
+
+        :param series: List of Series ID's.
+        :param start_year: Earliest year of data to pull.
+        :param end_year: Latest year of data to pull.
+        :param catalog: Whether the catalog is requested.
+        :returns: Tuple of ({(Series ID, year) : list of observations}, {Series ID : catalog}).
+        """
+        if self.cache is None:
+            return {}, {}
+        keys = [(s, y) for s in series for y in range(start_year, end_year + 1)]
+        with self.stats.timer('cache'):
+            values = self.cache.get_many([self.cache.cell_key(s, y) for s, y in keys])
+            cells = {k : loads(v) for k, v in zip(keys, values) if v is not None}
+        self.stats.count(cache_hits=len(cells), cache_misses=len(keys) - len(cells))
+        if self.key and catalog:
+            missing = [s for s in series if s not in self._catalogs]
+            values = self.cache.get_many([self.cache.catalog_key(s) for s in missing])
+            self._catalogs.update({s : loads(v) for s, v in zip(missing, values) if v is not None})
+        return cells, self._known_catalogs(series)
     
+    def _known_catalogs(self, series):
+        """Returns {Series ID : catalog} for the series whose catalog is known."""
+        return {s : self._catalogs[s] for s in series if s in self._catalogs}
+
+    def _split_cells(self, r, start_year, end_year):
+        """Splits the observations in a response into (Series ID, year) cells. Every year in the
+        requested window gets a cell, even if it is empty, so that years without data are not
+        requested again.
+
+        :param r: :class:`BLSResponse`
+        :param start_year: Earliest year of data that was requested.
+        :param end_year: Latest year of data that was requested.
+        :returns: dict of {(Series ID, year) : list of observations}.
+        """
+        cells = {}
+        for bls_series in r.series:
+            s = bls_series['seriesID'].strip().upper()
+            for y in range(start_year, end_year + 1):
+                cells[(s, y)] = []
+            for point in bls_series['data']:
+                cells.setdefault((s, int(point['year'])), []).append(point)
+        return cells
+
+    def _combine(self, series, start_year, end_year, cells):
+        """Puts (Series ID, year) cells back together into the same structure as a response from
+        the API, so that it can be passed to :meth:`_tablefy()`.
+
+        :param series: List of Series ID's.
+        :param start_year: Earliest year of data to include.
+        :param end_year: Latest year of data to include.
+        :param cells: dict of {(Series ID, year) : list of observations}.
+        :returns: :class:`BLSResponse`. Series without any observations are left out.
+        """
+        series_list = []
+        for s in series:
+            data = [
+                point
+                for y in range(end_year, start_year - 1, -1)
+                for point in cells.get((s, y), [])
+            ]
+            if data:
+                series_list.append({'seriesID' : s, 'data' : data})
+        return BLSResponse.from_series(series_list)
+
+    @timed('tablefy')
     def _tablefy(self, json_data, shape, keep_footnotes):
         """Turns the results of a request to the BLS API into a pandas DataFrame.
         
-        :param json_data: ``Response.content`` that contains BLS data as a json string.
+        The observations of every series are walked through once and collected into flat columns,
+        which become a ``'long'`` DataFrame in a single step, or are scattered straight into a
+        ``'wide'`` DataFrame by :meth:`_wide()`. This keeps the cost linear in the number of series.
+        
+        :param json_data: :class:`BLSResponse`, or ``Response.content`` that contains BLS data as
+                          a json string.
         :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
         :param keep_footnotes: If True, keeps the Footnotes field from the data. Otherwise this
-                               field is dropped. keep_footnotes cannot be 
+                               field is dropped. keep_footnotes cannot be used with more than 1
+                               series in ``'wide'`` format.
         :returns: pandas DataFrame.
         """
+        if not isinstance(json_data, BLSResponse):
+            json_data = BLSResponse.decode(json_data)
+        series_list = json_data.series
         
-        # set up blank df
-        cols = ['year', 'period', 'periodName']
-        if shape == 'long':
-            cols = ['seriesID'] + cols
+        # collect all observations into flat columns
+        cols = ['year', 'period', 'periodName', 'value']
         if keep_footnotes:
             cols.append('footnotes')
-        df = pd.DataFrame(columns=cols)
-        
-        # add data to the df
-        series_list = json.loads(json_data)['Results']['series']
+        columns = {c : [] for c in cols}
+        getters = [(columns[c].extend, itemgetter(c)) for c in cols]
+        series_ids = []
         for bls_series in series_list:
-            small_df = pd.DataFrame(bls_series['data'])
-            if shape == 'long':
-                small_df['seriesID'] = bls_series['seriesID']
-            small_df = small_df[cols + ['value']] #reorders cols + drops footnotes if needed
-            small_df['value'] = pd.to_numeric(small_df['value'])
-            small_df['year'] = pd.to_numeric(small_df['year'])
-                
-            if shape == 'wide':
-                small_df = small_df \
-                    .rename(columns={'value' : bls_series['seriesID']})
-                if keep_footnotes:
-                    df = small_df
-                else:
-                    df = df.merge(right=small_df,
-                                  on=['year', 'period', 'periodName'],
-                                  how='outer')
-            elif shape == 'long':
-                df = df.append(small_df, sort=False)
-        
-        # clean up columns
-        if not keep_footnotes:
-            df = df[[c for c in df.columns if c.lower()[:9] != 'footnotes']]
-        df = df[[c for c in df.columns if c.lower()[:6] != 'latest']]
+            data = bls_series['data']
+            for extend, get in getters:
+                extend(map(get, data))
+            series_ids.extend([bls_series['seriesID']] * len(data))
+        columns['year'] = np.array(columns['year'], dtype='int64')
+        columns['value'] = self._to_float(columns['value'])
+        if shape == 'wide' and not keep_footnotes:
+            return self._wide([i['seriesID'] for i in series_list], series_ids, columns['year'],
+                              columns['period'], columns['periodName'], columns['value'])
+        df = pd.DataFrame({'seriesID' : series_ids, **columns}, columns=['seriesID'] + cols)
         
+        return self._reshape(df, [i['seriesID'] for i in series_list], shape, keep_footnotes)
+    
+    def _to_float(self, values):
+        """Parses a list of value strings into a float64 array. Values that are not numbers (e.g.
+        ``'-'`` for data that is not available) become NaN.
+        """
+        try:
+            return np.array(values, dtype='float64')
+        except ValueError:
+            return pd.to_numeric(values, errors='coerce').astype('float64')
+    
+    def _reshape(self, df, series, shape, keep_footnotes):
+        """Reshapes a ``'long'`` DataFrame of BLS data into ``shape``.
+        
+        :param df: ``'long'`` pandas DataFrame with BLS data.
+        :param series: List of Series ID's, in the order of the columns of a ``'wide'`` DataFrame.
+        :param shape: ``'wide'`` or ``'long'``.
+        :param keep_footnotes: Whether ``df`` has a footnotes column.
+        :returns: pandas DataFrame.
+        """
+        if shape == 'long':
+            return df
+        if keep_footnotes:
+            return df[['year', 'period', 'periodName', 'footnotes', 'value']] \
+                .rename(columns={'value' : series[0] if series else 'value'})
+        return self._wide(series, df['seriesID'], df['year'], df['period'], df['periodName'],
+                          df['value'])
+    
+    def _wide(self, series, series_ids, year, period, period_name, value):
+        """Builds a ``'wide'`` DataFrame straight from flat columns of observations.
+        
+        Each distinct (year, period) is numbered in chronological order, and each Series ID by its
+        position in ``series``. The values are then scattered into a single preallocated
+        (time x series) array, which becomes the DataFrame without being copied again. Rows and
+        columns are in order by construction, so there is no pivot, sort or reindexing.
+        
+        :param series: List of Series ID's, in the order of the columns. Series without any
+                       observations are left out.
+        :param series_ids: Array-like of the Series ID of each observation.
+        :param year: Array-like of the year of each observation.
+        :param period: Array-like of the period code of each observation.
+        :param period_name: Array-like of the period name of each observation.
+        :param value: Array-like of the float value of each observation.
+        :returns: pandas DataFrame.
+        """
+        year = np.asarray(year, dtype='int64')
+        period = np.asarray(period, dtype=object)
+        
+        # number each distinct (year, period) in chronological order, with ties between unknown
+        # period codes broken lexically; only the distinct times have to be sorted
+        codes, uniques = pd.factorize(period, sort=True)
+        pairs, _ = pd.factorize(year * max(len(uniques), 1) + codes)
+        first = np.empty(pairs.max() + 1 if len(pairs) else 0, dtype='int64')
+        first[pairs[::-1]] = np.arange(len(pairs) - 1, -1, -1)
+        order = np.lexsort((codes[first], period_sort_key(year[first], period[first])))
+        rank = np.empty(len(order), dtype='int64')
+        rank[order] = np.arange(len(order))
+        times, first = rank[pairs], first[order]
+        
+        # number the series by column, leaving out series without observations
+        names = pd.Index(list(dict.fromkeys(series)), dtype=object)
+        ids, _ = self._factorize_series(np.asarray(series_ids, dtype=object), names)
+        found = ids >= 0
+        present = np.flatnonzero(np.bincount(ids[found], minlength=len(names)))
+        column = np.full(len(names), -1)
+        column[present] = np.arange(len(present))
+        
+        panel = np.full((len(first), len(present)), np.nan)
+        panel[times[found], column[ids[found]]] = np.asarray(value, dtype='float64')[found]
+        df = pd.DataFrame(panel, columns=names[present].tolist(), copy=False)
+        df.insert(0, 'periodName', np.asarray(period_name, dtype=object)[first])
+        df.insert(0, 'period', period[first])
+        df.insert(0, 'year', year[first])
         return df
     
+    @timed('cleanup')
     def _cleanup_df(self, df, shape):
         """Handles the clean-up after the Pandas dataframes are all put together.
         
         :param df: pandas DataFrame with BLS data.
         :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
         :returns: pandas DataFrame.
-        """    
+        """
+        # Sorts periods chronologically (e.g. M13 and Q04 after M12) on an integer key, instead of
+        # lexically on the period strings.
+        key = period_sort_key(df['year'], df['period'])
         if shape == 'wide':
-            df = df.sort_values(by=['year', 'period'])
+            order = np.argsort(key, kind='stable')
+        if shape == 'long':
+            order = np.lexsort((key, pd.factorize(df['seriesID'], sort=True)[0]))
+        # frames built by _wide() are already in order, and are returned without a copy
+        if (np.diff(order) == 1).all() and df.index.equals(pd.RangeIndex(len(df))):
+            return df
+        return df.iloc[order].reset_index(drop=True)
+    
+    @timed('time_index')
+    def _time_index(self, df, shape, time_index):
+        """Replaces the ``year``, ``period`` and ``periodName`` columns with a time index named
+        ``'date'``. In ``'long'`` format, the index is a MultiIndex of ``seriesID`` and ``date``.
+        
+        A ``PeriodIndex`` can only hold a single frequency, so ``time_index='period'`` raises a
+        ``ValueError`` for data that mixes e.g. monthly and annual periods (such as the ``M13``
+        annual averages some series come with). Use ``time_index='date'`` or ``groupby`` for those.
+        
+        :param df: pandas DataFrame with BLS data.
+        :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
+        :param time_index: ``'period'`` for a ``PeriodIndex``, or ``'date'`` for a
+                           ``DatetimeIndex``.
+        :returns: pandas DataFrame.
+        """
+        parse = to_period_index if time_index == 'period' else to_datetime
+        index = parse(df['year'], df['period']).rename('date')
         if shape == 'long':
-            df = df.sort_values(by=['seriesID', 'year', 'period'])
-        df = df.reset_index()
-        df = df[[c for c in df.columns if c != 'index']]
+            index = pd.MultiIndex.from_arrays([df['seriesID'], index])
+        df = df[[c for c in df.columns if c not in ['seriesID', 'year', 'period', 'periodName']]]
+        return df.set_axis(index, axis=0)
+    
+    @timed('compact')
+    def _compact(self, df, shape, value_dtype='float64'):
+        """Shrinks a DataFrame so that long panels take up a lot less memory. The repeated
+        ``seriesID`` and ``period`` strings become categoricals (i.e. small integer codes plus one
+        copy of each string), ``year`` becomes an int16, the values become ``value_dtype``, and
+        ``periodName`` is dropped since it only spells out ``period``.
+        
+        In ``'long'`` format, this takes an observation from roughly 200 bytes (with the strings
+        stored as Python objects) down to 12 bytes, or 8 bytes with ``value_dtype='float32'``, plus
+        one copy of each Series ID and period.
+        
+        :param df: pandas DataFrame with BLS data.
+        :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
+        :param value_dtype: dtype of the values, e.g. ``'float32'``.
+        :returns: pandas DataFrame.
+        """
+        df = df[[c for c in df.columns if c != 'periodName']].copy()
+        df['year'] = df['year'].astype('int16')
+        df['period'] = df['period'].astype('category')
+        if shape == 'wide':
+            series = [c for c in df.columns if c not in ['year', 'period', 'footnotes']]
+            df[series] = df[series].astype(value_dtype)
+        if shape == 'long':
+            df['seriesID'] = df['seriesID'].astype('category')
+            df['value'] = df['value'].astype(value_dtype)
         return df
     
-    def _group(self, df, series, shape, groupby, groupby_method):
-        """Handles the aggregation by a specific time period.
+    @timed('interpolate')
+    def _interpolate(self, df, shape, method):
+        """Fills in missing values with ``df.interpolate()``.
+        
+        In ``'long'`` format, each series' rows are numbered in time order and the values are
+        scattered into a temporary (row of the series x series) array, so that every series is
+        interpolated over its own rows only, in a single call, and then gathered back into the rows
+        they came from. Periods of other series (e.g. another frequency, or ``M13``) do not count
+        as steps. This costs about the same as interpolating a ``'wide'`` DataFrame.
         
+        :param df: pandas DataFrame with BLS data.
+        :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
+        :param method: Passed to ``df.interpolate()``.
         :returns: pandas DataFrame.
         """
+        if shape == 'wide':
+            keys = [c for c in df.columns if c in ['year', 'period', 'periodName', 'footnotes']]
+            cols = [c for c in df.columns if c not in keys]
+            df = pd.concat([df[keys], df[cols].interpolate(method=method)], axis=1)[list(df.columns)]
+        if shape == 'long':
+            df = df.copy()
+            ids, id_names = self._factorize_series(df['seriesID'].values)
+            order = np.lexsort((period_sort_key(df['year'], df['period']), ids))
+            counts = np.bincount(ids, minlength=len(id_names))
+            rows = np.empty(len(ids), dtype='int64')
+            rows[order] = np.arange(len(ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+            panel = np.full((counts.max(initial=0), len(id_names)), np.nan)
+            panel[rows, ids] = df['value'].to_numpy(dtype='float64')
+            panel = pd.DataFrame(panel).interpolate(method=method).to_numpy()
+            df['value'] = panel[rows, ids]
+        return df
+    
+    def _factorize_series(self, series_ids, names=None):
+        """Numbers the Series ID's of a long DataFrame, like ``pd.factorize(sort=True)``. Rows of the
+        same series are usually next to each other, so only the first row of each run of a Series
+        ID has to be looked up.
+        
+        Pass a column as ``df['seriesID'].values`` rather than ``.to_numpy()``, which copies a
+        string column into Python strings. Neighbouring rows are compared in whatever array the
+        column has, and only the first Series ID of each run is converted.
+        
+        :param series_ids: numpy array or pandas string array of Series ID's.
+        :param names: ``pandas.Index`` of unique Series ID's to number the rows by, instead of the
+                      sorted unique Series ID's. Series ID's that are not in it get -1.
+        :returns: (numpy array of codes, numpy array of sorted unique Series ID's, or ``names``)
+        """
+        new_run = np.ones(len(series_ids), dtype=bool)
+        new_run[1:] = np.asarray(series_ids[1:] != series_ids[:-1], dtype=bool)
+        starts = np.flatnonzero(new_run)
+        first = np.asarray(series_ids.take(starts), dtype=object)
+        if names is None:
+            runs, names = pd.factorize(first, sort=True)
+        else:
+            runs = names.get_indexer(first)
+        return np.repeat(runs, np.diff(np.r_[starts, len(series_ids)])), names
+    
+    @timed('group')
+    def _group(self, df, series, shape, groupby, groupby_method):
+        """Collapses the data to a lower frequency, e.g. monthly data to quarters.
         
-        # create new period in a dataframe
-        groupby = groupby.upper()
-        groupby = 'A' if groupby == 'Y' else groupby
+        Each period is assigned to the quarter (or half, year, month) it falls in with integer
+        arithmetic on its start month, and each series is then aggregated over those groups. Periods
+        that are longer than the new frequency (e.g. ``M13`` annual averages when grouping by
+        quarter) cannot be split up and are dropped. When a series has periods of different lengths
+        in the same group (e.g. monthly data plus the ``M13`` annual average when grouping by year),
+        only the shortest periods are aggregated so that nothing is counted twice.
         
-        ts = pd.DataFrame()
-        ts['A'] = pd.Series(['A01' for i in range(12)])
-        ts['S'] = pd.Series([i//6 + 1 for i in range(12)]).apply(lambda i : 'S'+str(i).zfill(2))
-        ts['Q'] = pd.Series([i//3 + 1 for i in range(12)]).apply(lambda i : 'Q'+str(i).zfill(2))
-        ts['M'] = pd.Series([i+1 for i in range(12)]).apply(lambda i : 'M'+str(i).zfill(2))
+        Every (series, group) gets a dense integer key, and the rows of each key, which are already
+        next to each other in data sorted by series and time, are aggregated in a single pass. See
+        :meth:`_aggregate()`.
         
-        series1 = pd.concat([ts['A'], ts['S'], ts['Q'], ts['M']], axis=0)
-        series1 = series1.rename('old_period')
-        series2 = pd.concat([ts[groupby], ts[groupby], ts[groupby], ts[groupby]], axis=0)
-        series2 = series2.rename('new_period')
+        :param df: pandas DataFrame with BLS data.
+        :param series: List of Series ID's, which are the value columns in ``'wide'`` format. If
+                       ``None``, every column other than the time columns is a value column.
+        :param shape: ``'wide'`` or ``'long'`` that defines the DataFrame's shape.
+        :param groupby: ``'y'`` (or ``'a'``), ``'s'``, ``'q'`` or ``'m'``.
+        :param groupby_method: How to aggregate each group, e.g. ``'mean'``, ``'first'``,
+                               ``'last'``, ``'min'``, ``'max'`` or ``'sum'``.
+        :returns: pandas DataFrame.
+        """
         
-        gb_df = pd.concat([series1, series2], axis=1)
+        # number each group: year * groups per year + group within the year
+        freq = 'A' if groupby.upper() == 'Y' else groupby.upper()
+        n = FREQ_MONTHS[freq]
+        per_year = 12 // n
+        codes = period_index(df['period'])
+        months = period_months(codes)
+        keep = months <= n
+        if keep.all():
+            keep = slice(None) # saves copying every column
+        months = months[keep]
+        group = df['year'].to_numpy(dtype='int64')[keep] * per_year \
+            + (period_start_month(codes)[keep] - 1) // n
+        first = group.min() if len(group) else 0
+        span = group.max() - first + 1 if len(group) else 1
         
-        # add it to the BLS data
-        df = df.merge(right=gb_df, how='left', left_on='period', right_on='old_period')
+        # one dense integer key per series and group
         if shape == 'wide':
-            gb_li = ['year', 'new_period']
-            li = gb_li + series
+            if series is None:
+                series = [c for c in df.columns
+                          if c not in ['year', 'period', 'periodName', 'footnotes']]
+            columns = set(df.columns)
+            cols = [s for s in series if s in columns]
+            values = df[cols].to_numpy(dtype='float64')[keep]
+            key = group - first
         if shape == 'long':
-            gb_li = ['seriesID', 'year', 'new_period']
-            li = ['seriesID', 'year', 'new_period', 'value']
-        df = df.groupby(gb_li).agg(groupby_method).reset_index()
-        df = df[li].rename(columns={'new_period' : 'period'})
-        df = self._cleanup_df(df, shape)
+            cols = ['value']
+            values = df[cols].to_numpy(dtype='float64')[keep]
+            ids, id_names = self._factorize_series(df['seriesID'].values)
+            key = ids[keep] * span + group - first
+        
+        # put the rows of each key next to each other
+        if (key[1:] < key[:-1]).any():
+            order = np.argsort(key, kind='stable')
+            key, values, months = key[order], values[order], months[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else key
         
-        return df
\ No newline at end of file
+        # only keep the shortest periods with data in each group
+        if len(months) and months.min() != months.max():
+            lengths = np.where(np.isnan(values), 13, months[:, None])
+            shortest = np.minimum.reduceat(lengths, starts, axis=0)
+            shortest = np.repeat(shortest, np.diff(np.r_[starts, len(key)]), axis=0)
+            values = np.where(shortest == months[:, None], values, np.nan)
+        
+        # aggregate
+        values = self._aggregate(values, starts, groupby_method)
+        key = key[starts]
+        group = key % span + first
+        df = pd.DataFrame(values, columns=cols)
+        # take the labels from an Index of the unique ones, which keeps pandas' string dtype
+        labels = pd.Index(period_codes(freq, np.arange(1, per_year + 1)))
+        df.insert(0, 'period', labels[group % per_year])
+        df.insert(0, 'year', group // per_year)
+        if shape == 'long':
+            df.insert(0, 'seriesID', pd.Index(id_names)[key // span])
+        
+        return df
+    
+    def _aggregate(self, values, starts, method):
+        """Aggregates runs of rows, skipping NaN like pandas does. Groups without data are NaN.
+        
+        A single column (``'long'`` data, with a run for each series and group) is aggregated with
+        numpy ``reduceat`` over the runs for ``'mean'``, ``'sum'``, ``'min'``, ``'max'``,
+        ``'first'`` and ``'last'``, so that the keys of millions of rows are never hashed. Many
+        columns (``'wide'`` data, with only a few hundred runs) and other methods go through
+        ``DataFrame.groupby().agg()``, whose kernels are faster than ``reduceat`` over 2D arrays.
+        
+        :param values: 2D float64 numpy array.
+        :param starts: numpy array of the first row of each run, in order.
+        :param method: How to aggregate each run, e.g. ``'mean'``.
+        :returns: 2D float64 numpy array with a row for each run.
+        """
+        if not len(starts):
+            return np.empty((0, values.shape[1]))
+        if values.shape[1] != 1 or method not in ['mean', 'sum', 'min', 'max', 'first', 'last']:
+            runs = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(values)]))
+            grouped = pd.DataFrame(values).groupby(runs)
+            if method == 'sum':
+                return grouped.sum(min_count=1).to_numpy(dtype='float64')
+            return grouped.agg(method).to_numpy(dtype='float64')
+        values = values[:, 0]
+        missing = np.isnan(values)
+        if method in ['mean', 'sum']:
+            total = np.add.reduceat(np.where(missing, 0, values), starts)
+            count = np.add.reduceat(~missing, starts)
+            if method == 'mean':
+                total /= np.maximum(count, 1)
+            values = np.where(count > 0, total, np.nan)
+        elif method in ['min', 'max']:
+            values = (np.fmin if method == 'min' else np.fmax).reduceat(values, starts)
+        else:
+            # runs without data point at a NaN after the last row (-1 also picks it)
+            rows = np.arange(len(values))
+            if method == 'first':
+                rows = np.minimum.reduceat(np.where(missing, len(values), rows), starts)
+            else:
+                rows = np.maximum.reduceat(np.where(missing, -1, rows), starts)
+            values = np.append(values, np.nan)[rows]
+        return values[:, None]
\ No newline at end of file
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+# Use a faster json library if one is installed. orjson and ujson both decode to the same Python
+# objects as the json module, so nothing downstream needs to know which one is used.
+try:
+    import orjson
+    loads = orjson.loads
+    dumps = orjson.dumps
+except ImportError:
+    try:
+        import ujson
+        loads = ujson.loads
+        dumps = lambda obj: ujson.dumps(obj).encode()
+    except ImportError:
+        loads = json.loads
+        dumps = lambda obj: json.dumps(obj).encode()
+
+
+class BLSResponse(object):
+    """A response from the BLS API, decoded exactly once. Every step that needs something from the
+    response (error checking, logging, :meth:`RequestBLS._tablefy()`, the catalog) reads it from
+    here instead of decoding the response again.
+
+    :param data: The decoded json of the response.
+    :param nbytes: Size of the response body in bytes.
+    :attr status: Status of the request, e.g. ``'REQUEST_SUCCEEDED'``.
+    :attr messages: List of messages returned with the request.
+    :attr series: List of series in the response, each a dict with ``'seriesID'`` and ``'data'``
+                  (and ``'catalog'``, if it was requested).
+    :attr catalog: dict of {Series ID : catalog} for the series that came with a catalog.
+    """
+
+    def __init__(self, data:dict, nbytes:int=0):
+        self.data = data
+        self.nbytes = nbytes
+        self.status = data.get('status')
+        self.messages = data.get('message') or []
+        self.series = (data.get('Results') or {}).get('series') or []
+        self.catalog = {s['seriesID'] : s['catalog'] for s in self.series if s.get('catalog')}
+
+    @classmethod
+    def decode(cls, content):
+        """Decodes the body of a response.
+
+        :param content: ``Response.content`` json string.
+        :returns: :class:`BLSResponse`
+        """
+        return cls(loads(content), nbytes=len(content))
+
+    @classmethod
+    def from_series(cls, series_list:list):
+        """Builds a response out of a list of series that were put together locally, e.g. from the
+        cache.
+
+        :param series_list: List of dicts with ``'seriesID'`` and ``'data'``.
+        :returns: :class:`BLSResponse`
+        """
+        return cls({'status' : 'REQUEST_SUCCEEDED', 'message' : [],
+                    'Results' : {'series' : series_list}})
+
+    @property
+    def succeeded(self):
+        return self.status == 'REQUEST_SUCCEEDED'
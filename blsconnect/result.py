@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+from .response import dumps
+
+# pyarrow is optional, and only needed for SeriesResult.to_arrow().
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+class SeriesResult(object):
+    """The data of a :meth:`RequestBLS.series()` call with ``lazy=True``, held once in compact
+    columns and only turned into a DataFrame when a view of it is asked for: :meth:`long()`,
+    :meth:`wide()`, :meth:`footnotes()` or :meth:`to_arrow()`. The views take the same
+    transformations as :meth:`RequestBLS.series()`, so a single pull can serve e.g. a long
+    DataFrame, a wide one and a quarterly one without requesting or parsing the data again.
+
+    Each view is built the first time it is asked for and remembered, so asking for it again
+    returns the same DataFrame. Copy it before changing it in place.
+
+    The views are built by the client that pulled the data, and their timings are added to the
+    client's ``stats``.
+
+    :param client: :class:`RequestBLS` that pulled the data.
+    :param df: ``'long'`` DataFrame with footnotes, in the order :meth:`RequestBLS.series()`
+               returns it.
+    :param series: List of Series ID's that were requested, in the order of the columns of
+                   :meth:`wide()`. ``None`` takes the Series ID's in ``df``.
+    :param start_year: Earliest year that was requested.
+    :param end_year: Latest year that was requested.
+    """
+
+    def __init__(self, client, df, series, start_year:int=None, end_year:int=None):
+        self._client = client
+        self.series = list(pd.unique(df['seriesID'])) if series is None else list(series)
+        self.start_year = start_year
+        self.end_year = end_year
+        self._names = pd.Index(self.series, dtype=object)
+        self._series_codes, _ = client._factorize_series(df['seriesID'].values,
+                                                         self._names)
+        self._year = df['year'].to_numpy(dtype='int16')
+        self._period = pd.Categorical(df['period'].to_numpy(dtype=object))
+        self._period_name = pd.Categorical(df['periodName'].to_numpy(dtype=object))
+        self._value = df['value'].to_numpy(dtype='float64')
+        self._footnotes = df['footnotes'].to_numpy(dtype=object)
+        self._views = {}
+
+    def long(self, keep_footnotes:bool=False, interpolate:str=None, groupby:str=None,
+             groupby_method:str='mean', compact:bool=False, value_dtype:str='float64',
+             time_index:str=None):
+        """Returns the data in ``'long'`` format. See :meth:`RequestBLS.series()` for the kwargs.
+
+        :returns: DataFrame
+        """
+        return self._view('long', keep_footnotes, interpolate, groupby, groupby_method, compact,
+                          value_dtype, time_index)
+
+    def wide(self, keep_footnotes:bool=False, interpolate:str=None, groupby:str=None,
+             groupby_method:str='mean', compact:bool=False, value_dtype:str='float64',
+             time_index:str=None):
+        """Returns the data in ``'wide'`` format. See :meth:`RequestBLS.series()` for the kwargs.
+
+        :returns: DataFrame
+        """
+        return self._view('wide', keep_footnotes, interpolate, groupby, groupby_method, compact,
+                          value_dtype, time_index)
+
+    def footnotes(self):
+        """Returns the observations that have footnotes.
+
+        :returns: ``'long'`` DataFrame with a footnotes column.
+        """
+        if ('footnotes',) not in self._views:
+            has_footnotes = np.fromiter((any(f) for f in self._footnotes), dtype=bool,
+                                        count=len(self._footnotes))
+            df = self.long(keep_footnotes=True)
+            self._views[('footnotes',)] = df[has_footnotes].reset_index(drop=True)
+        return self._views[('footnotes',)]
+
+    def to_arrow(self, keep_footnotes:bool=False):
+        """Returns the data as a ``pyarrow.Table`` in ``'long'`` format. The Series ID's and
+        periods are dictionary encoded, so they take up about as little memory as they do here.
+        Footnotes are json strings. Needs ``pyarrow``.
+
+        :param keep_footnotes: If True, keeps the footnotes column.
+        :returns: ``pyarrow.Table``
+        """
+        if pa is None:
+            raise ImportError('to_arrow() needs pyarrow. Install it with '
+                              '"pip install blsconnect[parquet]".')
+        key = ('arrow', keep_footnotes)
+        if key not in self._views:
+            columns = {
+                'seriesID' : pa.DictionaryArray.from_arrays(
+                    self._series_codes.astype('int32'), pa.array(self.series, pa.string())
+                ),
+                'year' : pa.array(self._year.astype('int64')),
+                'period' : self._dictionary(self._period),
+                'periodName' : self._dictionary(self._period_name),
+                'value' : pa.array(self._value)
+            }
+            if keep_footnotes:
+                columns['footnotes'] = pa.array([dumps(f).decode() for f in self._footnotes],
+                                                pa.string())
+            self._views[key] = pa.table(columns)
+        return self._views[key]
+
+    def _view(self, shape, keep_footnotes, interpolate, groupby, groupby_method, compact,
+              value_dtype, time_index):
+        """Builds a view with :class:`RequestBLS`'s own methods, the same way
+        :meth:`RequestBLS.series()` does, and remembers it.
+        """
+        key = (shape, keep_footnotes, interpolate, groupby, groupby_method, compact, value_dtype,
+               time_index)
+        if key in self._views:
+            return self._views[key]
+        client = self._client
+        client._check_kwargs(shape, interpolate, groupby, time_index)
+        client._input_handler(self.series, self.start_year, self.end_year, shape, keep_footnotes)
+        if interpolate or groupby or compact or time_index:
+            df = self._view(shape, keep_footnotes, None, None, 'mean', False, 'float64', None)
+        elif shape == 'wide' and not keep_footnotes:
+            df = client._wide(self.series, self._names.take(self._series_codes), self._year,
+                              np.asarray(self._period), np.asarray(self._period_name),
+                              self._value)
+        elif shape == 'wide':
+            df = client._reshape(self.long(keep_footnotes=True), self.series, shape,
+                                 keep_footnotes)
+        else:
+            df = self._frame(keep_footnotes)
+        df = client._cleanup_df(df, shape)
+        df = client._transform(df, self.series, shape, interpolate, groupby, groupby_method,
+                               compact, value_dtype, time_index)
+        self._views[key] = df
+        return df
+
+    def _frame(self, keep_footnotes):
+        """Puts the columns back into a ``'long'`` DataFrame."""
+        df = pd.DataFrame({
+            'seriesID' : self._names.take(self._series_codes).to_numpy(),
+            'year' : self._year.astype('int64'),
+            'period' : np.asarray(self._period),
+            'periodName' : np.asarray(self._period_name),
+            'value' : self._value
+        })
+        if keep_footnotes:
+            df['footnotes'] = self._footnotes
+        return df
+
+    def _dictionary(self, categorical):
+        return pa.DictionaryArray.from_arrays(
+            categorical.codes.astype('int32'),
+            pa.array(np.asarray(categorical.categories, dtype=object), pa.string())
+        )
+
+    def __len__(self):
+        return len(self._value)
+
+    def __repr__(self):
+        return (f'<SeriesResult series={len(self.series)} observations={len(self)} '
+                f'years={self.start_year}-{self.end_year}>')
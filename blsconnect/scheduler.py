@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import random
+import threading
+import time
+
+# API limits:
+# https://www.bls.gov/developers/api_faqs.htm
+#
+# Registered users get 500 queries per day, unregistered users get 25. Both are limited to 50
+# requests per 10 seconds.
+
+DAILY_LIMIT_WITH_KEY = 500
+DAILY_LIMIT_WITHOUT_KEY = 25
+
+# HTTP status codes that are worth retrying.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class RequestScheduler(object):
+    """Paces the requests sent to the BLS API and decides how failed requests are retried.
+
+    Requests are paced with a token bucket that allows ``rate`` requests per ``period`` seconds.
+    Requests are also counted against ``daily_limit``, so that a large job can find out how many
+    queries it has left (see :attr:`remaining`) instead of running into the limit halfway through.
+    The daily limit is not paced: a call that needs more requests than are left for the day raises
+    an ``InputError`` before sending any of them, rather than waiting for the next day.
+    Failed requests are retried up to ``max_retries`` times, waiting exponentially longer (with
+    random jitter) after each attempt.
+
+    A single scheduler can be shared by several :class:`RequestBLS` instances that use the same key.
+
+    :param max_retries: Number of times to retry a failed request.
+    :param backoff: Seconds to wait before the first retry. This doubles with each retry.
+    :param max_backoff: Maximum seconds to wait before a retry.
+    :param rate: Number of requests allowed per ``period``.
+    :param period: Length of the rate limit's window in seconds.
+    :param daily_limit: Number of requests allowed per day. ``None`` means no limit.
+    """
+
+    def __init__(self, max_retries:int=3, backoff:float=1.0, max_backoff:float=60.0,
+                 rate:int=50, period:float=10.0, daily_limit:int=None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate = rate
+        self.period = period
+        self.daily_limit = daily_limit
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._day = datetime.date.today()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Reserves a request from the token bucket.
+
+        :returns: Seconds to wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate,
+                               self._tokens + (now - self._updated) * self.rate / self.period)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens * self.period / self.rate
+
+    def wait(self):
+        """Blocks until a request can be sent."""
+        delay = self.acquire()
+        if delay > 0:
+            time.sleep(delay)
+
+    def count(self):
+        """Counts a request that was sent against the daily limit."""
+        with self._lock:
+            self._reset_day()
+            self._count += 1
+
+    @property
+    def requests_today(self):
+        with self._lock:
+            self._reset_day()
+            return self._count
+
+    @property
+    def remaining(self):
+        """Number of requests left today, or ``None`` if there is no daily limit."""
+        if self.daily_limit is None:
+            return None
+        return max(self.daily_limit - self.requests_today, 0)
+
+    def _reset_day(self):
+        today = datetime.date.today()
+        if today != self._day:
+            self._day = today
+            self._count = 0
+
+    def backoff_delay(self, attempt:int):
+        """Seconds to wait before retrying a request that failed ``attempt + 1`` times. The delay
+        doubles with each attempt, up to ``max_backoff``, and is randomized between half and all of
+        that so that concurrent requests do not retry in lockstep.
+        """
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def retry_status(self, status_code:int):
+        """Whether a request that got this HTTP status code is worth retrying."""
+        return status_code in RETRY_STATUS_CODES
+
+    def throttled(self, r):
+        """Whether the BLS API turned a request down for going over its rate limit (as opposed to
+        the daily limit, which retrying does not help with).
+
+        :param r: :class:`BLSResponse`
+        """
+        return r.status == 'REQUEST_NOT_PROCESSED' and any(
+            'threshold' in msg and 'daily' not in msg for msg in r.messages
+        )
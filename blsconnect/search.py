@@ -1,10 +1,18 @@
+import itertools
+from functools import lru_cache
 from .data import *
-            
+from .request import InputError
+
+# Bound str.format of each template, so that each template is looked up and bound only once.
+TEMPLATES = {geo : {k : v.format for k, v in d.items()} for geo, d in FORMAT_STRING.items()}
+
+RETURN_TYPES = ['short', 'full', 'list', 'generator']
+
 def bls_search(return_type='short', **kwargs):
     """Takes some kwargs and returns BLS Series IDs.
     
-    To see how the Series ID is determined for each set of inputs, check out the nested function,
-    :meth:`_single_series_search()`.
+    To see how the Series ID is determined for each set of inputs, check out
+    :func:`_single_series_search()`.
     
     The outer function's purpose is to set up the queries that are run individually, and handle the
     output. This function lets you submit kwargs as either single values or lists of values, and
@@ -22,99 +30,66 @@ def bls_search(return_type='short', **kwargs):
         whether or not it was iterated over.
     - ``return_type='list'`` : Only returns the list of Series ID's without a way to identify which
         is which.
+    - ``return_type='generator'`` : Like ``'list'``, but yields the Series ID's one at a time
+        instead of building the list, so that large searches can be passed straight to
+        :meth:`RequestBLS.series()`.
     
     :param return_type: Specifies how the data will be returned. See docstring for descriptions of
                         the valid options.
-    :returns: {tuple of tuples : str}, and sometimes [str]
+    :returns: {tuple of tuples : str}, and sometimes [str] or a generator of str
     
     """
-    def _single_series_search(data:str=None, state:str=None, msa:str=None, region:str=None, sa:bool=None, sizeclass:str=None):
-        fips = _state_to_fips(state)
-        geo = 'state' if fips!='00' else 'us'
-        if data[:3] == 'cpi' and (region or sizeclass):
-                sa = False #should possibly warn user that seasonal adjustments are invalid for this data.
-        if geo == 'state' or data[:3] == 'cpi':
-            seas = 'S' if (sa or sa is None) else 'U'
-        elif geo == 'us':
-            seas = 'S1' if (sa or sa is None) else 'U0'
-        if len(data) > 3 and data[:3] == 'cpi':
-            less = _cpi_less(data)
-        else:
-            less = ''
-        region = CPI_REGION[region]
-        sizeclass = SIZE_CLASS[sizeclass]
-        data_id = _find_data_series(data=data, geo=geo)
-        return data_id.format(seas=seas, fips=fips, region=region, less=less, sizeclass=sizeclass)
-    
-    transform = lambda d: tuple(sorted(d.items()))
-    li = expand_dict_lists(kwargs)
-    
+    if return_type not in RETURN_TYPES:
+        raise InputError(f'return_type kwarg must be one of {RETURN_TYPES}.')
+
+    lists = {k : v for k, v in kwargs.items() if isinstance(v, list)}
+    constants = {k : v for k, v in kwargs.items() if k not in lists}
+    combos = (dict(zip(lists, values)) for values in itertools.product(*lists.values()))
+
+    if return_type == 'generator':
+        return (_single_series_search(**constants, **i) for i in combos)
     if return_type == 'list':
-        return [_single_series_search(**i) for i in li]
-    if isinstance(li, dict): # occurs when there are no iterable kwargs
-        return {transform(li) : _single_series_search(**li)}
+        return [_single_series_search(**constants, **i) for i in combos]
+    if not lists: # no iterable kwargs
+        return {_transform(kwargs) : _single_series_search(**kwargs)}
     if return_type == 'short':
-        constants, iterables = split_dict_lists(li)
-        return {transform(i) : _single_series_search(**constants, **i) for i in iterables}
+        varying = [k for k, v in lists.items() if len(set(v)) > 1]
+        return {
+            tuple(sorted((k, i[k]) for k in varying)) : _single_series_search(**constants, **i)
+            for i in combos
+        }
     if return_type == 'full':
-        return {transform(i) : _single_series_search(**i) for i in li}
+        return {
+            _transform({**constants, **i}) : _single_series_search(**constants, **i)
+            for i in combos
+        }
 
-def expand_dict_lists(d):
-    """Neat little function that expands every list in a dict. So instead of having one dict with
-    a list of 5 things + a list of 3 things, you get a list of 5x3=15 dicts with each dict
-    representing each possible permutation of things.
-    
-    :param d: Dictionary that can contain some (or no) lists in the .values().
-    :returns: List of dictionaries with the lists in the .values() broken down.
+def _single_series_search(data:str=None, state:str=None, msa:str=None, region:str=None,
+                          sa:bool=None, sizeclass:str=None):
+    """Builds the Series ID for a single set of inputs. The lookups of each input are memoised, so
+    large searches only look up each state, data series and template once.
     """
-    def _flatten(big_li):
-        """Turns a list of lists into a single expanded list.
-        """
-        flat_list = []
-        for sub_li in big_li:
-            if isinstance(sub_li, list): # make sure we only iterate over lists
-                for item in sub_li:
-                    flat_list.append(item)
-            else:
-                flat_list.append(sub_li)
-        return flat_list
-    def _get_permutations(d):
-        """Recursively breaks down each list in the .values() of the dict until there are no more
-        lists to break down.
-        """
-        for key, val in d.items():
-            if isinstance(val, list):
-                return _flatten([
-                    _get_permutations(
-                        {**{key : i}, **{_k : _v for _k, _v in d.items() if _k != key}}
-                    )
-                    for i in val
-                ])
-        return d
-    return _get_permutations(d)
+    fips = _state_to_fips(state)
+    geo = 'state' if fips!='00' else 'us'
+    if data[:3] == 'cpi' and (region or sizeclass):
+            sa = False #should possibly warn user that seasonal adjustments are invalid for this data.
+    if geo == 'state' or data[:3] == 'cpi':
+        seas = 'S' if (sa or sa is None) else 'U'
+    elif geo == 'us':
+        seas = 'S1' if (sa or sa is None) else 'U0'
+    if len(data) > 3 and data[:3] == 'cpi':
+        less = _cpi_less(data)
+    else:
+        less = ''
+    region = CPI_REGION[region]
+    sizeclass = SIZE_CLASS[sizeclass]
+    template = _find_data_series(data=data, geo=geo)
+    return template(seas=seas, fips=fips, region=region, less=less, sizeclass=sizeclass)
 
-def split_dict_lists(li):
-    """Splits a list of dicts into: a dict with all constants, and a list of dicts where the values
-    vary across different dicts in the input list.
-    
-    :param li: List of dicts.
-    :returns: (dict, [dict])
-    """
-    def _all_same_values(li, key):
-        """See if all the dicts have the same value for a given key."""
-        check = None
-        for d in li:
-            if check is None:
-                check = d[key]
-            elif check != d[key]:
-               return False
-        return True
-    
-    constant_keys = {key : _all_same_values(li, key) for key in li[0].keys()}
-    constants = {k:v for k,v in li[0].items() if constant_keys[k]}
-    iterables = [{k:v for k,v in d.items() if not constant_keys[k]} for d in li]
-    return constants, iterables
+def _transform(d):
+    return tuple(sorted(d.items()))
 
+@lru_cache(maxsize=None)
 def _cpi_less(data):
     li = data.split("-")
     s = [CPI_EXCLUDE[i] for i in li]
@@ -123,6 +98,7 @@ def _cpi_less(data):
         raise InputError('Invalid series name.')
     return 'L' + ''.join(s)
 
+@lru_cache(maxsize=None)
 def _state_to_fips(state):
     """Takes a state input and returns a FIPS number for the state.
     """
@@ -132,7 +108,10 @@ def _state_to_fips(state):
         state = STATES_LONG_TO_SHORT[state.lower()]
     return str(STATE_TO_FIPS[state.upper()]).zfill(2)
 
+@lru_cache(maxsize=None)
 def _find_data_series(data=None, geo=None):
+    """Returns the bound ``str.format`` of the template for a data series. See :data:`TEMPLATES`.
+    """
     if data[:3] == 'cpi':
-        return FORMAT_STRING[geo][SERIES_NAME_DICT['cpi']]
-    return FORMAT_STRING[geo][SERIES_NAME_DICT[data.lower()]]
\ No newline at end of file
+        return TEMPLATES[geo][SERIES_NAME_DICT['cpi']]
+    return TEMPLATES[geo][SERIES_NAME_DICT[data.lower()]]
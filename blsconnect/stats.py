@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# Events that hooks can be registered for, see RequestStats.
+HOOK_EVENTS = ['stage', 'response', 'done']
+
+class RequestStats(object):
+    """Counters and timers of a single call to :meth:`RequestBLS.series()` (or
+    :meth:`RequestBLS.iter_series()` or :meth:`RequestBLS.refresh()`). After each call, the
+    instance's ``stats`` attribute holds the numbers of that call.
+
+    Stages that run for every request (``'wait'``, ``'network'`` and ``'decode'``) add up the time
+    of every request, so with ``max_workers`` above 1 they can add up to more than ``'total'``.
+
+    Hooks are called as the numbers come in, e.g. to export them as metrics. ``hooks`` is a dict of
+    {event : function or list of functions}, like the ``hooks`` of ``requests``:
+
+    - ``'stage'`` : Called with ``(stats, stage, seconds)`` each time a stage finishes.
+    - ``'response'`` : Called with ``(stats, info)`` for each response from the API, where
+      ``info`` is one of the dicts in :attr:`responses`.
+    - ``'done'`` : Called with ``(stats)`` once the call is done.
+
+    Hooks are always called on the thread that started the call, so they do not have to be
+    thread-safe. With ``max_workers`` above 1, requests run on worker threads. Their events are
+    queued and passed to the hooks when the call's thread collects each response, which can be a
+    little after the request finished.
+
+    :param hooks: dict of {event : function or list of functions}.
+    :attr timings: dict of {stage : seconds}. The stages are ``'total'``, ``'cache'``, ``'store'``,
+                   ``'read'`` (reading flat files), ``'wait'`` (waiting on the rate limit and
+                   between retries), ``'network'``, ``'decode'``, ``'tablefy'``, ``'cleanup'``,
+                   ``'interpolate'``, ``'group'``, ``'compact'`` and ``'time_index'``; stages that
+                   did not run are left out.
+    :attr requests: Number of requests sent to the API, including retries.
+    :attr retries: Number of requests that were retries.
+    :attr bytes: Number of bytes received from the API.
+    :attr series: Number of series in the responses from the API.
+    :attr observations: Number of observations in the responses from the API.
+    :attr cache_hits: Number of (Series ID, year) cells found in the cache.
+    :attr cache_misses: Number of (Series ID, year) cells looked up in the cache but not found.
+    :attr store_hits: Number of (Series ID, year) cells found in the store.
+    :attr store_misses: Number of (Series ID, year) cells looked up in the store but not found.
+    :attr responses: List of dicts, one for each response from the API, with the ``series_ids``,
+                     ``start_year`` and ``end_year`` that were requested, and the ``series``,
+                     ``observations``, ``bytes`` and ``seconds`` of the response.
+    """
+
+    COUNTERS = ['requests', 'retries', 'bytes', 'series', 'observations', 'cache_hits',
+                'cache_misses', 'store_hits', 'store_misses']
+
+    def __init__(self, hooks:dict=None):
+        hooks = hooks or {}
+        self.hooks = {e : h if isinstance(h, (list, tuple)) else [h] for e, h in hooks.items()}
+        self.timings = {}
+        self.responses = []
+        for counter in self.COUNTERS:
+            setattr(self, counter, 0)
+        self._lock = threading.Lock()
+        self._thread = threading.get_ident()
+        self._pending = deque()
+
+    @contextmanager
+    def timer(self, stage:str):
+        """Times a block of code and adds it to ``stage``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_time(self, stage:str, seconds:float):
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        self._dispatch('stage', stage, seconds)
+
+    def count(self, **counts):
+        """Adds to counters, e.g. ``stats.count(cache_hits=10)``."""
+        with self._lock:
+            for counter, n in counts.items():
+                setattr(self, counter, getattr(self, counter) + n)
+
+    def add_response(self, r, series_ids:list, start_year:int, end_year:int, seconds:float):
+        """Counts a response from the API.
+
+        :param r: :class:`blsconnect.response.BLSResponse`
+        :param series_ids: List of Series ID's that were requested.
+        :param start_year: Earliest year that was requested.
+        :param end_year: Latest year that was requested.
+        :param seconds: How long the request took, including retries.
+        """
+        info = {
+            'series_ids' : list(series_ids),
+            'start_year' : start_year,
+            'end_year' : end_year,
+            'series' : len(r.series),
+            'observations' : sum(len(s.get('data') or []) for s in r.series),
+            'bytes' : r.nbytes,
+            'seconds' : seconds
+        }
+        with self._lock:
+            self.responses.append(info)
+            self.bytes += info['bytes']
+            self.series += info['series']
+            self.observations += info['observations']
+        self._dispatch('response', info)
+
+    def done(self):
+        """Marks the call as done. Hooks of events that are still queued are called first."""
+        self._dispatch('done')
+
+    def to_dict(self):
+        """Returns the counters and timings as a flat dict, e.g. to export them as metrics."""
+        with self._lock:
+            d = {counter : getattr(self, counter) for counter in self.COUNTERS}
+            d.update({f'{stage}_seconds' : seconds for stage, seconds in self.timings.items()})
+        return d
+
+    def flush(self):
+        """Calls the hooks of the events that came in on other threads. Only does something on the
+        thread that started the call.
+        """
+        if threading.get_ident() != self._thread:
+            return
+        while self._pending:
+            event, args = self._pending.popleft()
+            for hook in self.hooks[event]:
+                hook(self, *args)
+
+    def _dispatch(self, event, *args):
+        if self.hooks.get(event):
+            self._pending.append((event, args))
+            self.flush()
+
+    def __repr__(self):
+        timings = ', '.join(f'{stage}={seconds:.3f}s' for stage, seconds in self.timings.items())
+        return (f'<RequestStats requests={self.requests} bytes={self.bytes} '
+                f'observations={self.observations} cache_hits={self.cache_hits} '
+                f'cache_misses={self.cache_misses} {timings}>')
+
+
+def timed(stage:str):
+    """Decorates a method of :class:`RequestBLS` so that its time is added to ``stage`` of
+    ``self.stats``.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.stats.timer(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
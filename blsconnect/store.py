@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import os
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from .periods import period_sort_key
+from .response import loads, dumps
+
+# pyarrow is optional, and only needed for ParquetStore.
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+class ParquetStore(object):
+    """Keeps pulled data on disk as a Parquet dataset, so that large panels can be read back a few
+    series and years at a time instead of loading (or pickling) the whole thing. Pass it to
+    :class:`RequestBLS` as ``store`` and :meth:`RequestBLS.series()` reads every (Series ID, year)
+    cell that is in the store from disk, and only requests the rest from the API.
+
+    The dataset is partitioned by survey (the first two letters of the Series ID) and year, e.g.
+    ``path/survey=LA/year=2019/part-0.parquet``, and each file is sorted by Series ID. Reads only
+    open the partitions of the requested surveys and years, skip the row groups that do not have
+    the requested series, and memory-map the files.
+
+    The catalogs of the series are kept in a ``_catalogs.json`` file next to the partitions, so
+    that calls that ask for the catalog do not have to request stored data again to get it.
+
+    Years the API has no data for are stored as well, so they are not requested again. Like
+    :class:`blsconnect.cache.ResponseCache`, data for the current year expires after ``ttl``
+    seconds, since that is the only data the BLS still revises; data for past years never expires.
+
+    Needs ``pyarrow``.
+
+    :param path: Directory of the dataset. It is created if it does not exist.
+    :param ttl: Seconds to keep data for the current year. ``None`` keeps it forever.
+    """
+
+    COLUMNS = ['seriesID', 'period', 'periodName', 'value', 'footnotes', 'stored']
+
+    # Files are sorted by Series ID, so small row groups let reads of a few series skip most of
+    # each file.
+    ROW_GROUP_SIZE = 8192
+
+    # File of the catalogs, which the dataset skips like every file that starts with '_' or '.'.
+    CATALOG_FILE = '_catalogs.json'
+
+    def __init__(self, path, ttl:float=3600):
+        if pa is None:
+            raise ImportError('ParquetStore needs pyarrow. Install it with '
+                              '"pip install blsconnect[parquet]".')
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._schema = pa.schema([
+            ('seriesID', pa.string()),
+            ('period', pa.string()),
+            ('periodName', pa.string()),
+            ('value', pa.float64()),
+            ('footnotes', pa.string()),
+            ('stored', pa.float64())
+        ])
+        self._partitioning = ds.partitioning(
+            pa.schema([('survey', pa.string()), ('year', pa.int64())]), flavor='hive'
+        )
+        os.makedirs(path, exist_ok=True)
+
+    def read(self, series, start_year:int=None, end_year:int=None, keep_footnotes:bool=False):
+        """Reads data from the store.
+
+        :param series: A single Series ID or a list of them.
+        :param start_year: Earliest year to read, or ``None``.
+        :param end_year: Latest year to read, or ``None``.
+        :param keep_footnotes: If True, keeps the footnotes column.
+        :returns: ``'long'`` DataFrame, like :meth:`RequestBLS.series()` returns.
+        """
+        series = [series] if isinstance(series, str) else list(series)
+        df, _ = self.load(series, start_year, end_year, keep_footnotes)
+        order = np.lexsort((period_sort_key(df['year'], df['period']),
+                            pd.factorize(df['seriesID'], sort=True)[0]))
+        return df.iloc[order].reset_index(drop=True)
+
+    def load(self, series, start_year:int=None, end_year:int=None, keep_footnotes:bool=False):
+        """Reads data from the store along with the cells it covers.
+
+        :param series: List of Series ID's.
+        :param start_year: Earliest year to read, or ``None``.
+        :param end_year: Latest year to read, or ``None``.
+        :param keep_footnotes: If True, keeps the footnotes column.
+        :returns: Tuple of (``'long'`` DataFrame, set of (Series ID, year) cells that are in the
+                  store, including years without data).
+        """
+        series = list(series)
+        where = ds.field('survey').isin(sorted({s[:2] for s in series})) \
+            & ds.field('seriesID').isin(series)
+        if start_year is not None:
+            where &= ds.field('year') >= int(start_year)
+        if end_year is not None:
+            where &= ds.field('year') <= int(end_year)
+        columns = ['seriesID', 'year', 'period', 'periodName', 'value', 'stored']
+        if keep_footnotes:
+            columns.append('footnotes')
+        with self._lock:
+            table = self._dataset().to_table(columns=columns, filter=where)
+
+        # current year data that is older than ttl is left out, as if it was not stored
+        if self.ttl is not None:
+            table = table.filter(pc.or_(
+                pc.less(table['year'], datetime.date.today().year),
+                pc.greater(table['stored'], time.time() - self.ttl)
+            ))
+        pairs = table.group_by(['seriesID', 'year']).aggregate([])
+        cells = set(zip(pairs['seriesID'].to_pylist(), pairs['year'].to_pylist()))
+
+        # rows without a period only mark years without data
+        table = table.filter(pc.is_valid(table['period']))
+        cols = {c : table[c].to_numpy(zero_copy_only=False) for c in table.column_names}
+        df = pd.DataFrame({
+            'seriesID' : cols['seriesID'],
+            'year' : cols['year'].astype('int64'),
+            'period' : cols['period'],
+            'periodName' : cols['periodName'],
+            'value' : cols['value'].astype('float64')
+        })
+        if keep_footnotes:
+            df['footnotes'] = [loads(f) if f else [{}] for f in cols['footnotes']]
+        return df, cells
+
+    def write(self, df, cells=None):
+        """Writes data to the store. Every cell that is written replaces what was stored for it
+        before.
+
+        :param df: ``'long'`` DataFrame, like :meth:`RequestBLS.series()` returns. The footnotes
+                   column is stored if it is there.
+        :param cells: Collection of (Series ID, year) cells that ``df`` covers. Cells without any
+                      rows in ``df`` are stored as years without data. By default, the cells are
+                      the ones that have rows in ``df``.
+        """
+        df = pd.DataFrame({
+            'seriesID' : df['seriesID'].to_numpy(dtype=object),
+            'year' : df['year'].to_numpy(dtype='int64'),
+            'period' : df['period'].to_numpy(dtype=object),
+            'periodName' : df['periodName'].to_numpy(dtype=object),
+            'value' : df['value'].to_numpy(dtype='float64'),
+            'footnotes' : [dumps(f).decode() for f in df['footnotes']] \
+                if 'footnotes' in df.columns else None
+        })
+        if cells is not None:
+            empty = set(cells) - set(zip(df['seriesID'].tolist(), df['year'].tolist()))
+            df = pd.concat([df, pd.DataFrame({
+                'seriesID' : [s for s, _ in empty],
+                'year' : np.array([y for _, y in empty], dtype='int64')
+            })], ignore_index=True)
+        if df.empty:
+            return
+        df['stored'] = time.time()
+        df['survey'] = df['seriesID'].str[:2]
+        with self._lock:
+            for (survey, year), part in df.groupby(['survey', 'year'], sort=False):
+                self._write_partition(survey, year, part)
+
+    def load_catalogs(self, series):
+        """Reads the catalogs of series from the store.
+
+        :param series: List of Series ID's.
+        :returns: dict of {Series ID : catalog} of the series that have a stored catalog.
+        """
+        with self._lock:
+            catalogs = self._read_catalogs()
+        return {s : catalogs[s] for s in series if s in catalogs}
+
+    def write_catalogs(self, catalogs):
+        """Writes catalogs to the store, replacing the stored catalogs of the same series.
+
+        :param catalogs: dict of {Series ID : catalog}.
+        """
+        if not catalogs:
+            return
+        with self._lock:
+            catalogs = {**self._read_catalogs(), **catalogs}
+            tmp = os.path.join(self.path, f'.{uuid.uuid4().hex}.tmp')
+            with open(tmp, 'wb') as f:
+                f.write(dumps(catalogs))
+            os.replace(tmp, os.path.join(self.path, self.CATALOG_FILE))
+
+    def _read_catalogs(self):
+        file = os.path.join(self.path, self.CATALOG_FILE)
+        if not os.path.exists(file):
+            return {}
+        with open(file, 'rb') as f:
+            return loads(f.read())
+
+    def _write_partition(self, survey, year, df):
+        """Replaces the series in ``df`` in the file of a single partition."""
+        directory = os.path.join(self.path, f'survey={survey}', f'year={year}')
+        file = os.path.join(directory, 'part-0.parquet')
+        table = pa.Table.from_pandas(df[self.COLUMNS], schema=self._schema, preserve_index=False)
+        if os.path.exists(file):
+            old = pq.read_table(file, schema=self._schema, memory_map=True)
+            keep = pc.invert(pc.is_in(
+                old['seriesID'], value_set=pa.array(pd.unique(df['seriesID']), pa.string())
+            ))
+            table = pa.concat_tables([old.filter(keep), table])
+        table = table.sort_by('seriesID')
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f'.{uuid.uuid4().hex}.tmp')
+        pq.write_table(table, tmp, row_group_size=self.ROW_GROUP_SIZE)
+        os.replace(tmp, file)
+
+    def _dataset(self):
+        return ds.dataset(self.path, schema=self._schema.append(pa.field('survey', pa.string())) \
+                              .append(pa.field('year', pa.int64())),
+                          format='parquet', partitioning=self._partitioning,
+                          filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True),
+                          exclude_invalid_files=False, ignore_prefixes=['.', '_'])
+
+    def clear(self):
+        with self._lock:
+            for f in os.listdir(self.path):
+                f = os.path.join(self.path, f)
+                if os.path.isdir(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
@@ -15,6 +15,11 @@ setup(
     tests_require=[
         'pytest',
     ],
+    extras_require={
+        'fast': ['orjson'],
+        'parquet': ['pyarrow'],
+        'async': ['aiohttp'],
+    },
     url='https://github.com/dwreeves/blsconnect',
     description="Integration of BLS's API built for Python.",
     long_description=readme
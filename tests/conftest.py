@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import pytest
+import os
+import json
+import asyncio
+import requests
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class StubSession(object):
+    """Stands in for a ``requests.Session`` and answers every post with a saved response."""
+    def __init__(self, json_file):
+        with open(os.path.join(ROOT_DIR, f'static/{json_file}'), 'rb') as f:
+            self.content = f.read()
+        self.posts = []
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts.append(json.loads(data))
+        r = requests.models.Response()
+        r.status_code = 200
+        r._content = self.content
+        return r
+
+class WindowStubSession(StubSession):
+    """Like :class:`StubSession`, but only answers with the requested series and years."""
+    def post(self, url, data=None, headers=None, timeout=None):
+        r = super().post(url, data=data, headers=headers, timeout=timeout)
+        r._content = _window_content(self.content, self.posts[-1])
+        return r
+
+class StubAsyncSession(object):
+    """Stands in for an ``aiohttp.ClientSession`` and answers every post with a saved response."""
+    def __init__(self, json_file, status=200):
+        with open(os.path.join(ROOT_DIR, f'static/{json_file}'), 'rb') as f:
+            self.content = f.read()
+        self.status = status
+        self.posts = []
+        self.timeouts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts.append(json.loads(data))
+        self.timeouts.append(timeout)
+        return StubAsyncResponse(self, self.content)
+
+class WindowStubAsyncSession(StubAsyncSession):
+    """Like :class:`StubAsyncSession`, but only answers with the requested series and years."""
+    def post(self, url, data=None, headers=None, timeout=None):
+        r = super().post(url, data=data, headers=headers, timeout=timeout)
+        r.content = _window_content(self.content, self.posts[-1])
+        return r
+
+class StubAsyncResponse(object):
+    def __init__(self, session, content):
+        self.session = session
+        self.status = session.status
+        self.content = content
+    async def __aenter__(self):
+        self.session.in_flight += 1
+        self.session.max_in_flight = max(self.session.max_in_flight, self.session.in_flight)
+        await asyncio.sleep(0.01)
+        return self
+    async def __aexit__(self, *exc_info):
+        self.session.in_flight -= 1
+    async def read(self):
+        return self.content
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(self.status)
+
+def _window_content(content, body):
+    """Cuts a saved response down to the series and years of a request body."""
+    years = range(int(body['startyear']), int(body['endyear']) + 1)
+    content = json.loads(content)
+    content['Results']['series'] = [
+        {**s, 'data' : [p for p in s['data'] if int(p['year']) in years]}
+        for s in content['Results']['series'] if s['seriesID'] in body['seriesid']
+    ]
+    return json.dumps(content).encode()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.fixture(scope='session')
+def api_key():
+    # api_key.txt has just one line for the API key and is in the parent directory.
+    with open(os.path.join(ROOT_DIR, '../api_key.txt')) as f:
+        return f.readlines()[0].strip()
+
+@pytest.fixture
+def stub_session():
+    """:class:`StubSession`, to be called with the name of a saved response in ``static/``."""
+    return StubSession
+
+@pytest.fixture
+def window_stub_session():
+    """:class:`WindowStubSession`, to be called with the name of a saved response in ``static/``."""
+    return WindowStubSession
+
+@pytest.fixture
+def stub_async_session():
+    """:class:`StubAsyncSession`, to be called with the name of a saved response in ``static/``."""
+    return StubAsyncSession
+
+@pytest.fixture
+def window_stub_async_session():
+    """:class:`WindowStubAsyncSession`, to be called with the name of a saved response in
+    ``static/``.
+    """
+    return WindowStubAsyncSession
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+import pytest
+import os
+import json
+import asyncio
+import contextlib
+import datetime
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from blsconnect import AsyncRequestBLS, MemoryCache, RequestScheduler
+from blsconnect.request import InputError
+
+current_year = datetime.datetime.now().year
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CPI = ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize(
+    'json_file, pickle_file, args, kwargs', [
+    ('u3_2009.json', 'u3_2009.pickle',
+     (['LNS14000000'], 2009, 2009), {'keep_footnotes' : True}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_long.pickle', (CPI, 1999, 2000), {'shape' : 'long'}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_wide.pickle', (CPI, 1999, 2000), {'shape' : 'wide'}),
+    ('u3_2009.json', 'u3_2009_groupby_q.pickle',
+     (['LNS14000000'], 2009, 2009), {'groupby' : 'q'})
+])
+def test_async_series(api_key, stub_async_session, json_file, pickle_file, args, kwargs):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    session = stub_async_session(json_file)
+    c = AsyncRequestBLS(api_key, session=session)
+    df = asyncio.run(c.series(*args, catalog=False, **kwargs))
+    assert_frame_equal(df, benchmark)
+    assert len(session.posts) == 1
+    assert c.stats.requests == 1
+
+def test_async_series_bounded_concurrency(api_key, stub_async_session):
+    session = stub_async_session('u3_2009.json')
+    c = AsyncRequestBLS(api_key, session=session, max_workers=2)
+    series = [f'LAUST{str(i).zfill(2)}0000000000003' for i in range(60)]
+    asyncio.run(c.series(series, 1950, 2009, catalog=False))
+    assert len(session.posts) == 6
+    assert session.max_in_flight == 2
+
+def test_async_series_many(api_key, stub_async_session):
+    session = stub_async_session('cpi_1999-2000.json')
+    c = AsyncRequestBLS(api_key, session=session)
+    dfs = asyncio.run(c.series_many([
+        (CPI, 1999, 2000, 'long'),
+        {'series' : CPI, 'start_year' : 2000, 'end_year' : 2000, 'shape' : 'long'}
+    ]))
+    assert len(session.posts) == 1
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    assert_frame_equal(dfs[0], benchmark)
+    assert_frame_equal(dfs[1], benchmark[benchmark['year'] == 2000].reset_index(drop=True))
+
+def test_async_retries(api_key, stub_async_session):
+    session = stub_async_session('u3_2009.json', status=503)
+    c = AsyncRequestBLS(api_key, session=session,
+                        scheduler=RequestScheduler(max_retries=2, backoff=0))
+    with pytest.raises(RuntimeError):
+        asyncio.run(c.series('LNS14000000', 2009, 2009, catalog=False))
+    assert len(session.posts) == 3
+
+def test_async_retry_gives_up_when_throttled(api_key, stub_async_session):
+    session = stub_async_session('u3_2009.json')
+    session.content = json.dumps({
+        'status' : 'REQUEST_NOT_PROCESSED',
+        'message' : ['Request could not be serviced, as the threshold was reached.']
+    }).encode()
+    c = AsyncRequestBLS(api_key, session=session,
+                        scheduler=RequestScheduler(max_retries=2, backoff=0))
+    with pytest.raises(InputError, match='threshold'):
+        asyncio.run(c.series('LNS14000000', 2009, 2009, catalog=False))
+    assert len(session.posts) == 3
+
+def test_async_concurrent_calls_keep_their_own_stats(api_key, stub_async_session):
+    session = stub_async_session('cpi_1999-2000.json')
+    c = AsyncRequestBLS(api_key, session=session)
+    async def call(series, start_year):
+        await c.series(series, start_year, 2000, catalog=False)
+        return c.stats
+    async def run():
+        return await asyncio.gather(call(CPI, 1999), call(CPI[0], 1961))
+    short, long = asyncio.run(run())
+    assert (short.requests, short.series) == (1, 2)
+    assert (long.requests, long.series) == (2, 4)
+    assert c.stats is long
+
+def test_async_cache(api_key, stub_async_session):
+    session = stub_async_session('cpi_1999-2000.json')
+    c = AsyncRequestBLS(api_key, session=session, cache=MemoryCache())
+    first = asyncio.run(c.series(CPI, 1999, 2000, catalog=False))
+    second = asyncio.run(c.series(CPI, 1999, 2000, catalog=False))
+    assert_frame_equal(first, second)
+    assert len(session.posts) == 1
+    assert (c.stats.requests, c.stats.cache_hits) == (0, 4)
+
+def test_async_reuse_after_close(api_key, stub_async_session):
+    session = stub_async_session('u3_2009.json')
+    c = AsyncRequestBLS(api_key, session=session, max_workers=2)
+    series = [f'LAUST{str(i).zfill(2)}0000000000003' for i in range(60)]
+    async def run():
+        async with c:
+            await c.series(series, 1950, 2009, catalog=False)
+    asyncio.run(run())
+    asyncio.run(run())
+    assert len(session.posts) == 12
+
+def test_async_iter_series(api_key, window_stub_async_session):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    session = window_stub_async_session('cpi_1999-2000.json')
+    c = AsyncRequestBLS(api_key, session=session, cache=MemoryCache(), max_workers=1)
+    async def run():
+        await c.series(CPI, 2000, 2000, catalog=False)
+        return [df async for df in c.iter_series(CPI, 1975, 2000, shape='long', catalog=False)]
+    dfs = asyncio.run(run())
+    # the 2000 cells come from the cache, then 1999 from the first response; 1975-1998 are empty
+    assert [sorted(set(df['year'])) for df in dfs] == [[2000], [1999]]
+    assert [(p['startyear'], p['endyear']) for p in session.posts[1:]] == \
+        [('1981', '1999'), ('1975', '1980')]
+    assert c.stats.requests == 2
+    df = c._cleanup_df(pd.concat(dfs, ignore_index=True), 'long')
+    assert_frame_equal(df, benchmark)
+
+def test_async_iter_series_closed_early(api_key, stub_async_session):
+    session = stub_async_session('u3_2009.json')
+    c = AsyncRequestBLS(api_key, session=session, max_workers=3)
+    series = [f'LAUST{str(i).zfill(2)}0000000000003' for i in range(60)]
+    async def run():
+        async with contextlib.aclosing(c.iter_series(series, 1950, 2009, catalog=False)) as dfs:
+            async for df in dfs:
+                break
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    assert asyncio.run(run()) == []
+
+def test_async_iter_series_bad_shape(api_key, stub_async_session):
+    c = AsyncRequestBLS(api_key, session=stub_async_session('u3_2009.json'))
+    with pytest.raises(InputError):
+        asyncio.run(c.iter_series('LNS14000000', 2009, 2009, shape='tall').__anext__())
+
+@pytest.mark.parametrize(
+    'shape, pickle_file', [
+    ('wide', 'cpi_1999-2000_wide.pickle'),
+    ('long', 'cpi_1999-2000_long.pickle')
+])
+def test_async_refresh(api_key, window_stub_async_session, shape, pickle_file):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    session = window_stub_async_session('cpi_1999-2000.json')
+    c = AsyncRequestBLS(api_key, session=session)
+    async def run():
+        df = await c.series(CPI, 1999, 1999, shape=shape, catalog=False)
+        return await c.refresh(df, shape=shape)
+    assert_frame_equal(asyncio.run(run()), benchmark)
+    assert sorted((p['startyear'], p['endyear']) for p in session.posts[1:]) == \
+        [('1999', '2006'), ('2007', str(current_year))]
+
+def test_async_timeout_with_own_session(api_key, stub_async_session):
+    aiohttp = pytest.importorskip('aiohttp')
+    session = stub_async_session('u3_2009.json')
+    c = AsyncRequestBLS(api_key, session=session, timeout=5)
+    asyncio.run(c.series('LNS14000000', 2009, 2009, catalog=False))
+    assert session.timeouts == [aiohttp.ClientTimeout(total=5)]
+
+def test_async_default_session(api_key):
+    pytest.importorskip('aiohttp')
+    async def run():
+        async with AsyncRequestBLS(api_key, max_workers=4) as c:
+            session = c._get_session()
+            assert session.connector.limit == 10
+        assert session.closed and c.session is None
+    asyncio.run(run())
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import pytest
 from blsconnect import bls_search
+from blsconnect.request import InputError
 
 kwargs_input = {}
 output = {}
@@ -29,4 +30,33 @@ output[3] = ['CUSR0000SA0L1E', 'LNS14000000']
     [(kwargs_input[i], output[i]) for i in range(len(kwargs_input))]
 )
 def test_bls_search(kwargs, expected_output):
-    assert bls_search(**kwargs) == expected_output
\ No newline at end of file
+    assert bls_search(**kwargs) == expected_output
+
+kwargs_input[4] = {'data' : 'ur', 'state' : ['CA', 'NY'], 'sa' : [True, False]}
+output[4] = {
+    (('sa', True), ('state', 'CA')): 'LASST060000000000003',
+    (('sa', False), ('state', 'CA')): 'LAUST060000000000003',
+    (('sa', True), ('state', 'NY')): 'LASST360000000000003',
+    (('sa', False), ('state', 'NY')): 'LAUST360000000000003'
+}
+
+kwargs_input[5] = {'data' : 'ur', 'state' : ['CA', 'NY'], 'sa' : [False], 'return_type' : 'full'}
+output[5] = {
+    (('data', 'ur'), ('sa', False), ('state', 'CA')): 'LAUST060000000000003',
+    (('data', 'ur'), ('sa', False), ('state', 'NY')): 'LAUST360000000000003'
+}
+
+@pytest.mark.parametrize('i', [4, 5])
+def test_bls_search_product(i):
+    assert bls_search(**kwargs_input[i]) == output[i]
+
+def test_bls_search_generator():
+    kwargs = {'data' : ['ur', 'lf'], 'state' : ['CA', 'NY', 'TX'], 'sa' : [True, False]}
+    ids = bls_search(return_type='generator', **kwargs)
+    assert not isinstance(ids, list)
+    assert list(ids) == bls_search(return_type='list', **kwargs)
+    assert list(ids) == [] # exhausted
+
+def test_bls_search_return_type():
+    with pytest.raises(InputError):
+        bls_search(data='ur', return_type='dict')
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pytest
+import datetime
+from blsconnect.cache import MemoryCache, DirectoryCache, SQLiteCache
+
+current_year = datetime.datetime.now().year
+
+@pytest.fixture(params=['memory', 'directory', 'sqlite'])
+def make_cache(request, tmp_path):
+    def _make_cache(**kwargs):
+        if request.param == 'memory':
+            return MemoryCache(**kwargs)
+        if request.param == 'directory':
+            return DirectoryCache(str(tmp_path / 'cache'), **kwargs)
+        if request.param == 'sqlite':
+            return SQLiteCache(str(tmp_path / 'cache.sqlite'), **kwargs)
+    return _make_cache
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_get_set(make_cache):
+    cache = make_cache()
+    key = cache.cell_key('LNS14000000', 2010)
+    assert cache.get(key) is None
+    cache.set(key, b'[{"year":"2010","period":"M01","value":"9.8"}]', 2010)
+    assert cache.get(key) == b'[{"year":"2010","period":"M01","value":"9.8"}]'
+    assert cache.get(cache.cell_key('LNS14000000', 2009)) is None
+
+def test_get_set_many(make_cache):
+    cache = make_cache()
+    cache.set_many([(cache.cell_key('LNS14000000', y), str(y).encode(), y) for y in range(1990, 2011)])
+    keys = [cache.cell_key('LNS14000000', y) for y in range(1985, 2016)]
+    assert cache.get_many(keys) == \
+        [str(y).encode() if 1990 <= y <= 2010 else None for y in range(1985, 2016)]
+
+@pytest.mark.parametrize(
+    'end_year, expected_value', [
+    (current_year - 1, b'data'),
+    (current_year, None)
+])
+def test_ttl(make_cache, end_year, expected_value):
+    cache = make_cache(ttl=-1)
+    cache.set('key', b'data', end_year)
+    assert cache.get('key') == expected_value
+
+def test_lru_eviction(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set('a', b'a', 2000)
+    cache.set('b', b'b', 2000)
+    cache.get('a')
+    cache.set('c', b'c', 2000)
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == b'a'
+    assert cache.get('c') == b'c'
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import pytest
+import os
+from blsconnect import CatalogIndex, RequestBLS
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+@pytest.fixture
+def index(tmp_path):
+    index = CatalogIndex(str(tmp_path / 'catalog.sqlite'))
+    index.load_series_file(os.path.join(ROOT_DIR, 'static/la.series'))
+    return index
+
+def test_load_series_file(index):
+    assert len(index) == 24
+    c = index.get('LASST060000000000003')
+    assert c['area'] == 'California'
+    assert c['measure'] == 'unemployment rate'
+    assert c['series_title'] == 'Unemployment Rate: California (S)'
+    assert index.get('LASST990000000000003') is None
+
+@pytest.mark.parametrize(
+    'kwargs, expected_ids', [
+    ({'area' : 'texas', 'measure' : 'Unemployment Rate'},
+     ['LASST480000000000003', 'LAUST480000000000003']),
+    ({'area' : 'New York', 'seasonality' : 'U', 'survey' : 'la', 'limit' : 2},
+     ['LAUST360000000000003', 'LAUST360000000000004']),
+    ({'text' : 'labor force california (S)'}, ['LASST060000000000006']),
+    ({'text' : 'unemployment', 'survey' : 'CU'}, [])
+])
+def test_search(index, kwargs, expected_ids):
+    assert list(index.search(**kwargs)) == expected_ids
+
+def test_titles_and_reload(index, tmp_path):
+    ids = ['LASST060000000000003', 'LAUST480000000000006', 'LASST990000000000003']
+    assert index.titles(ids) == {
+        'LASST060000000000003' : 'Unemployment Rate: California (S)',
+        'LAUST480000000000006' : 'Labor Force: Texas (U)'
+    }
+    index.add({'LASST060000000000003' : {'series_title' : 'New title', 'area' : 'California'}})
+    reopened = CatalogIndex(str(tmp_path / 'catalog.sqlite'))
+    assert len(reopened) == 24
+    assert reopened.titles(ids[:1]) == {'LASST060000000000003' : 'New title'}
+    assert list(reopened.search(text='new title')) == ['LASST060000000000003']
+    assert list(reopened.search(text='unemployment rate california')) == ['LAUST060000000000003']
+
+def test_filled_from_requests(api_key, stub_session):
+    index = CatalogIndex()
+    c = RequestBLS(api_key, session=stub_session('u3_2009.json'), catalog_index=index)
+    c.series('LNS14000000', 2009, 2009)
+    assert 'LNS14000000' in index
+    assert index.search(survey='LN', measure='Unemployment rate') == \
+        {'LNS14000000' : '(Seas) Unemployment Rate'}
+    assert list(index.search(text='Current Population Survey')) == ['LNS14000000']
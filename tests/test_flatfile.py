@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import pytest
+import os
+import numpy as np
+import pandas as pd
+import requests
+from pandas.testing import assert_frame_equal
+from blsconnect import FlatFileBLS
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(ROOT_DIR, 'static/cu.data.0.Current')
+
+class StubDownloadSession(object):
+    """Stands in for a ``requests.Session`` and answers every get with the flat file."""
+    def __init__(self):
+        self.gets = []
+    def get(self, url, headers=None, stream=None, timeout=None):
+        self.gets.append((url, headers))
+        r = requests.models.Response()
+        r.status_code = 200
+        r.raw = open(DATA_FILE, 'rb')
+        return r
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+@pytest.mark.parametrize(
+    'pickle_file, kwargs', [
+    ('cpi_1999-2000_long.pickle', {'shape' : 'long'}),
+    ('cpi_1999-2000_wide.pickle', {'shape' : 'wide'}),
+    ('cpi_1999-2000_long_groupby_s.pickle', {'shape' : 'long', 'groupby' : 's'})
+])
+def test_series_matches_api(pickle_file, kwargs):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    c = FlatFileBLS(DATA_FILE, chunksize=10)
+    df = c.series(['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000, **kwargs)
+    assert_frame_equal(df, benchmark)
+
+@pytest.mark.parametrize(
+    'start_year, end_year, expected_years', [
+    (None, None, [1998, 1999, 2000, 2001]),
+    (2000, None, [2000, 2001]),
+    (None, 1998, [1998])
+])
+def test_year_limits(start_year, end_year, expected_years):
+    df = FlatFileBLS(DATA_FILE).series('CUSR0000SA0L1E', start_year, end_year)
+    assert list(pd.unique(df['year'])) == expected_years
+
+def test_all_series():
+    df = FlatFileBLS(DATA_FILE).series(shape='long')
+    assert list(pd.unique(df['seriesID'])) == \
+        ['CUSR0000SA0L1E', 'CUUR0000SA0L1E', 'CUUR0100SA0']
+    assert len(df) == 122
+
+def test_annual_averages_and_footnotes():
+    df = FlatFileBLS(DATA_FILE).series('CUUR0100SA0', 2000, 2000, keep_footnotes=True)
+    assert list(df['period'])[-2:] == ['M12', 'M13']
+    assert list(df['periodName'])[-2:] == ['December', 'Annual']
+    assert np.isnan(df.loc[df['period'] == 'M05', 'CUUR0100SA0'].iloc[0])
+    assert df['footnotes'].iloc[-2] == [{'code' : 'P'}]
+    assert df['footnotes'].iloc[-1] == [{}]
+
+def test_iter_series():
+    c = FlatFileBLS(DATA_FILE, chunksize=40)
+    chunks = list(c.iter_series(start_year=1999, end_year=2000, shape='long'))
+    assert len(chunks) > 1
+    df = pd.concat(chunks, ignore_index=True)
+    assert_frame_equal(df, c.series(start_year=1999, end_year=2000, shape='long'))
+
+def test_download():
+    session = StubDownloadSession()
+    headers = {'User-Agent' : 'test@example.com'}
+    c = FlatFileBLS('cu/cu.data.0.Current', session=session, headers=headers)
+    df = c.series('CUUR0100SA0', shape='long')
+    assert len(df) == 26
+    assert session.gets == [
+        ('https://download.bls.gov/pub/time.series/cu/cu.data.0.Current', headers)
+    ]
+
+def test_swapped_years():
+    c = FlatFileBLS(DATA_FILE)
+    assert_frame_equal(c.series('CUUR0100SA0', 2001, 2000), c.series('CUUR0100SA0', 2000, 2001))
+
+@pytest.mark.parametrize('shape', ['wide', 'long'])
+def test_refresh(shape):
+    c = FlatFileBLS(DATA_FILE)
+    series = ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+    df = c.series(series, 1998, 1999, shape=shape)
+    df.loc[df['year'] == 1998, df.columns[-1]] = 0.0
+    refreshed = c.refresh(df, shape=shape)
+    assert list(pd.unique(refreshed['year'])) == [1998, 1999, 2000, 2001]
+    assert (refreshed.loc[refreshed['year'] == 1998, df.columns[-1]] == 0).all()
+    # 1998 is only read again with a lookback
+    assert_frame_equal(c.refresh(df, shape=shape, lookback=1),
+                       c.series(series, 1998, None, shape=shape))
+
+def test_iter_series_resets_call():
+    c = FlatFileBLS(DATA_FILE)
+    c.messages.append('old')
+    list(c.iter_series('CUUR0100SA0', shape='long'))
+    assert c.messages == []
+    assert c.stats.timings['read'] > 0
+
+def test_series_many_unset_years():
+    c = FlatFileBLS(DATA_FILE)
+    dfs = c.series_many([('CUUR0100SA0',), {'series' : 'CUSR0000SA0L1E', 'start_year' : 2000}])
+    assert_frame_equal(dfs[0], c.series('CUUR0100SA0'))
+    assert_frame_equal(dfs[1], c.series('CUSR0000SA0L1E', 2000))
+
+def test_series_many_all_series():
+    c = FlatFileBLS(DATA_FILE)
+    dfs = c.series_many([{'series' : None, 'start_year' : 1999, 'end_year' : 2000,
+                          'shape' : 'long'}])
+    assert_frame_equal(dfs[0], c.series(start_year=1999, end_year=2000, shape='long'))
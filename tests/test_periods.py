@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import pytest
+import pandas as pd
+from blsconnect.periods import (
+    PERIOD_CODES, period_frequency, period_index, period_start_month, period_names,
+    period_sort_key, to_datetime, to_period_index
+)
+
+@pytest.mark.parametrize(
+    'period, freq, month, name', [
+    ('M01', 'M', 1, 'January'),
+    ('M12', 'M', 12, 'December'),
+    ('M13', 'A', 1, 'Annual'),
+    ('Q03', 'Q', 7, '3rd Quarter'),
+    ('Q05', 'A', 1, 'Annual'),
+    ('S02', 'S', 7, '2nd Half'),
+    ('S03', 'A', 1, 'Annual'),
+    ('A01', 'A', 1, 'Annual'),
+    ('X99', '', 0, None)
+])
+def test_period_lookups(period, freq, month, name):
+    periods = [period, 'M01', period]
+    assert list(period_frequency(periods)) == [freq, 'M', freq]
+    assert list(period_start_month(periods)) == [month, 1, month]
+    assert list(period_names(periods)) == [name, 'January', name]
+
+def test_period_index():
+    unknown = ['M00', 'M14', 'm01', 'M1', 'M011', 'X01', '', None, 'M\u00e91']
+    assert list(period_index(list(PERIOD_CODES) + unknown)) == \
+        list(range(len(PERIOD_CODES))) + [-1] * len(unknown)
+    assert list(period_index(pd.Series(['Q02', 'A01', 'Q02']))) == \
+        [PERIOD_CODES.get_loc('Q02'), PERIOD_CODES.get_loc('A01'), PERIOD_CODES.get_loc('Q02')]
+
+@pytest.mark.parametrize(
+    'years, periods', [
+    ([2000, 2000, 2000, 2000, 2001], ['M03', 'Q01', 'M12', 'M13', 'M01']),
+    ([1999, 2000, 2000, 2000, 2000], ['A01', 'S01', 'Q03', 'S02', 'A01']),
+    ([2000, 2000, 2000], ['M02', 'M10', 'M11'])
+])
+def test_period_sort_key(years, periods):
+    key = list(period_sort_key(years, periods))
+    assert key == sorted(key) and len(set(key)) == len(key)
+
+@pytest.mark.parametrize(
+    'periods, expected_dates', [
+    (['M01', 'M12', 'M13'], ['2000-01-01', '2000-12-01', '2000-01-01']),
+    (['Q02', 'S02', 'A01'], ['2000-04-01', '2000-07-01', '2000-01-01']),
+    (['M01', 'X99'], ['2000-01-01', None])
+])
+def test_to_datetime(periods, expected_dates):
+    dates = to_datetime([2000] * len(periods), periods)
+    assert dates.equals(pd.DatetimeIndex(expected_dates))
+
+@pytest.mark.parametrize(
+    'years, periods, expected_periods', [
+    ([1999, 2000], ['M12', 'M01'], pd.PeriodIndex(['1999-12', '2000-01'], freq='M')),
+    ([2000, 2000], ['Q01', 'Q04'], pd.PeriodIndex(['2000Q1', '2000Q4'], freq='Q')),
+    ([1999, 2000], ['M13', 'A01'], pd.PeriodIndex(['1999', '2000'], freq='Y')),
+    ([], [], pd.PeriodIndex([], freq='M'))
+])
+def test_to_period_index(years, periods, expected_periods):
+    assert to_period_index(years, periods).equals(expected_periods)
+
+def test_to_period_index_mixed_frequencies():
+    with pytest.raises(ValueError):
+        to_period_index([2000, 2000], ['M12', 'M13'])
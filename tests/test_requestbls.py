@@ -3,18 +3,17 @@ import pytest
 import os
 import sys
 import json
+import threading
+import time
 import pandas as pd
-from pandas.util.testing import assert_frame_equal
-from blsconnect import RequestBLS
+from pandas.testing import assert_frame_equal
+from blsconnect import RequestBLS, MemoryCache
+from blsconnect.request import InputError
 import datetime
 
 current_year = datetime.datetime.now().year
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# api_key.txt has just one line for the API key and is in the parent directory.
-with open(os.path.join(ROOT_DIR, '../api_key.txt')) as f:
-    api_key = f.readlines()[0].strip()
-
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 @pytest.mark.parametrize(
@@ -23,10 +22,59 @@ with open(os.path.join(ROOT_DIR, '../api_key.txt')) as f:
     (True, 1950, 1980, [(1961, 1980),(1950, 1960)]),
     (False, 1950, 1980, [(1971, 1980),(1961, 1970),(1951, 1960),(1950, 1950)])
 ])
-def test_year_groups(key_bool, start_year, end_year, expected_groupings):
+def test_year_groups(api_key, key_bool, start_year, end_year, expected_groupings):
     c = RequestBLS(api_key) if key_bool else RequestBLS()
     assert c._year_groups(start_year, end_year) == expected_groupings
 
+@pytest.mark.parametrize(
+    'key_bool, years, expected_windows', [
+    (True, list(range(1950, 1981)), [(1961, 1980),(1950, 1960)]),
+    (True, [2005, 2006, 2015, 2020], [(2005, 2020)]),
+    (False, [2005, 2006, 2015, 2020], [(2015, 2020),(2005, 2006)]),
+    (False, [2026], [(2026, 2026)])
+])
+def test_year_windows(api_key, key_bool, years, expected_windows):
+    c = RequestBLS(api_key) if key_bool else RequestBLS()
+    assert c._year_windows(years) == expected_windows
+
+def test_plan_skips_cached_cells(api_key):
+    c = RequestBLS(api_key)
+    series = [f'LAUST{str(i).zfill(2)}0000000000003' for i in range(60)]
+    have = {(s, y) for s in series for y in range(2000, 2025)}
+    have -= {(series[0], 2010)}
+    assert c._plan(series, 2000, 2026, have) == [
+        ([series[0]], 2010, 2026),
+        (series[1:51], 2025, 2026),
+        (series[51:], 2025, 2026)
+    ]
+
+@pytest.mark.parametrize(
+    'years, expected_plan', [
+    ({'A' : range(2000, 2011), 'B' : range(2001, 2011), 'C' : range(2005, 2011)},
+     [(['A', 'B', 'C'], 2000, 2010)]),
+    ({'A' : range(2005, 2011), 'B' : range(1990, 2011)},
+     [(['B', 'A'], 1991, 2010), (['B', 'A'], 1990, 1990)]),
+    ({'A' : [2000], 'B' : [2010]}, [(['A', 'B'], 2000, 2010)]),
+    ({'A' : [1990], 'B' : [2010]}, [(['A'], 1990, 1990), (['B'], 2010, 2010)])
+])
+def test_plan_pack(api_key, years, expected_plan):
+    c = RequestBLS(api_key)
+    have = {(s, y) for s in years for y in range(1990, 2011) if y not in years[s]}
+    assert c._plan(list(years), 1990, 2010, have, pack=True) == expected_plan
+
+@pytest.mark.parametrize(
+    'key_bool, n_series, expected_batch_sizes', [
+    (True, 10, [10]),
+    (True, 120, [50, 50, 20]),
+    (False, 50, [25, 25])
+])
+def test_series_groups(api_key, key_bool, n_series, expected_batch_sizes):
+    c = RequestBLS(api_key) if key_bool else RequestBLS()
+    series = [f'LAUST{str(i).zfill(2)}0000000000003' for i in range(n_series)]
+    batches = c._series_groups(series)
+    assert [len(batch) for batch in batches] == expected_batch_sizes
+    assert [s for batch in batches for s in batch] == series
+
 @pytest.mark.parametrize(
     'key_bool, start_year, end_year, expected_year_tuple', [
     (True, None, None, (current_year-19, current_year)),
@@ -36,7 +84,7 @@ def test_year_groups(key_bool, start_year, end_year, expected_groupings):
     (False, None, 2003, (1994, 2003)),
     (False, 1986, None, (1986, 1995))
 ])
-def test_year_handler(key_bool, start_year, end_year, expected_year_tuple):
+def test_year_handler(api_key, key_bool, start_year, end_year, expected_year_tuple):
     c = RequestBLS(api_key) if key_bool else RequestBLS()
     assert c._year_handler(start_year, end_year) == expected_year_tuple
 
@@ -45,11 +93,11 @@ def test_year_handler(key_bool, start_year, end_year, expected_year_tuple):
     ('u3_2009.json', (['LNS14000000'], 2009, 2009, True)),
     ('cpi_1999-2000.json', (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000, False))
 ])
-def test_request_series(json_file, args):
+def test_request_series(api_key, json_file, args):
     with open(os.path.join(ROOT_DIR, f'static/{json_file}')) as f:
         benchmark = json.load(f)
     req = RequestBLS(api_key)._request(*args)
-    assert req.json()['Results'] == benchmark['Results']
+    assert req.data['Results'] == benchmark['Results']
 
 @pytest.mark.parametrize(
     'json_file, pickle_file, args', [
@@ -57,7 +105,7 @@ def test_request_series(json_file, args):
     ('cpi_1999-2000.json', 'cpi_1999-2000_long.pickle', ('long', False)),
     ('cpi_1999-2000.json', 'cpi_1999-2000_wide.pickle', ('wide', False))
 ])
-def test_tablefy(json_file, pickle_file, args):
+def test_tablefy(api_key, json_file, pickle_file, args):
     benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
     with open(os.path.join(ROOT_DIR, f'static/{json_file}')) as f:
         json_data = f.readlines()[0]
@@ -65,6 +113,380 @@ def test_tablefy(json_file, pickle_file, args):
     df = c._cleanup_df(c._tablefy(json_data, *args), args[0])
     assert_frame_equal(df, benchmark)
 
+@pytest.mark.parametrize(
+    'json_file, pickle_file, args, kwargs', [
+    ('u3_2009.json', 'u3_2009.pickle',
+     (['LNS14000000'], 2009, 2009), {'keep_footnotes' : True}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_long.pickle',
+     (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000), {'shape' : 'long'}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_wide.pickle',
+     (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000), {'shape' : 'wide'}),
+    ('u3_2009.json', 'u3_2009_groupby_q.pickle',
+     (['LNS14000000'], 2009, 2009), {'groupby' : 'q'}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_long_groupby_s.pickle',
+     (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000), {'shape' : 'long', 'groupby' : 's'})
+])
+def test_series_with_session(api_key, stub_session, json_file, pickle_file, args, kwargs):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    session = stub_session(json_file)
+    df = RequestBLS(api_key, session=session).series(*args, catalog=False, **kwargs)
+    assert_frame_equal(df, benchmark)
+    assert len(session.posts) == 1
+    assert session.posts[0]['seriesid'] == args[0]
+
+def test_catalog_requested_once(api_key, stub_session):
+    session = stub_session('u3_2009.json')
+    c = RequestBLS(api_key, session=session)
+    c.series('LNS14000000', 1980, 2009)
+    assert [p.get('catalog', False) for p in session.posts] == [True, False]
+    assert c.catalog['LNS14000000']['series_title'] == '(Seas) Unemployment Rate'
+    c.series('LNS14000000', 2009, 2009)
+    assert 'catalog' not in session.posts[-1]
+    assert list(c.catalog) == ['LNS14000000']
+    c.series('LNS14000000', 2009, 2009, catalog=False)
+    assert c.catalog == {}
+
+def test_series_many(api_key, stub_session):
+    session = stub_session('cpi_1999-2000.json')
+    c = RequestBLS(api_key, session=session)
+    cpi = ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+    dfs = c.series_many([
+        (cpi, 1999, 2000, 'long'),
+        {'series' : cpi, 'start_year' : 1999, 'end_year' : 2000, 'shape' : 'long', 'groupby' : 's'},
+        {'series' : reversed(cpi), 'start_year' : 2000, 'end_year' : 2000},
+        {'series' : cpi[0], 'start_year' : 1999, 'end_year' : 1999, 'keep_footnotes' : True}
+    ])
+    assert len(session.posts) == 1
+    assert session.posts[0]['seriesid'] == cpi
+    for df, pickle_file in zip(dfs, ['cpi_1999-2000_long.pickle',
+                                     'cpi_1999-2000_long_groupby_s.pickle']):
+        assert_frame_equal(df, pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}')))
+    wide = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_wide.pickle'))
+    assert_frame_equal(dfs[2], wide[wide['year'] == 2000][['year', 'period', 'periodName'] +
+                                                          cpi[::-1]].reset_index(drop=True))
+    assert list(dfs[3].columns) == ['year', 'period', 'periodName', 'footnotes', cpi[0]]
+    assert len(dfs[3]) == 12
+    assert c.series_many([]) == []
+
+def test_series_many_packs_requests(api_key, stub_session):
+    session = stub_session('u3_2009.json')
+    c = RequestBLS(api_key, session=session)
+    specs = [([f'LAUST{str(i).zfill(2)}0000000000003'], 2000 + i % 5, 2010) for i in range(30)]
+    c.series_many(specs)
+    assert len(session.posts) == 1
+    assert (session.posts[0]['startyear'], session.posts[0]['endyear']) == ('2000', '2010')
+
+def revised_cpi():
+    """cpi_1999-2000.json with the January 1999 value of CUSR0000SA0L1E revised to 100.0."""
+    with open(os.path.join(ROOT_DIR, 'static/cpi_1999-2000.json')) as f:
+        data = json.load(f)
+    data['Results']['series'][0]['data'][-1]['value'] = '100.0'
+    return json.dumps(data).encode()
+
+@pytest.mark.parametrize(
+    'shape, pickle_file', [
+    ('wide', 'cpi_1999-2000_wide.pickle'),
+    ('long', 'cpi_1999-2000_long.pickle')
+])
+def test_refresh(api_key, window_stub_session, shape, pickle_file):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    session = window_stub_session('cpi_1999-2000.json')
+    c = RequestBLS(api_key, session=session)
+    df = c.series(['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 1999, shape=shape, catalog=False)
+    assert_frame_equal(c.refresh(df, shape=shape), benchmark)
+    assert sorted((p['startyear'], p['endyear']) for p in session.posts[1:]) == \
+        [('1999', '2006'), ('2007', str(current_year))]
+
+def test_refresh_infers_footnotes(api_key, stub_session):
+    c = RequestBLS(api_key, session=stub_session('cpi_1999-2000.json'))
+    df = c.series(['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 1999, shape='long',
+                  keep_footnotes=True, catalog=False)
+    df = c.refresh(df, shape='long')
+    assert list(df.columns) == ['seriesID', 'year', 'period', 'periodName', 'value', 'footnotes']
+    assert len(df) == 48
+
+@pytest.mark.parametrize('cached, lookback, expected_value', [
+    (False, 0, 175.6),
+    (False, 1, 100.0),
+    (True, 1, 100.0)
+])
+def test_refresh_lookback_overwrites_revisions(api_key, window_stub_session, cached, lookback,
+                                               expected_value):
+    session = window_stub_session('cpi_1999-2000.json')
+    c = RequestBLS(api_key, session=session, cache=MemoryCache() if cached else None)
+    df = c.series(['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000, catalog=False)
+    session.content = revised_cpi()
+    df = c.refresh(df, lookback=lookback)
+    assert df.loc[(df['year'] == 1999) & (df['period'] == 'M01'), 'CUSR0000SA0L1E'].item() == \
+        expected_value
+    if cached:
+        assert c.series(['CUSR0000SA0L1E'], 1999, 1999, catalog=False)['CUSR0000SA0L1E'][0] == \
+            100.0
+
+def test_iter_series(api_key, window_stub_session):
+    cpi = ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    session = window_stub_session('cpi_1999-2000.json')
+    cache = MemoryCache()
+    lookups = []
+    load = cache._load
+    cache._load = lambda keys: lookups.append(len(keys)) or load(keys)
+    c = RequestBLS(api_key, session=session, cache=cache)
+    c.series(cpi, 2000, 2000, catalog=False)
+    lookups.clear()
+    dfs = list(c.iter_series(cpi, 1975, 2000, shape='long', catalog=False))
+    # the 2000 cells come from the cache, then 1999 from the first response; 1975-1998 are empty
+    assert [sorted(set(df['year'])) for df in dfs] == [[2000], [1999]]
+    assert [(p['startyear'], p['endyear']) for p in session.posts[1:]] == \
+        [('1981', '1999'), ('1975', '1980')]
+    assert lookups == [2 * 20, 2 * 6]
+    df = c._cleanup_df(pd.concat(dfs, ignore_index=True), 'long')
+    assert_frame_equal(df, benchmark)
+
+def test_cached_years_not_requested_for_catalog(api_key, stub_session, monkeypatch):
+    session = stub_session('u3_2009.json')
+    cache = MemoryCache()
+    RequestBLS(api_key, session=session, cache=cache).series('LNS14000000', 2009, 2009)
+    # the ttl of the current year has passed, but 2009 and its catalog are kept
+    now = time.time() + 2 * 3600
+    monkeypatch.setattr('blsconnect.cache.time.time', lambda: now)
+    c = RequestBLS(api_key, session=session, cache=cache)
+    c.series('LNS14000000', 2009, 2009)
+    assert len(session.posts) == 1
+    assert 'LNS14000000' in c.catalog
+
+def test_stats_and_hooks(api_key, stub_session):
+    events = []
+    hooks = {
+        'stage' : lambda stats, stage, seconds: events.append(stage),
+        'response' : lambda stats, info: events.append(('response', info['observations'])),
+        'done' : lambda stats: events.append('done')
+    }
+    args = (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000)
+    c = RequestBLS(api_key, session=stub_session('cpi_1999-2000.json'), cache=MemoryCache(),
+                   hooks=hooks)
+    c.series(*args, catalog=False, groupby='q')
+    assert (c.stats.requests, c.stats.retries, c.stats.series, c.stats.observations) == (1, 0, 2, 48)
+    assert (c.stats.cache_hits, c.stats.cache_misses) == (0, 4)
+    assert c.stats.bytes > 0 and c.stats.to_dict()['bytes'] == c.stats.bytes
+    assert {'total', 'cache', 'network', 'decode', 'tablefy', 'cleanup', 'group'} \
+        <= set(c.stats.timings)
+    assert ('response', 48) in events and events[-2:] == ['total', 'done']
+    c.series(*args, catalog=False)
+    assert (c.stats.requests, c.stats.cache_hits, c.stats.cache_misses) == (0, 4, 0)
+    assert 'network' not in c.stats.timings
+
+def test_hooks_run_on_calling_thread(api_key, stub_session):
+    threads = []
+    hooks = {event : lambda stats, *args: threads.append(threading.get_ident())
+             for event in ['stage', 'response', 'done']}
+    c = RequestBLS(api_key, session=stub_session('u3_2009.json'), max_workers=4, hooks=hooks)
+    c.series([f'LAUST{str(i).zfill(2)}0000000000003' for i in range(60)], 1950, 2009,
+             catalog=False)
+    assert c.stats.requests == 6
+    assert len(threads) > 6 and set(threads) == {threading.get_ident()}
+
+@pytest.mark.parametrize('shape', ['wide', 'long'])
+def test_parallel_matches_serial(api_key, window_stub_session, shape):
+    # 101 series in 3 batches, 1961-2000 in 2 windows of 20 years
+    series = [f'LAUST{str(i).zfill(3)}000000000003' for i in range(101)]
+    content = json.dumps({'status' : 'REQUEST_SUCCEEDED', 'message' : [], 'Results' : {'series' : [
+        {'seriesID' : s, 'data' : [
+            {'year' : str(y), 'period' : f'M{m:02}', 'periodName' : '', 'value' : f'{i}.{y}{m}',
+             'footnotes' : [{}]}
+            for y in range(2000, 1960, -1) for m in [6, 1]
+        ]}
+        for i, s in enumerate(series)
+    ]}}).encode()
+    dfs, posts = [], []
+    for max_workers in [1, 4]:
+        session = window_stub_session('cpi_1999-2000.json')
+        session.content = content
+        post = session.post
+        # hold back the first requests so that the later ones come back first
+        session.post = lambda *args, **kwargs: \
+            time.sleep(0.05 * (len(session.posts) < 3)) or post(*args, **kwargs)
+        c = RequestBLS(api_key, session=session, max_workers=max_workers)
+        dfs.append(c.series(series, 1961, 2000, shape=shape, catalog=False))
+        posts.append(len(session.posts))
+    assert posts == [6, 6]
+    assert_frame_equal(dfs[0], dfs[1])
+
+def test_bad_hooks(api_key):
+    with pytest.raises(InputError):
+        RequestBLS(api_key, hooks={'request' : print})
+
+@pytest.mark.parametrize('series', [None, 5, [5]])
+def test_input_handler_bad_series(api_key, series):
+    with pytest.raises(InputError, match='series must be'):
+        RequestBLS(api_key)._input_handler(series, 2000, 2000, 'wide', False)
+
+def test_series_ids_normalised(api_key, stub_session):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_wide.pickle'))
+    session = stub_session('cpi_1999-2000.json')
+    c = RequestBLS(api_key, session=session, cache=MemoryCache())
+    df = c.series(['cusr0000sa0l1e', ' CUUR0000SA0L1E ', 'CUSR0000SA0L1E'], 1999, 2000,
+                  catalog=False)
+    assert_frame_equal(df, benchmark)
+    c.series(['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000, catalog=False)
+    assert len(session.posts) == 1
+    assert session.posts[0]['seriesid'] == ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+
+@pytest.mark.parametrize(
+    'shape, value_dtype, value_cols, row_bytes', [
+    ('long', 'float64', ['value'], 12),
+    ('long', 'float32', ['value'], 8),
+    ('wide', 'float64', ['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], None)
+])
+def test_series_compact(api_key, stub_session, shape, value_dtype, value_cols, row_bytes):
+    c = RequestBLS(api_key, session=stub_session('cpi_1999-2000.json'))
+    args = (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000)
+    df = c.series(*args, shape=shape, catalog=False, compact=True, value_dtype=value_dtype)
+    full_df = c.series(*args, shape=shape, catalog=False)
+    assert 'periodName' not in df.columns
+    assert df['year'].dtype == 'int16'
+    assert df['period'].dtype == 'category'
+    assert (df[value_cols].dtypes == value_dtype).all()
+    assert (df[value_cols].values == full_df[value_cols].astype(value_dtype).values).all()
+    if shape == 'long':
+        assert df['seriesID'].dtype == 'category'
+        # per row, i.e. leaving out the one copy of each category
+        assert sum(df[c].cat.codes.dtype.itemsize if df[c].dtype == 'category'
+                   else df[c].dtype.itemsize for c in df.columns) == row_bytes
+        # against strings stored as Python objects, whatever pandas' default string dtype is
+        baseline = full_df.astype({c : object for c in ['seriesID', 'period', 'periodName']})
+        assert baseline.memory_usage(deep=True).sum() / len(baseline) > 200
+        assert df.memory_usage(deep=True).sum() < baseline.memory_usage(deep=True).sum() / 5
+
+@pytest.mark.parametrize(
+    'shape, time_index, index_type', [
+    ('wide', 'period', pd.PeriodIndex),
+    ('wide', 'date', pd.DatetimeIndex),
+    ('long', 'period', pd.PeriodIndex),
+    ('long', 'date', pd.DatetimeIndex)
+])
+def test_series_time_index(api_key, stub_session, shape, time_index, index_type):
+    c = RequestBLS(api_key, session=stub_session('u3_2009.json'))
+    df = c.series('LNS14000000', 2009, 2009, shape=shape, catalog=False, time_index=time_index)
+    full_df = c.series('LNS14000000', 2009, 2009, shape=shape, catalog=False)
+    assert not {'year', 'period', 'periodName', 'seriesID'} & set(df.columns)
+    dates = df.index.get_level_values('date')
+    assert isinstance(dates, index_type)
+    assert dates.is_monotonic_increasing and len(dates) == 12
+    assert list(dates.month) == list(range(1, 13))
+    value_col = 'LNS14000000' if shape == 'wide' else 'value'
+    assert (df[value_col].values == full_df[value_col].values).all()
+
+def test_interpolate_long_per_series(api_key):
+    df = pd.DataFrame({
+        'seriesID' : ['A'] * 4 + ['B'] * 3,
+        'year' : [2000, 2000, 2000, 2001, 2000, 2000, 2000],
+        'period' : ['M01', 'M02', 'M03', 'M01', 'M03', 'M01', 'M02'],
+        'value' : [1.0, None, 3.0, None, 30.0, 10.0, None]
+    })
+    df = RequestBLS(api_key)._interpolate(df, 'long', 'linear')
+    assert df['value'].tolist() == [1.0, 2.0, 3.0, 3.0, 30.0, 10.0, 20.0]
+
+def test_interpolate_long_mixed_frequencies(api_key):
+    df = pd.DataFrame({
+        'seriesID' : ['M'] * 5 + ['N'] * 3 + ['Q'] * 3,
+        'year' : [2000, 2000, 2000, 2000, 2001, 2000, 2001, 2001, 2000, 2000, 2000],
+        'period' : ['M10', 'M11', 'M12', 'M13', 'M01', 'M12', 'M01', 'M02', 'Q01', 'Q02', 'Q04'],
+        'value' : [10.0, None, 12.0, 11.0, 13.0, 12.0, None, 14.0, 10.0, None, 40.0]
+    })
+    df = RequestBLS(api_key)._interpolate(df, 'long', 'linear')
+    # each series is interpolated over its own rows: M's M13 is not a step between N's M12 and M01
+    assert df['value'].tolist() == [10.0, 11.0, 12.0, 11.0, 13.0, 12.0, 13.0, 14.0, 10.0, 25.0,
+                                    40.0]
+
+def test_wide_matches_pivot(api_key):
+    df = pd.DataFrame({
+        'seriesID' : ['B'] * 4 + ['A'] * 4 + ['C'],
+        'year' : [2001, 2000, 2000, 2000, 2001, 2000, 2000, 2000, 2000],
+        'period' : ['M01', 'M13', 'Q01', 'M03', 'M01', 'M13', 'M03', 'M01', 'M02'],
+        'periodName' : ['January', 'Annual', '1st Quarter', 'March', 'January', 'Annual', 'March',
+                        'January', 'February'],
+        'value' : [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+    })
+    c = RequestBLS(api_key)
+    wide = c._reshape(df, ['A', 'B', 'D'], 'wide', False)
+    expected = df.pivot(index=['year', 'period', 'periodName'], columns='seriesID', values='value')
+    expected = expected[['A', 'B']].reset_index()
+    expected.columns.name = None
+    expected = c._cleanup_df(expected, 'wide')
+    assert_frame_equal(wide, expected, check_column_type=False)
+    assert wide['period'].tolist() == ['M01', 'M02', 'M03', 'Q01', 'M13', 'M01']
+    assert c._cleanup_df(wide, 'wide') is wide
+
+@pytest.mark.parametrize('method', ['linear', 'index'])
+def test_interpolate_long_matches_wide(api_key, stub_session, method):
+    c = RequestBLS(api_key, session=stub_session('cpi_1999-2000.json'))
+    args = (['CUSR0000SA0L1E', 'CUUR0000SA0L1E'], 1999, 2000)
+    wide = c.series(*args, catalog=False)
+    long = c.series(*args, shape='long', catalog=False)
+    wide.loc[[3, 4, 20], 'CUSR0000SA0L1E'] = None
+    long.loc[[3, 4, 20], 'value'] = None
+    wide = c._interpolate(wide, 'wide', method)
+    long = c._interpolate(long, 'long', method)
+    assert long['value'].tolist() == \
+        wide['CUSR0000SA0L1E'].tolist() + wide['CUUR0000SA0L1E'].tolist()
+
+def test_group_mixed_frequencies(api_key):
+    df = pd.DataFrame({
+        'seriesID' : ['A'] * 5 + ['B'] * 3,
+        'year' : [2000] * 8,
+        'period' : ['M01', 'M02', 'M03', 'M13', 'Q01', 'Q01', 'Q02', 'A01'],
+        'value' : [1.0, 2.0, 6.0, 50.0, 99.0, 10.0, 20.0, 30.0]
+    })
+    c = RequestBLS(api_key)
+    by_q = c._group(df, ['A', 'B'], 'long', 'q', 'mean')
+    assert by_q['period'].tolist() == ['Q01', 'Q01', 'Q02']
+    assert by_q['value'].tolist() == [3.0, 10.0, 20.0]
+    by_y = c._group(df, ['A', 'B'], 'long', 'y', 'mean')
+    assert by_y['period'].tolist() == ['A01', 'A01']
+    assert by_y['value'].tolist() == [3.0, 15.0]
+
+@pytest.mark.parametrize(
+    'groupby_method, expected_values', [
+    ('mean', [2.0, 5.0]),
+    ('first', [1.0, 4.0]),
+    ('last', [3.0, 6.0]),
+    ('min', [1.0, 4.0]),
+    ('max', [3.0, 6.0]),
+    ('sum', [6.0, 15.0])
+])
+def test_group_methods(api_key, groupby_method, expected_values):
+    df = pd.DataFrame({
+        'year' : [1999] * 6,
+        'period' : [f'M0{i}' for i in range(1, 7)],
+        'periodName' : ['x'] * 6,
+        'S' : [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        'T' : [None] * 6
+    })
+    df = RequestBLS(api_key)._group(df, ['S', 'T'], 'wide', 'q', groupby_method)
+    assert list(df.columns) == ['year', 'period', 'S', 'T']
+    assert df['year'].tolist() == [1999, 1999]
+    assert df['S'].tolist() == expected_values
+    assert df['T'].isna().all()
+
+@pytest.mark.parametrize('groupby_method', ['mean', 'first', 'last', 'min', 'max', 'sum',
+                                            'median'])
+def test_group_long_methods(api_key, groupby_method):
+    # rows out of order, with missing values inside groups and a series without any data
+    df = pd.DataFrame({
+        'seriesID' : ['B'] * 6 + ['A'] * 6 + ['C'] * 3,
+        'year' : [2001] * 3 + [2000] * 3 + [2000] * 6 + [2000] * 3,
+        'period' : ['M01', 'M02', 'M03'] * 2 + [f'M0{i}' for i in range(1, 7)]
+            + ['M01', 'M02', 'M03'],
+        'value' : [7.0, None, 9.0, None, None, None, 1.0, None, 3.0, 4.0, 5.0, 6.0] + [None] * 3
+    })
+    grouped = RequestBLS(api_key)._group(df, ['A', 'B', 'C'], 'long', 'q', groupby_method)
+    df['period'] = 'Q0' + ((df['period'].str[1:].astype(int) - 1) // 3 + 1).astype(str)
+    expected = df.groupby(['seriesID', 'year', 'period'])['value']
+    expected = expected.sum(min_count=1) if groupby_method == 'sum' \
+        else expected.agg(groupby_method)
+    assert_frame_equal(grouped, expected.reset_index())
+
 dict1 = {
     'series' : ['LNS14000000'],
     'start_year' : 2009,
@@ -84,7 +506,7 @@ dict2 = {
     (dict1, 'u3_2009_groupby_q.pickle'),
     (dict2, 'cpi_1999-2000_long_groupby_s.pickle')
 ])
-def test_series(kwarg_dict, pickle_file):
+def test_series(api_key, kwarg_dict, pickle_file):
     benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
     df = RequestBLS(api_key).series(**kwarg_dict)
     assert_frame_equal(df, benchmark)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import pytest
+import os
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from blsconnect import RequestBLS, SeriesResult
+from blsconnect.request import InputError
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CPI = ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+
+@pytest.fixture
+def session(stub_session):
+    return stub_session('cpi_1999-2000.json')
+
+@pytest.mark.parametrize(
+    'view, kwargs, pickle_file', [
+    ('long', {}, 'cpi_1999-2000_long.pickle'),
+    ('wide', {}, 'cpi_1999-2000_wide.pickle'),
+    ('long', {'groupby' : 's'}, 'cpi_1999-2000_long_groupby_s.pickle')
+])
+def test_views_match_series(api_key, session, view, kwargs, pickle_file):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    result = RequestBLS(api_key, session=session).series(CPI, 1999, 2000, catalog=False,
+                                                         lazy=True)
+    df = getattr(result, view)(**kwargs)
+    assert_frame_equal(df, benchmark)
+    assert getattr(result, view)(**kwargs) is df
+
+def test_views_share_one_pull(api_key, session):
+    c = RequestBLS(api_key, session=session)
+    result = c.series(CPI, 1999, 2000, catalog=False, lazy=True)
+    assert len(result) == 48
+    for groupby in [None, 'q', 'y']:
+        for shape in ['long', 'wide']:
+            assert_frame_equal(getattr(result, shape)(groupby=groupby, interpolate='linear'),
+                               c.series(CPI, 1999, 2000, shape=shape, groupby=groupby,
+                                        interpolate='linear', catalog=False))
+    assert len(session.posts) == 7
+
+def test_footnotes(api_key):
+    df = pd.DataFrame({
+        'seriesID' : ['A', 'A', 'B'],
+        'year' : [2000, 2000, 2000],
+        'period' : ['M01', 'M02', 'M01'],
+        'periodName' : ['January', 'February', 'January'],
+        'value' : [1.0, 2.0, 3.0],
+        'footnotes' : [[{}], [{'code' : 'P', 'text' : 'preliminary'}], [{}]]
+    })
+    result = SeriesResult(RequestBLS(api_key), df, ['A', 'B'], 2000, 2000)
+    assert result.footnotes()['period'].tolist() == ['M02']
+    with pytest.raises(InputError):
+        result.wide(keep_footnotes=True)
+
+def test_to_arrow(api_key, session):
+    pytest.importorskip('pyarrow')
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    result = RequestBLS(api_key, session=session).series(CPI, 1999, 2000, catalog=False,
+                                                         lazy=True)
+    table = result.to_arrow()
+    assert table.num_rows == 48
+    assert table.column('seriesID').to_pylist() == benchmark['seriesID'].tolist()
+    assert table.column('value').to_pylist() == benchmark['value'].tolist()
+
+def test_lazy_series_many(api_key, session):
+    c = RequestBLS(api_key, session=session)
+    result, df = c.series_many([
+        {'series' : CPI, 'start_year' : 1999, 'end_year' : 2000, 'lazy' : True},
+        (CPI, 2000, 2000)
+    ])
+    assert len(session.posts) == 1
+    wide = result.wide()
+    assert_frame_equal(wide[wide['year'] == 2000].reset_index(drop=True), df)
+
+def test_lazy_with_transformations(api_key, session):
+    with pytest.raises(InputError):
+        RequestBLS(api_key, session=session).series(CPI, 1999, 2000, groupby='q', lazy=True)
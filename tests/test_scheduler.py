@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import pytest
+import json
+import requests
+from blsconnect import RequestBLS
+from blsconnect.request import InputError
+from blsconnect.scheduler import RequestScheduler
+
+class FlakySession(object):
+    """Stands in for a ``requests.Session``. Answers posts with each of the given status codes in
+    turn, then with a successful response.
+    """
+    def __init__(self, status_codes, messages=()):
+        self.status_codes = list(status_codes)
+        self.messages = list(messages)
+        self.posts = 0
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.posts += 1
+        r = requests.models.Response()
+        r.status_code = self.status_codes.pop(0) if self.status_codes else 200
+        if self.messages:
+            body = {'status' : 'REQUEST_NOT_PROCESSED', 'message' : [self.messages.pop(0)]}
+        else:
+            body = {'status' : 'REQUEST_SUCCEEDED', 'message' : [], 'Results' : {'series' : []}}
+        r._content = json.dumps(body).encode()
+        return r
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+def test_token_bucket():
+    scheduler = RequestScheduler(rate=2, period=1.0)
+    delays = [scheduler.acquire() for i in range(4)]
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.5, abs=0.05)
+    assert delays[3] == pytest.approx(1.0, abs=0.05)
+
+@pytest.mark.parametrize('attempt, low, high', [(0, 0.5, 1.0), (3, 4.0, 8.0), (10, 5.0, 10.0)])
+def test_backoff_delay(attempt, low, high):
+    scheduler = RequestScheduler(backoff=1.0, max_backoff=10.0)
+    assert low <= scheduler.backoff_delay(attempt) <= high
+
+def test_remaining():
+    scheduler = RequestScheduler(daily_limit=3)
+    for i in range(5):
+        scheduler.count()
+    assert scheduler.requests_today == 5
+    assert scheduler.remaining == 0
+    assert RequestScheduler().remaining is None
+
+@pytest.mark.parametrize(
+    'status_codes, messages, expected_posts', [
+    ([], [], 1),
+    ([503, 502], [], 3),
+    ([], ['Request could not be serviced, as the threshold was reached.'], 2)
+])
+def test_retry(status_codes, messages, expected_posts):
+    session = FlakySession(status_codes, messages)
+    c = RequestBLS('key', session=session, scheduler=RequestScheduler(backoff=0))
+    c.series('LNS14000000', 2009, 2009)
+    assert session.posts == expected_posts
+
+def test_retry_gives_up():
+    session = FlakySession([503] * 5)
+    c = RequestBLS('key', session=session, scheduler=RequestScheduler(max_retries=2, backoff=0))
+    with pytest.raises(requests.HTTPError):
+        c.series('LNS14000000', 2009, 2009)
+    assert session.posts == 3
+
+def test_retry_gives_up_when_throttled():
+    message = 'Request could not be serviced, as the threshold was reached.'
+    session = FlakySession([], [message] * 5)
+    c = RequestBLS('key', session=session, scheduler=RequestScheduler(max_retries=2, backoff=0))
+    with pytest.raises(InputError, match='threshold'):
+        c.series('LNS14000000', 2009, 2009)
+    assert session.posts == 3
+
+def test_daily_limit():
+    session = FlakySession([])
+    c = RequestBLS(session=session, scheduler=RequestScheduler(daily_limit=2))
+    with pytest.raises(InputError):
+        c.series('LNS14000000', 1990, 2019)
+    assert session.posts == 0
+
+def test_daily_limit_raises_instead_of_waiting(monkeypatch):
+    monkeypatch.setattr('time.sleep', lambda seconds: pytest.fail('slept until the limit reset'))
+    session = FlakySession([])
+    scheduler = RequestScheduler(daily_limit=3)
+    c = RequestBLS(session=session, scheduler=scheduler)
+    c.series('LNS14000000', 2010, 2019)
+    assert scheduler.remaining == 2
+    with pytest.raises(InputError, match='needs 3 requests, but only 2 of the daily limit of 3'):
+        c.series('LNS14000000', 1980, 2009)
+    assert session.posts == 1 and scheduler.remaining == 2
+    c.series('LNS14000000', 1990, 2009)
+    assert session.posts == 3 and scheduler.remaining == 0
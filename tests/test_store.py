@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import pytest
+import os
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from blsconnect import RequestBLS, ParquetStore
+
+pytest.importorskip('pyarrow')
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CPI = ['CUSR0000SA0L1E', 'CUUR0000SA0L1E']
+
+@pytest.fixture
+def store(tmp_path):
+    return ParquetStore(str(tmp_path / 'store'))
+
+@pytest.mark.parametrize(
+    'series, start_year, end_year, expected_rows', [
+    (CPI, 1999, 2000, 48),
+    ('CUUR0000SA0L1E', None, None, 24),
+    (CPI, 2000, None, 24),
+    (['CUUR0000SA0L1E', 'LNS14000000'], None, 1999, 12),
+    (['LNS14000000'], None, None, 0)
+])
+def test_read_filters(store, series, start_year, end_year, expected_rows):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    store.write(benchmark)
+    df = store.read(series, start_year, end_year)
+    series = [series] if isinstance(series, str) else series
+    expected = benchmark[benchmark['seriesID'].isin(series)
+                         & benchmark['year'].between(start_year or 0, end_year or 9999)]
+    assert len(df) == expected_rows
+    assert_frame_equal(df, expected.reset_index(drop=True), check_dtype=False)
+
+def test_read_sorts_periods(store):
+    # written newest first, the way the API returns data
+    periods = ['M13'] + [f'M{str(m).zfill(2)}' for m in range(12, 0, -1)]
+    df = pd.DataFrame({
+        'seriesID' : 'CUUR0000SA0L1E',
+        'year' : [2000] * 13 + [1999] * 13,
+        'period' : periods * 2,
+        'periodName' : 'x',
+        'value' : [float(i) for i in range(26)]
+    })
+    store.write(df)
+    df = store.read('CUUR0000SA0L1E')
+    assert df['year'].tolist() == [1999] * 13 + [2000] * 13
+    assert df['period'].tolist() == periods[::-1] * 2
+
+def test_write_replaces_cells(store):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    store.write(benchmark)
+    revised = benchmark[benchmark['year'] == 2000].assign(value=0.0)
+    store.write(revised.iloc[:3], cells=[('CUSR0000SA0L1E', 2000)])
+    df, cells = store.load(CPI, 1999, 2000)
+    assert len(df) == 48 - 12 + 3
+    assert ('CUSR0000SA0L1E', 2000) in cells
+    assert df.loc[df['year'] == 2000, 'value'].eq(0).sum() == 3
+
+@pytest.mark.parametrize(
+    'json_file, pickle_file, args, kwargs', [
+    ('u3_2009.json', 'u3_2009.pickle',
+     (['LNS14000000'], 2009, 2009), {'keep_footnotes' : True}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_long.pickle', (CPI, 1999, 2000), {'shape' : 'long'}),
+    ('cpi_1999-2000.json', 'cpi_1999-2000_wide.pickle', (CPI, 1999, 2000), {'shape' : 'wide'})
+])
+def test_series_from_store(api_key, stub_session, store, json_file, pickle_file, args, kwargs):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, f'static/{pickle_file}'))
+    session = stub_session(json_file)
+    c = RequestBLS(api_key, session=session, store=store)
+    assert_frame_equal(c.series(*args, catalog=False, **kwargs), benchmark)
+    assert_frame_equal(c.series(*args, catalog=False, **kwargs), benchmark)
+    assert len(session.posts) == 1
+
+def test_series_requests_missing_cells(api_key, stub_session, store):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    session = stub_session('cpi_1999-2000.json')
+    c = RequestBLS(api_key, session=session, store=store)
+    c.series(CPI, 1999, 2000, shape='long', catalog=False)
+    df = c.series(CPI, 1999, 2001, shape='long', catalog=False)
+    assert_frame_equal(df, benchmark)
+    assert [(p['startyear'], p['endyear']) for p in session.posts] == \
+        [('1999', '2000'), ('2001', '2001')]
+    c.series(CPI, 1999, 2001, shape='long', catalog=False) # 2001 is stored without data
+    assert len(session.posts) == 2
+
+def test_new_client_served_from_store(api_key, stub_session, store):
+    session = stub_session('u3_2009.json')
+    RequestBLS(api_key, session=session, store=store).series('LNS14000000', 2009, 2009)
+    c = RequestBLS(api_key, session=session, store=ParquetStore(store.path))
+    c.series('LNS14000000', 2009, 2009)
+    assert len(session.posts) == 1
+    assert c.catalog['LNS14000000']['series_id'] == 'LNS14000000'
+    assert list(store.load_catalogs(['LNS14000000', 'CUUR0000SA0L1E'])) == ['LNS14000000']
+
+def test_iter_series_from_store(api_key, stub_session, store):
+    benchmark = pd.read_pickle(os.path.join(ROOT_DIR, 'static/cpi_1999-2000_long.pickle'))
+    session = stub_session('cpi_1999-2000.json')
+    c = RequestBLS(api_key, session=session, store=store)
+    c.series(CPI, 1999, 2000, shape='long', catalog=False)
+    dfs = list(c.iter_series(CPI, 1999, 2000, shape='long', catalog=False))
+    assert len(session.posts) == 1
+    assert len(dfs) == 1
+    assert_frame_equal(dfs[0], benchmark, check_dtype=False)